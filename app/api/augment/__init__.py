@@ -2,7 +2,6 @@ from fastapi import APIRouter
 from schemas import AugmentCtxIn, AugmentCtxOut
 from services.pipeline import get_augment_pipeline
 
-
 route = APIRouter()
 
 
@@ -10,4 +9,9 @@ route = APIRouter()
 async def augment_ctx(req: AugmentCtxIn):
     """Augment the text fragment with additional context."""
     pipeline = get_augment_pipeline()
-    return await pipeline.augment_context(req.text, req.chapter)
+    return await pipeline.augment_context(
+        req.text,
+        req.chapter,
+        include_history=req.include_history,
+        mode=req.mode,
+    )
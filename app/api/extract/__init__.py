@@ -15,4 +15,5 @@ async def extract_save(req: ExtractSaveIn) -> ExtractSaveOut:
         chapter=req.chapter,
         stage=req.stage,
         tags=req.tags,
+        lineage_id=req.lineage_id,
     )
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Path
+from schemas import ChapterSnapshotOut
+from services.chapter_snapshot import get_chapter_snapshot_service
+
+route = APIRouter()
+
+
+@route.get("/chapter-snapshot/{chapter}", response_model=ChapterSnapshotOut)
+async def chapter_snapshot(chapter: int = Path(..., ge=1)):
+    """Return the world state (latest value of every entity predicate) at ``chapter``."""
+    service = get_chapter_snapshot_service()
+    return await service.snapshot(chapter)
@@ -30,6 +30,28 @@ class AppSettings(BaseSettings):
 
     # === Сервисные параметры ===
     DEBUG: bool = False
+    NEO4J_UNWIND_BATCH_SIZE: int = 500  # строк на один UNWIND-запрос
+    AUGMENT_CACHE_SIZE: int = 1024  # ответов /augment-context в кэше, 0 — выкл.
+    SNAPSHOT_CHECKPOINT_INTERVAL: int = 10  # глав между снапшотами состояния
+    # Архивировать факты старых черновиков фрагмента (по lineageId из запроса)
+    SUPERSEDE_DRAFTS: bool = False
+    # Очередь фоновой Raptor-кластеризации (SQLite); пусто — кластеризовать в запросе
+    RAPTOR_OUTBOX_PATH: str = "data/raptor_outbox.sqlite3"
+    # Попыток на элемент очереди, после чего он уходит в raptor_outbox_dead
+    RAPTOR_OUTBOX_MAX_ATTEMPTS: int = 5
+    # Хранение векторов RaptorNode: compact (только вектор объекта), float16, full
+    RAPTOR_VECTOR_LAYOUT: str = "compact"
+    # Векторные индексы новых коллекций Weaviate (см. config.weaviate.parse_index_spec);
+    # пусто — настройки сервера по умолчанию. Alias и RaptorNode остаются на HNSW
+    # без квантизации; сжатие (quantizer=pq|bq) включать после make bench-vector-index
+    WEAVIATE_INDEX_TEMPLATES: str = "flat"
+    WEAVIATE_INDEX_ALIAS: str = "hnsw"
+    WEAVIATE_INDEX_RAPTOR: str = "hnsw"
+    # Размерность эмбеддингов по коллекциям (0 — полная, 1536); после смены —
+    # make reindex-embeddings
+    EMBEDDING_DIMS_TEMPLATES: int = 0
+    EMBEDDING_DIMS_ALIAS: int = 0
+    EMBEDDING_DIMS_RAPTOR: int = 0
 
     class Config:
         env_file = ".env"  # Читаем из корня проекта
@@ -1,17 +1,97 @@
-from typing import Callable, List
+from functools import lru_cache, partial
+from typing import Awaitable, Callable, List, Optional, Sequence
 import openai
 from config import app_settings
 
 EmbedderFn = Callable[[str], List[float]]
+AsyncEmbedderFn = Callable[[str], Awaitable[List[float]]]
+BatchEmbedderFn = Callable[[Sequence[str]], List[List[float]]]
 
 
-def openai_embedder(text: str) -> list[float]:
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def _dimension_kwargs(dimensions: Optional[int]) -> dict:
+    return {"dimensions": dimensions} if dimensions else {}
+
+
+def openai_embedder(text: str, dimensions: Optional[int] = None) -> list[float]:
     """
-    Функция для получения 1536-мерного эмбеддинга текста через OpenAI API.
+    Функция для получения эмбеддинга текста через OpenAI API (1536 измерений).
     Ключ API передается как параметр.
+
+    ``dimensions`` укорачивает вектор средствами модели (нормированным он
+    остаётся); ``None`` или 0 — полная размерность.
     """
     openai.api_key = app_settings.OPENAI_API_KEY
 
-    response = openai.embeddings.create(model="text-embedding-3-small", input=text)
+    response = openai.embeddings.create(
+        model=EMBEDDING_MODEL, input=text, **_dimension_kwargs(dimensions)
+    )
     embedding = response.data[0].embedding
     return embedding
+
+
+def openai_batch_embedder(
+    texts: Sequence[str], dimensions: Optional[int] = None, batch_size: int = 512
+) -> list[list[float]]:
+    """
+    Эмбеддинги списка текстов: один запрос на каждые ``batch_size`` текстов
+    (API принимает до 2048 строк за раз). Порядок векторов совпадает с
+    порядком ``texts``.
+    """
+    openai.api_key = app_settings.OPENAI_API_KEY
+
+    vectors: list[list[float]] = []
+    for start in range(0, len(texts), batch_size):
+        end = start + batch_size
+        response = openai.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=list(texts[start:end]),
+            **_dimension_kwargs(dimensions),
+        )
+        data = sorted(response.data, key=lambda item: item.index)
+        vectors.extend(item.embedding for item in data)
+    return vectors
+
+
+@lru_cache(maxsize=1)
+def _async_openai_client() -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(api_key=app_settings.OPENAI_API_KEY)
+
+
+async def openai_embedder_async(
+    text: str, dimensions: Optional[int] = None
+) -> list[float]:
+    """
+    Асинхронный вариант :func:`openai_embedder`.
+
+    Использует общий ``AsyncOpenAI`` клиент и не блокирует event loop.
+    """
+    response = await _async_openai_client().embeddings.create(
+        model=EMBEDDING_MODEL, input=text, **_dimension_kwargs(dimensions)
+    )
+    return response.data[0].embedding
+
+
+def embedder_for(dimensions: int) -> EmbedderFn:
+    """:func:`openai_embedder` с размерностью ``dimensions`` (0 — полная)."""
+    return (
+        partial(openai_embedder, dimensions=dimensions)
+        if dimensions
+        else openai_embedder
+    )
+
+
+def batch_embedder_for(dimensions: int) -> BatchEmbedderFn:
+    """Пакетный вариант :func:`embedder_for`."""
+    if not dimensions:
+        return openai_batch_embedder
+    return partial(openai_batch_embedder, dimensions=dimensions)
+
+
+def async_embedder_for(dimensions: int) -> AsyncEmbedderFn:
+    """Асинхронный вариант :func:`embedder_for`."""
+    if not dimensions:
+        return openai_embedder_async
+    return partial(openai_embedder_async, dimensions=dimensions)
@@ -1,7 +1,119 @@
 import os
+from typing import Any, Callable, Dict, Optional, Sequence
+
 import weaviate
+from weaviate.classes.config import Configure
 from weaviate.classes.init import Auth, AdditionalConfig, Timeout
 
+_INDEX_KINDS = {
+    "flat": Configure.VectorIndex.flat,
+    "hnsw": Configure.VectorIndex.hnsw,
+}
+_INDEX_OPTIONS = {
+    "flat": {"vector_cache_max_objects"},
+    "hnsw": {
+        "ef",
+        "ef_construction",
+        "max_connections",
+        "dynamic_ef_min",
+        "dynamic_ef_max",
+        "flat_search_cutoff",
+        "vector_cache_max_objects",
+    },
+}
+_QUANTIZERS = {
+    "pq": Configure.VectorIndex.Quantizer.pq,
+    "bq": Configure.VectorIndex.Quantizer.bq,
+    "sq": Configure.VectorIndex.Quantizer.sq,
+}
+_QUANTIZER_OPTIONS = {
+    "pq": {"segments", "centroids", "training_limit"},
+    "bq": {"rescore_limit"},
+    "sq": {"rescore_limit", "training_limit"},
+}
+
+
+def parse_index_spec(spec: str) -> tuple[str, Dict[str, Any]]:
+    """Разбирает строку вида ``"hnsw,ef=128,max_connections=32,quantizer=pq"``.
+
+    Возвращает тип индекса и его параметры; ``quantizer`` — ``pq``/``bq``/``sq``
+    (для ``flat`` Weaviate поддерживает только ``bq``), его параметры
+    (``segments``, ``training_limit``, ``rescore_limit``…) собираются в
+    ``quantizer_options``.
+    """
+    kind, *options = [part.strip() for part in spec.split(",") if part.strip()]
+    kind = kind.lower()
+    if kind not in _INDEX_KINDS:
+        raise ValueError(f"Неизвестный тип векторного индекса: {kind!r}")
+    params: Dict[str, Any] = {}
+    quantizer_options: Dict[str, int] = {}
+    for option in options:
+        key, sep, value = option.partition("=")
+        key, value = key.strip(), value.strip()
+        if not sep:
+            raise ValueError(f"Ожидалось key=value: {option!r}")
+        if key == "quantizer":
+            if value not in _QUANTIZERS or (kind == "flat" and value != "bq"):
+                raise ValueError(f"Квантизация {value!r} недоступна для {kind}")
+            params[key] = value
+        elif key in _INDEX_OPTIONS[kind]:
+            params[key] = int(value)
+        elif key in set().union(*_QUANTIZER_OPTIONS.values()):
+            quantizer_options[key] = int(value)
+        else:
+            raise ValueError(f"Параметр {key!r} недоступен для {kind}")
+    if quantizer_options:
+        allowed = _QUANTIZER_OPTIONS.get(params.get("quantizer", ""), set())
+        unknown = set(quantizer_options) - allowed
+        if unknown:
+            raise ValueError(f"Параметры {sorted(unknown)} требуют другой квантизации")
+        params["quantizer_options"] = quantizer_options
+    return kind, params
+
+
+def reload_collection(
+    client: weaviate.WeaviateClient,
+    name: str,
+    ensure_schema: Callable[[], None],
+    rows: Sequence[tuple[Any, Dict[str, Any], Sequence[float]]],
+    *,
+    batch_size: int = 100,
+) -> int:
+    """Пересоздаёт коллекцию ``name`` и загружает в неё ``rows``.
+
+    ``rows`` — тройки ``(uuid, properties, vector)``, посчитанные заранее.
+    Размерность векторного индекса фиксируется первой вставкой, поэтому
+    вектора другой длины нельзя записать поверх старых: коллекция удаляется
+    и создаётся заново через ``ensure_schema``. Возвращает число объектов.
+    """
+    client.collections.delete(name)
+    ensure_schema()
+    coll = client.collections.get(name)
+    with coll.batch.fixed_size(batch_size=batch_size) as batch:
+        for uid, props, vector in rows:
+            batch.add_object(properties=props, uuid=uid, vector=list(vector))
+    failed = coll.batch.failed_objects
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} объектов {name} не записаны: {failed[0].message}"
+        )
+    return len(rows)
+
+
+def vector_index_config(spec: Optional[str]) -> Any:
+    """Конфигурация векторного индекса коллекции по строке ``spec``.
+
+    Пустая строка или ``None`` — настройки сервера по умолчанию.
+    """
+    if not spec:
+        return None
+    kind, params = parse_index_spec(spec)
+    quantizer = params.pop("quantizer", None)
+    options = params.pop("quantizer_options", {})
+    if quantizer:
+        params["quantizer"] = _QUANTIZERS[quantizer](**options)
+    return _INDEX_KINDS[kind](**params)
+
 
 def connect_to_weaviate(
     *,
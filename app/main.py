@@ -2,7 +2,11 @@ from fastapi import FastAPI
 
 from api import api_router
 from config import app_settings
+from services.augment_cache import get_augment_cache
+from services.graph_schema import ensure_graph_schema
+from services.identity_service import get_identity_service
 from services.pipeline import get_extraction_pipeline
+from services.raptor_outbox import get_raptor_worker
 
 
 def create_app() -> FastAPI:
@@ -13,11 +17,30 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def _startup() -> None:
         get_extraction_pipeline()
+        await get_identity_service().startup()
+        await ensure_graph_schema()
+        worker = get_raptor_worker()
+        if worker is not None:
+            worker.start()
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        worker = get_raptor_worker()
+        if worker is not None:
+            await worker.stop()
+        await get_identity_service().shutdown()
 
     @app.get("/v1/sys/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/v1/sys/augment-cache")
+    def augment_cache_stats() -> dict:
+        cache = get_augment_cache()
+        return (
+            {"enabled": False} if cache is None else {"enabled": True, **cache.stats()}
+        )
+
     return app
 
 
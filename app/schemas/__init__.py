@@ -6,16 +6,27 @@ from pydantic import Field
 
 from fastapi_camelcase import CamelModel
 
+from schemas.cypher import AugmentMode
+
 from schemas.extract import (
     AliasOut,
     ExtractSaveIn,
     ExtractSaveOut,
     Relationship,
 )
+from schemas.snapshot import ChapterSnapshotOut, SnapshotFact
 
 
 class AugmentCtxIn(ExtractSaveIn):
-    pass
+    include_history: bool = Field(
+        False, description="Включать факты, вытесненные новыми этапами черновика"
+    )
+    mode: AugmentMode = Field(
+        AugmentMode.TEMPLATES,
+        description="templates — запрос на каждый шаблон; neighbourhood — один "
+        "запрос по связям найденных в тексте сущностей; episodes — похожие "
+        "прошлые фрагменты из ближайших Raptor-кластеров",
+    )
 
 
 class AugmentRow(CamelModel):
@@ -33,11 +44,43 @@ class AugmentRow(CamelModel):
     meta_raptor_id: str | None = Field(None, description="Связанный RaptorNode")
     meta_confidence: float | None = Field(None, description="Уверенность шаблона")
     meta_draft_stage: str | None = Field(None, description="Этап черновика")
+    meta_archived: bool | None = Field(
+        None, description="Факт вытеснен более поздним этапом черновика"
+    )
     triple_text: str | None = Field(None, description="Строка вида 'A REL B'")
 
 
+class ProfileEntry(CamelModel):
+    """Latest value of one predicate of an entity (``EntityProfile``)."""
+
+    entity: str = Field(..., description="Имя сущности или её идентификатор")
+    predicate: str = Field(..., description="Тип связи")
+    value: str | None = Field(None, description="Текущее значение")
+    chapter_from: int | None = Field(None, description="Глава, с которой действует")
+    chapter_to: int | None = Field(None, description="Последняя глава с этим фактом")
+    draft_stage: str | None = Field(None, description="Этап черновика")
+
+
+class Episode(CamelModel):
+    """Earlier chunk from a Raptor cluster close to the passage."""
+
+    chunk_id: str = Field(..., description="ID чанка")
+    chapter: int | None = Field(None, description="Глава чанка")
+    raptor_id: str = Field(..., description="Raptor-кластер чанка")
+    distance: float | None = Field(
+        None, description="Косинусное расстояние кластера до текста"
+    )
+    text: str | None = Field(None, description="Текст чанка")
+
+
 class AugmentContext(CamelModel):
     rows: List[AugmentRow] = Field(default_factory=list, description="Найденные связи")
+    profiles: List[ProfileEntry] = Field(
+        default_factory=list, description="Текущее состояние найденных сущностей"
+    )
+    episodes: List[Episode] = Field(
+        default_factory=list, description="Похожие прошлые фрагменты (режим episodes)"
+    )
     summary: str | None = Field(None, description="Краткое резюме")
 
 
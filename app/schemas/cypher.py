@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal, Union
+from typing import List, Optional, Literal, Tuple, Union
 from enum import Enum
 from datetime import datetime
 import uuid
@@ -15,6 +15,22 @@ class TemplateRenderMode(str, Enum):
     AUGMENT = "augment"
 
 
+class AugmentMode(str, Enum):
+    """How ``/augment-context`` reads the graph.
+
+    ``templates`` runs the augment Cypher of every matching template.
+    ``neighbourhood`` fetches the typed relationships of the entities found in
+    the passage with one query; templates are run only for lookups it does
+    not cover (facts without an object node, e.g. ``death_event``).
+    ``episodes`` looks up the Raptor clusters nearest to the passage and
+    returns their earlier chunks and the relationships those chunks produced.
+    """
+
+    TEMPLATES = "templates"
+    NEIGHBOURHOOD = "neighbourhood"
+    EPISODES = "episodes"
+
+
 class SlotDefinition(BaseModel):
     """
     Определение одного слота, который должен быть извлечён из текста.
@@ -114,6 +130,41 @@ class CypherTemplateBase(BaseModel):
                 f"Template {self.name} sets use_base_extract without extract support"
             )
 
+    def node_label(self, expr: Optional[str]) -> Optional[str]:
+        """Graph label of the node referenced by ``expr`` (``"$slot"``).
+
+        ``return_map`` lists the domain nodes in subject/object order (or
+        keyed by slot name). The label is dropped when the slot declares an
+        ``entity_type`` that disagrees with it: ``destruction_event`` maps its
+        ``ITEM_OR_PLACE`` target to a placeholder ``Target`` label that is
+        never written.
+        """
+        if not expr or not expr.startswith("$"):
+            return None
+        slot_name = expr[1:]
+        label = self.return_map.get(slot_name)
+        if label is None and self.graph_relation:
+            roles = [self.graph_relation.subject, self.graph_relation.object]
+            labels = list(self.return_map.values())
+            if expr in roles and roles.index(expr) < len(labels):
+                label = labels[roles.index(expr)]
+        slot = self.slots.get(slot_name)
+        if label and slot and slot.entity_type:
+            if slot.entity_type.upper() != label.upper():
+                return None
+        return label
+
+    def related_nodes(self, slots: dict) -> List[Tuple[str, Optional[str]]]:
+        """``(id, label)`` of the subject/object nodes for ``MENTIONS`` edges."""
+        if not self.graph_relation:
+            return []
+        nodes: List[Tuple[str, Optional[str]]] = []
+        for expr in (self.graph_relation.subject, self.graph_relation.object):
+            value = slots.get(expr[1:]) if expr and expr.startswith("$") else expr
+            if value is not None:
+                nodes.append((value, self.node_label(expr)))
+        return nodes
+
     def render(
         self,
         slots: dict,
@@ -140,9 +191,9 @@ class CypherTemplateBase(BaseModel):
             context["triple_text"] = (
                 f"{subject} {self.graph_relation.predicate} {object_}"
             )
-            context["related_node_ids"] = [
-                val for val in [subject, object_] if val is not None
-            ]
+            nodes = self.related_nodes(slots)
+            context["related_node_ids"] = [node_id for node_id, _ in nodes]
+            context["related_node_labels"] = [label for _, label in nodes]
 
         # fallback if template_id missing
         context["template_id"] = self.name
@@ -27,6 +27,11 @@ class ExtractSaveIn(CamelModel):
     chapter: int = Field(..., ge=1, description="Номер главы (>= 1)")
     stage: StageEnum = Field(StageEnum.brainstorm, description="Этап черновика")
     tags: List[str] = Field(default_factory=list, description="Ключевые слова")
+    lineage_id: str | None = Field(
+        None,
+        description="ID фрагмента у клиента, общий для всех его черновиков; "
+        "по нему архивируются факты старых черновиков (SUPERSEDE_DRAFTS)",
+    )
 
     @field_validator("stage", mode="before")
     @classmethod
@@ -58,7 +63,9 @@ class ExtractSaveIn(CamelModel):
 
 class ExtractSaveOut(CamelModel):
     chunk_id: str = Field(..., description="Созданный ChunkNode")
-    raptor_node_id: str = Field(..., description="ID RaptorNode")
+    raptor_node_id: str | None = Field(
+        None, description="ID RaptorNode; пусто, пока чанк ждёт кластеризации"
+    )
     relationships: List[Relationship] = Field(
         default_factory=list, description="Вставленные связи"
     )
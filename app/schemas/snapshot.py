@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import List
+
+from fastapi_camelcase import CamelModel
+from pydantic import Field
+
+
+class SnapshotFact(CamelModel):
+    """Value of one predicate of an entity at the requested chapter."""
+
+    entity_id: str = Field(..., description="Идентификатор сущности")
+    entity: str = Field(..., description="Имя сущности или её идентификатор")
+    predicate: str = Field(..., description="Тип связи")
+    value: str | None = Field(None, description="Значение на эту главу")
+    since_chapter: int = Field(..., description="Глава, с которой действует")
+    chapter: int = Field(..., description="Последняя глава с этим фактом")
+    draft_stage: str | None = Field(None, description="Этап черновика")
+
+
+class ChapterSnapshotOut(CamelModel):
+    chapter: int = Field(..., description="Запрошенная глава")
+    checkpoint_chapter: int | None = Field(
+        None, description="Глава чекпоинта, с которого начат пересчёт"
+    )
+    replayed_deltas: int = Field(0, description="Применено дельт после чекпоинта")
+    facts: List[SnapshotFact] = Field(default_factory=list)
@@ -0,0 +1,45 @@
+"""Compare recall and latency of Weaviate vector index configurations.
+
+Usage (from ``app/``)::
+
+    python -m scripts.bench_vector_index [--n 5000] [--dim 256] [spec ...]
+
+Specs use the ``WEAVIATE_INDEX_*`` format, e.g. ``hnsw,ef=64,quantizer=bq``.
+"""
+
+import argparse
+
+from config import app_settings
+from config.weaviate import connect_to_weaviate
+from services.vector_bench import DEFAULT_SPECS, run_benchmark
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("specs", nargs="*", default=list(DEFAULT_SPECS))
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    client = connect_to_weaviate(
+        url=app_settings.WEAVIATE_URL, api_key=app_settings.WEAVIATE_API_KEY
+    )
+    try:
+        results = run_benchmark(
+            client, args.specs, n=args.n, dim=args.dim, queries=args.queries, k=args.k
+        )
+    finally:
+        client.close()
+
+    print(f"{'spec':<60} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'load s':>7}")
+    for r in results:
+        print(
+            f"{r.spec:<60} {r.recall:>7.3f} {r.p50_ms:>8.2f} "
+            f"{r.p95_ms:>8.2f} {r.load_s:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
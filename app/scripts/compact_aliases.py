@@ -0,0 +1,18 @@
+"""Deduplicate the ``Alias`` collection.
+
+Usage (from ``app/``)::
+
+    python -m scripts.compact_aliases
+"""
+
+from services.identity_service import get_identity_service_sync
+
+
+def main() -> None:
+    service = get_identity_service_sync()
+    stats = service.compact_aliases_sync()
+    print(f"scanned={stats['scanned']} kept={stats['kept']} deleted={stats['deleted']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Rewrite ``RaptorNode`` objects to the configured vector layout.
+
+Usage (from ``app/``)::
+
+    python -m scripts.compact_raptor_nodes
+"""
+
+from services.raptor_index import get_raptor_index
+
+
+def main() -> None:
+    rewritten = get_raptor_index().compact_nodes_sync()
+    print(f"rewritten={rewritten}")
+
+
+if __name__ == "__main__":
+    main()
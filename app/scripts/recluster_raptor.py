@@ -0,0 +1,22 @@
+"""Recompute Raptor clusters over all chunk vectors.
+
+Usage (from ``app/``)::
+
+    python -m scripts.recluster_raptor
+"""
+
+import asyncio
+
+from services.raptor_recluster import get_recluster_job
+
+
+def main() -> None:
+    stats = asyncio.run(get_recluster_job().run())
+    print(
+        f"chunks={stats['chunks']} clusters={stats['clusters']} "
+        f"backfilled={stats['backfilled']} stragglers={stats['stragglers']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
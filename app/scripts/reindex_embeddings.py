@@ -0,0 +1,37 @@
+"""Re-embed Weaviate collections with the configured embedding sizes.
+
+Usage (from ``app/``)::
+
+    python -m scripts.reindex_embeddings [templates] [aliases] [raptor]
+
+Run after changing ``EMBEDDING_DIMS_*``; without arguments all three
+collections are rewritten. Stop the API first: each collection is dropped
+and recreated while its vectors are loaded.
+"""
+
+import argparse
+import asyncio
+
+from services.identity_service import get_identity_service_sync
+from services.raptor_recluster import get_recluster_job
+from services.templates.service import get_template_service
+
+TARGETS = ("templates", "aliases", "raptor")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", choices=TARGETS, default=list(TARGETS))
+    args = parser.parse_args()
+
+    if "templates" in args.targets:
+        print(f"templates={get_template_service().reindex_sync()}")
+    if "aliases" in args.targets:
+        print(f"aliases={get_identity_service_sync().reindex_aliases_sync()}")
+    if "raptor" in args.targets:
+        stats = asyncio.run(get_recluster_job().run(reembed=True))
+        print(f"raptor_chunks={stats['chunks']} raptor_clusters={stats['clusters']}")
+
+
+if __name__ == "__main__":
+    main()
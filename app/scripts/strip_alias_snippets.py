@@ -0,0 +1,18 @@
+"""Drop legacy passage copies from ``Alias`` objects.
+
+Usage (from ``app/``)::
+
+    python -m scripts.strip_alias_snippets
+"""
+
+from services.identity_service import get_identity_service_sync
+
+
+def main() -> None:
+    service = get_identity_service_sync()
+    stripped = service.strip_alias_snippets_sync()
+    print(f"stripped={stripped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""In-process cache of ``/augment-context`` results.
+
+Writers call augment again and again on the same passage while they edit it.
+:class:`AugmentCache` keeps finished results keyed by the normalised text hash
+and chapter, so a repeated call skips slot filling, alias resolution and graph
+reads altogether.
+
+Entries are dropped when ``/extract-save`` writes relationships that touch an
+entity referenced by the cached result. An ``entity_id -> keys`` reverse index
+makes the lookup cheap. Results that contain names not yet resolved to an
+entity are indexed under :data:`UNRESOLVED` and dropped whenever new aliases
+are committed, since those names may resolve now.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from utils.helpers.lru import LRUCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+UNRESOLVED = "*"
+
+_Entry = Tuple[Dict[str, Any], Set[str]]
+
+
+def cache_key(text: str, chapter: int, *options: object) -> str:
+    """Key of an augment request: case and whitespace do not matter.
+
+    ``options`` are the request flags that change the result
+    (``include_history``, the augment mode).
+    """
+    normalised = " ".join(text.casefold().split())
+    digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+    return ":".join([digest, str(chapter), *map(str, options)])
+
+
+class AugmentCache:
+    """LRU cache of augment results with entity-driven invalidation.
+
+    Not thread-safe: like :class:`LRUCache` it is used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._entries: LRUCache[str, _Entry] = LRUCache(maxsize)
+        self._by_entity: Dict[str, Set[str]] = {}
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return copy.deepcopy(entry[0])
+
+    def put(self, key: str, result: Dict[str, Any], entity_ids: Iterable[str]) -> None:
+        """Store ``result`` and index it under every referenced entity."""
+        self._unindex(key)
+        entities = set(entity_ids)
+        for evicted_key, (_, evicted) in self._entries.set(
+            key, (copy.deepcopy(result), entities)
+        ):
+            self._unindex(evicted_key, evicted)
+        for entity_id in entities:
+            self._by_entity.setdefault(entity_id, set()).add(key)
+
+    def invalidate(
+        self, entity_ids: Iterable[str], *, new_aliases: bool = False
+    ) -> int:
+        """Drop results referencing ``entity_ids``; return how many were dropped.
+
+        ``new_aliases`` also drops results with unresolved names.
+        """
+        targets = set(entity_ids)
+        if new_aliases:
+            targets.add(UNRESOLVED)
+        keys: Set[str] = set()
+        for entity_id in targets:
+            keys.update(self._by_entity.get(entity_id, ()))
+        for key in keys:
+            self._unindex(key)
+        self.invalidations += len(keys)
+        if keys:
+            logger.debug("Augment cache: invalidated %d entries", len(keys))
+        return len(keys)
+
+    def _unindex(self, key: str, entities: Optional[Set[str]] = None) -> None:
+        if entities is None:
+            entry = self._entries.pop(key)
+            if entry is None:
+                return
+            entities = entry[1]
+        for entity_id in entities:
+            keys = self._by_entity.get(entity_id)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._by_entity[entity_id]
+
+    @property
+    def hit_ratio(self) -> float:
+        return self._entries.hit_ratio
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "hits": self._entries.hits,
+            "misses": self._entries.misses,
+            "hit_ratio": self.hit_ratio,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=1)
+def get_augment_cache() -> Optional[AugmentCache]:
+    """Shared cache of both pipelines; ``None`` when disabled in settings."""
+    from config import app_settings
+
+    if app_settings.AUGMENT_CACHE_SIZE <= 0:
+        return None
+    return AugmentCache(app_settings.AUGMENT_CACHE_SIZE)
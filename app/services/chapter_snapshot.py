@@ -0,0 +1,204 @@
+"""World state at a given chapter, rebuilt from per-chapter deltas.
+
+Reconstructing the story state on demand means reading every relationship
+with ``chapter <= N``. Instead, :class:`ChapterSnapshotService` keeps:
+
+* ``ChapterDelta`` nodes, one per (chapter, entity, predicate), holding the
+  value stated in that chapter. They are written by ``/extract-save`` from the
+  same rows as ``EntityProfile``; within a chapter a later draft stage wins.
+* ``ChapterCheckpoint`` nodes with the full state (JSON) after every
+  ``checkpoint_interval``-th chapter. They are built lazily by snapshot
+  requests and deleted when a delta of their chapter or an earlier one is
+  written.
+
+A snapshot at chapter N reads the nearest checkpoint ``C <= N`` and the deltas
+of chapters ``C+1..N`` in a single query, replays them in chapter order and
+stores the checkpoints crossed on the way.
+
+Facts archived by draft supersession keep their delta until a newer draft of
+the chapter states the predicate again, as with ``EntityProfile``.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+from schemas.stage import StageEnum
+from services.graph_proxy import GraphProxy
+from services.identity_service import IdentityService
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ``run_unwind`` body; rows are the ``EntityProfile`` rows of the pipeline.
+# ``updated_at`` lets checkpoint writes detect deltas that landed meanwhile.
+_DELTA_CYPHER = """\
+MERGE (d:ChapterDelta {id: toString(row.chapter) + "|" + row.entity_id + "|" + row.predicate})
+ON CREATE SET d.chapter = row.chapter, d.entity_id = row.entity_id,
+              d.predicate = row.predicate, d.draft_stage = row.draft_stage
+WITH d, row WHERE row.draft_stage >= d.draft_stage
+SET d.value = row.current, d.draft_stage = row.draft_stage,
+    d.chunk_id = row.chunk_id, d.updated_at = timestamp()"""
+
+_INVALIDATE_CYPHER = (
+    "MATCH (c:ChapterCheckpoint) WHERE c.chapter >= $chapter DETACH DELETE c"
+)
+
+_SNAPSHOT_CYPHER = """\
+OPTIONAL MATCH (c:ChapterCheckpoint) WHERE c.chapter <= $chapter
+WITH c ORDER BY c.chapter DESC LIMIT 1
+WITH coalesce(c.chapter, 0) AS base, c.state AS state
+OPTIONAL MATCH (d:ChapterDelta) WHERE d.chapter > base AND d.chapter <= $chapter
+WITH base, state, d ORDER BY d.chapter
+RETURN base, state, timestamp() AS read_at,
+       collect(d {.chapter, .entity_id, .predicate, .value, .draft_stage}) AS deltas"""
+
+# Skipped when a delta up to the checkpoint's chapter was written after the
+# snapshot read; the next request rebuilds it.
+_CHECKPOINT_CYPHER = """\
+WITH row WHERE NOT EXISTS {
+  MATCH (d:ChapterDelta)
+  WHERE d.updated_at >= $read_at AND d.chapter <= row.chapter
+}
+MERGE (c:ChapterCheckpoint {id: "checkpoint-" + toString(row.chapter)})
+SET c.chapter = row.chapter, c.state = row.state"""
+
+_Key = Tuple[str, str]
+
+# Entity IDs as generated by ``IdentityService``; other values are literals.
+_ID_RE = re.compile(r"^[a-z_]+-[0-9a-f]{8}$")
+
+
+def replay(state: Dict[_Key, Dict[str, Any]], deltas: Sequence[Dict[str, Any]]) -> None:
+    """Apply ``deltas`` (ordered by chapter) to ``state`` in place.
+
+    ``since_chapter`` is kept while the value stays the same, so it tells
+    from which chapter the current value holds.
+    """
+    for delta in deltas:
+        key = (delta["entity_id"], delta["predicate"])
+        prev = state.get(key)
+        since = delta["chapter"]
+        if prev is not None and prev["value"] == delta.get("value"):
+            since = prev["since_chapter"]
+        state[key] = {
+            "entity_id": delta["entity_id"],
+            "predicate": delta["predicate"],
+            "value": delta.get("value"),
+            "since_chapter": since,
+            "chapter": delta["chapter"],
+            "draft_stage": delta.get("draft_stage"),
+        }
+
+
+def _load_state(raw: str | None) -> Dict[_Key, Dict[str, Any]]:
+    if not raw:
+        return {}
+    return {(f["entity_id"], f["predicate"]): f for f in json.loads(raw)}
+
+
+def _dump_state(state: Dict[_Key, Dict[str, Any]]) -> str:
+    return json.dumps([state[k] for k in sorted(state)], separators=(",", ":"))
+
+
+class ChapterSnapshotService:
+    """Record per-chapter deltas and serve chapter snapshots from them."""
+
+    def __init__(
+        self,
+        graph_proxy: GraphProxy,
+        identity_service: IdentityService | None = None,
+        checkpoint_interval: int = 10,
+    ) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be >= 1")
+        self.graph_proxy = graph_proxy
+        self.identity_service = identity_service
+        self.checkpoint_interval = checkpoint_interval
+
+    async def record(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Store deltas for ``rows`` and drop checkpoints they make stale.
+
+        ``rows`` carry ``entity_id``, ``predicate``, ``current``, ``chapter``,
+        ``draft_stage`` and ``chunk_id``.
+        """
+        if not rows:
+            return
+        await self.graph_proxy.run_unwind(_DELTA_CYPHER, rows)
+        await self.graph_proxy.run_query(
+            _INVALIDATE_CYPHER, {"chapter": min(r["chapter"] for r in rows)}
+        )
+
+    async def snapshot(self, chapter: int) -> Dict[str, Any]:
+        """Return the state of every (entity, predicate) pair at ``chapter``."""
+        result = await self.graph_proxy.run_query(
+            _SNAPSHOT_CYPHER, {"chapter": chapter}, write=False
+        )
+        head = result[0] if result else {}
+        base = head.get("base") or 0
+        state = _load_state(head.get("state"))
+        deltas = head.get("deltas") or []
+
+        checkpoints: List[Dict[str, Any]] = []
+        step = self.checkpoint_interval
+        pos = 0
+        for mark in range((base // step + 1) * step, chapter + 1, step):
+            end = pos
+            while end < len(deltas) and deltas[end]["chapter"] <= mark:
+                end += 1
+            replay(state, deltas[pos:end])
+            pos = end
+            checkpoints.append({"chapter": mark, "state": _dump_state(state)})
+        replay(state, deltas[pos:])
+
+        if checkpoints:
+            await self.graph_proxy.run_unwind(
+                _CHECKPOINT_CYPHER, checkpoints, {"read_at": head.get("read_at", 0)}
+            )
+            logger.debug(
+                "Stored %d chapter checkpoints up to %d",
+                len(checkpoints),
+                checkpoints[-1]["chapter"],
+            )
+
+        facts = [state[k] for k in sorted(state)]
+        await self._add_names(facts)
+        for fact in facts:
+            stage = fact.get("draft_stage")
+            if isinstance(stage, int):
+                fact["draft_stage"] = StageEnum(stage).name
+        return {
+            "chapter": chapter,
+            "checkpoint_chapter": base or None,
+            "replayed_deltas": len(deltas),
+            "facts": facts,
+        }
+
+    async def _add_names(self, facts: List[Dict[str, Any]]) -> None:
+        ids = {f["entity_id"] for f in facts}
+        ids.update(
+            f["value"] for f in facts if f.get("value") and _ID_RE.match(f["value"])
+        )
+        names: Dict[str, str] = {}
+        if self.identity_service is not None and ids:
+            names = await self.identity_service.get_alias_map(sorted(ids))
+        for fact in facts:
+            fact["entity"] = names.get(fact["entity_id"], fact["entity_id"])
+            fact["value"] = names.get(fact.get("value") or "", fact.get("value"))
+
+
+@lru_cache(maxsize=1)
+def get_chapter_snapshot_service() -> ChapterSnapshotService:
+    """Return a cached :class:`ChapterSnapshotService`."""  # pragma: no cover
+    from config import app_settings
+    from services.graph_proxy import get_graph_proxy
+    from services.identity_service import get_identity_service
+
+    return ChapterSnapshotService(
+        get_graph_proxy(),
+        get_identity_service(),
+        checkpoint_interval=app_settings.SNAPSHOT_CHECKPOINT_INTERVAL,
+    )
@@ -2,22 +2,49 @@ from __future__ import annotations
 
 """Asynchronous helper around the Neo4j driver.
 
-`GraphProxy` exposes only two high level methods: :meth:`run_query` for
-executing a single Cypher statement and :meth:`run_queries` for batching
-multiple statements in one transaction. Queries are routed to the appropriate
+`GraphProxy` exposes four high level methods: :meth:`run_query` for
+executing a single Cypher statement, :meth:`run_queries` for batching
+multiple statements in one transaction, :meth:`run_query_groups` for running
+independent queries in one transaction with their results kept apart and
+:meth:`run_unwind` for writing many rows with one parameterised statement. Queries are routed to the appropriate
 read/write endpoint and retried by the driver if a transient failure occurs.
 Debug output is printed when :data:`app_settings.DEBUG` is enabled.
 """
 
 from contextlib import AbstractAsyncContextManager
 from functools import lru_cache
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncManagedTransaction
 
 from config import app_settings
 
-__all__ = ["GraphProxy"]
+__all__ = ["GraphProxy", "unwind_statements"]
+
+
+def unwind_statements(
+    cypher: str,
+    rows: Sequence[Dict[str, Any]],
+    batch_size: int,
+    params: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Split ``rows`` into ``UNWIND $rows AS row`` statements.
+
+    ``cypher`` is the statement body that refers to the current item as
+    ``row``; ``params`` are shared by every chunk. The result plugs straight
+    into :meth:`GraphProxy.run_queries`, so bulk writes can share a
+    transaction with other statements.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    statement = f"UNWIND $rows AS row\n{cypher}"
+    cyphers: List[str] = []
+    params_list: List[Dict[str, Any]] = []
+    for start in range(0, len(rows), batch_size):
+        end = start + batch_size
+        cyphers.append(statement)
+        params_list.append({**(params or {}), "rows": list(rows[start:end])})
+    return cyphers, params_list
 
 
 class GraphProxy(AbstractAsyncContextManager):
@@ -35,11 +62,13 @@ class GraphProxy(AbstractAsyncContextManager):
         user: str,
         password: str,
         database: str | None = None,
+        unwind_batch_size: int = 500,
     ) -> None:
         self._driver: AsyncDriver = AsyncGraphDatabase.driver(
             uri, auth=(user, password)
         )
         self._database = database
+        self.unwind_batch_size = unwind_batch_size
 
     # ------------------------------------------------------------------ utils
     @staticmethod
@@ -107,6 +136,72 @@ class GraphProxy(AbstractAsyncContextManager):
             fn = session.execute_write if write else session.execute_read
             return await fn(batch_tx)
 
+    async def run_query_groups(
+        self,
+        groups: Iterable[Sequence[str]],
+        *,
+        write: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """Execute groups of statements in a single transaction.
+
+        Each group is a query split into sequential statements (see
+        :meth:`run_queries`). All groups share one session and one
+        transaction (each statement is still its own request inside it), and
+        the rows of every group are returned separately, in the order of
+        ``groups``.
+        """
+        group_list = [list(group) for group in groups]
+        if not group_list:
+            return []
+
+        async def groups_tx(
+            tx: AsyncManagedTransaction,
+        ) -> List[List[Dict[str, Any]]]:
+            results: List[List[Dict[str, Any]]] = []
+            for group in group_list:
+                rows: List[Dict[str, Any]] = []
+                for c in group:
+                    self._log(c, None)
+                    rows.extend(await self._run(tx, c, None))
+                results.append(rows)
+            return results
+
+        async with self._driver.session(database=self._database) as session:
+            fn = session.execute_write if write else session.execute_read
+            return await fn(groups_tx)
+
+    async def run_unwind(
+        self,
+        cypher: str,
+        rows: Sequence[Dict[str, Any]],
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        write: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run ``cypher`` once per chunk of ``rows`` via ``UNWIND``.
+
+        Instead of one ``tx.run`` per item the rows are sent as a list
+        parameter and the statement is prefixed with ``UNWIND $rows AS row``.
+        Chunks of ``batch_size`` rows (default :attr:`unwind_batch_size`) run
+        sequentially in a single transaction.
+
+        Parameters
+        ----------
+        cypher : str
+            Statement body referring to the current item as ``row``.
+        rows : Sequence[dict]
+            Row parameters; nothing is executed when empty.
+        params : dict | None, optional
+            Extra parameters shared by every chunk.
+        """
+        if not rows:
+            return []
+        cyphers, params_list = unwind_statements(
+            cypher, rows, batch_size or self.unwind_batch_size, params
+        )
+        return await self.run_queries(cyphers, params_list, write=write)
+
     # -------------------------------------------------------------- cleanup --
     async def close(self) -> None:  # noqa: D401
         """Close underlying driver (call at application shutdown)."""
@@ -128,4 +223,5 @@ def get_graph_proxy() -> GraphProxy:
         user=app_settings.NEO4J_USER,
         password=app_settings.NEO4J_PASSWORD,
         database=app_settings.NEO4J_DB,
+        unwind_batch_size=app_settings.NEO4J_UNWIND_BATCH_SIZE,
     )
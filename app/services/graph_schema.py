@@ -0,0 +1,195 @@
+"""Neo4j indexes and constraints derived from the template catalogue.
+
+Every extract template ``MERGE``s its nodes by ``id`` and augment queries
+filter relationships by ``chunk_id`` / ``chapter`` (see
+``_augment_filters.j2``). Without schema these lookups are label or full
+scans. :class:`GraphSchemaManager` collects node labels from each template's
+``return_map`` plus :data:`KNOWN_LABELS`, and the relationship types the
+extract templates write (read from their Jinja source), then idempotently
+creates:
+
+* a uniqueness constraint on ``id`` for every label;
+* a relationship property index on ``chunk_id`` and ``chapter`` for every
+  relationship type;
+* the node property indexes in :data:`NODE_INDEXES` (draft supersession
+  looks up older drafts by ``lineage_id``, augment reads profiles by entity and
+  episodes by Raptor cluster, chapter snapshots read deltas and checkpoints
+  by chapter).
+
+Relationship types rendered from slot values (``'{{ relation_type|upper }}_OF'``
+in ``apoc.merge.relationship``) are not known upfront: they become patterns,
+and the types already stored in the graph that match them are indexed when
+the schema is ensured (at startup), so a new type gets its index on the next
+start.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, Tuple
+
+from jinja2 import Environment, TemplateNotFound
+
+from schemas.cypher import CypherTemplateBase
+from services.graph_proxy import GraphProxy
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Labels written outside templates (pipeline chunk/profile writes, snapshots).
+KNOWN_LABELS = ("Chunk", "EntityProfile", "ChapterDelta", "ChapterCheckpoint")
+INDEXED_REL_PROPS = ("chunk_id", "chapter")
+NODE_INDEXES = (
+    ("Chunk", "chapter"),
+    ("Chunk", "raptor_node_id"),
+    ("Chunk", "lineage_id"),
+    ("EntityProfile", "entity_id"),
+    ("ChapterDelta", "chapter"),
+    ("ChapterDelta", "updated_at"),
+    ("ChapterCheckpoint", "chapter"),
+)
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# ``MERGE (a)-[r:TYPE]->(b)`` in an extract template
+_STATIC_REL_RE = re.compile(r"\[\s*\w*\s*:\s*`?([A-Za-z_][A-Za-z0-9_]*)`?\s*[\]{]")
+# ``apoc.merge.relationship(a, '<type>', ...)``; the type may contain Jinja
+_APOC_REL_RE = re.compile(r"apoc\.merge\.relationship\(\s*\w+\s*,\s*'([^']*)'")
+_JINJA_EXPR_RE = re.compile(r"\{\{.*?\}\}")
+
+_REL_TYPES_CYPHER = (
+    "CALL db.relationshipTypes() YIELD relationshipType "
+    "RETURN relationshipType AS type"
+)
+
+
+def template_labels(templates: Iterable[CypherTemplateBase]) -> List[str]:
+    """Node labels of the templates' ``return_map`` plus :data:`KNOWN_LABELS`."""
+    labels: Set[str] = set(KNOWN_LABELS)
+    for tpl in templates:
+        labels.update(tpl.return_map.values())
+    return sorted(label for label in labels if _NAME_RE.match(label))
+
+
+def _extract_source(env: Environment, name: str) -> Optional[str]:
+    try:
+        source, _, _ = env.loader.get_source(env, name)  # type: ignore[union-attr]
+    except TemplateNotFound:
+        logger.warning(
+            "Extract template %s not found; its relations are not indexed", name
+        )
+        return None
+    return source
+
+
+def template_rel_types(
+    templates: Iterable[CypherTemplateBase], env: Optional[Environment] = None
+) -> Tuple[List[str], List[re.Pattern[str]]]:
+    """Relationship types written by the templates' ``extract_cypher``.
+
+    Returns the literal types and one pattern per type rendered from slot
+    values (the Jinja expressions match any type-name fragment).
+    """
+    if env is None:
+        from templates import env as default_env
+
+        env = default_env
+    static: Set[str] = set()
+    patterns: dict[str, re.Pattern[str]] = {}
+    for tpl in templates:
+        source = tpl.extract_cypher and _extract_source(env, tpl.extract_cypher)
+        if not source:
+            continue
+        static.update(_STATIC_REL_RE.findall(source))
+        for rel_type in _APOC_REL_RE.findall(source):
+            parts = _JINJA_EXPR_RE.split(rel_type)
+            if len(parts) == 1:
+                static.add(rel_type)
+            else:
+                regex = "[A-Za-z0-9_]+".join(re.escape(p) for p in parts)
+                patterns.setdefault(regex, re.compile(regex))
+    types = sorted(t for t in static if _NAME_RE.match(t))
+    return types, list(patterns.values())
+
+
+def schema_statements(
+    templates: Iterable[CypherTemplateBase],
+    stored_rel_types: Iterable[str] = (),
+    env: Optional[Environment] = None,
+) -> List[str]:
+    """Idempotent ``CREATE CONSTRAINT`` / ``CREATE INDEX`` statements.
+
+    ``stored_rel_types`` are the relationship types present in the graph;
+    those matching a dynamic template type are indexed as well.
+    """
+    tpls = list(templates)
+    static, patterns = template_rel_types(tpls, env)
+    dynamic = {
+        t
+        for t in stored_rel_types
+        if _NAME_RE.match(t) and any(p.fullmatch(t) for p in patterns)
+    }
+    rel_types = sorted(set(static) | dynamic)
+    statements = [
+        f"CREATE CONSTRAINT uniq_{label}_id IF NOT EXISTS "
+        f"FOR (n:`{label}`) REQUIRE n.id IS UNIQUE"
+        for label in template_labels(tpls)
+    ]
+    for label, prop in NODE_INDEXES:
+        statements.append(
+            f"CREATE INDEX node_{label}_{prop} IF NOT EXISTS "
+            f"FOR (n:`{label}`) ON (n.{prop})"
+        )
+    for rel_type in rel_types:
+        for prop in INDEXED_REL_PROPS:
+            statements.append(
+                f"CREATE INDEX rel_{rel_type}_{prop} IF NOT EXISTS "
+                f"FOR ()-[r:`{rel_type}`]-() ON (r.{prop})"
+            )
+    return statements
+
+
+class GraphSchemaManager:
+    """Create Neo4j constraints and indexes required by the templates."""
+
+    def __init__(
+        self, graph_proxy: GraphProxy, env: Optional[Environment] = None
+    ) -> None:
+        self.graph_proxy = graph_proxy
+        self.env = env
+
+    async def ensure(self, templates: Iterable[CypherTemplateBase]) -> List[str]:
+        """Apply :func:`schema_statements` and return the ones that succeeded.
+
+        Statements run one by one: schema changes cannot share a transaction
+        with each other reliably, and a failing constraint (e.g. duplicate
+        ids already stored under a label) must not block the rest.
+        """
+        rows = await self.graph_proxy.run_query(_REL_TYPES_CYPHER, write=False)
+        stored = [row["type"] for row in rows]
+        applied: List[str] = []
+        for stmt in schema_statements(templates, stored, self.env):
+            try:
+                await self.graph_proxy.run_query(stmt)
+            except Exception as exc:  # pragma: no cover - depends on stored data
+                logger.warning("Schema statement failed: %s (%s)", stmt, exc)
+                continue
+            applied.append(stmt)
+        logger.info("Graph schema ensured: %d statements", len(applied))
+        return applied
+
+
+@lru_cache(maxsize=1)
+def get_graph_schema_manager() -> GraphSchemaManager:
+    """Return a cached :class:`GraphSchemaManager`."""  # pragma: no cover
+    from services.graph_proxy import get_graph_proxy
+
+    return GraphSchemaManager(get_graph_proxy())
+
+
+async def ensure_graph_schema() -> List[str]:  # pragma: no cover - startup hook
+    """Bootstrap the schema from all templates stored in Weaviate."""
+    from services.templates.service import get_template_service
+
+    templates = await get_template_service().list_all_async()
+    return await get_graph_schema_manager().ensure(templates)
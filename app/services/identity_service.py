@@ -5,13 +5,19 @@ import uuid
 
 from typing import dataclass_transform
 from dataclasses import dataclass as std_dataclass, Field as DCField
-from typing import Any, Dict, List, Literal, Optional, cast, Callable
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, cast, Callable
 
-from weaviate import WeaviateClient, connect_to_weaviate_cloud
+from weaviate import (
+    WeaviateAsyncClient,
+    WeaviateClient,
+    connect_to_weaviate_cloud,
+    use_async_with_weaviate_cloud,
+)
 from weaviate.classes.init import Auth
 from weaviate.exceptions import WeaviateQueryError, WeaviateBaseError
 from weaviate.classes.query import Filter, MetadataQuery
 from weaviate.classes.config import Configure, Property, DataType
+from weaviate.util import generate_uuid5
 
 from pydantic import BaseModel, Field
 from schemas.cypher import SlotDefinition
@@ -21,16 +27,30 @@ from langchain.output_parsers import PydanticOutputParser
 from utils.helpers.llm import call_llm_with_model, call_llm_with_model_sync
 from langchain_openai import ChatOpenAI
 
-from config.embeddings import openai_embedder, EmbedderFn  # type: ignore
+from config.embeddings import (  # type: ignore
+    async_embedder_for,
+    embedder_for,
+    AsyncEmbedderFn,
+    EmbedderFn,
+)
 from config.langfuse import provide_callback_handler_with_tags  # type: ignore
+from config.weaviate import reload_collection, vector_index_config
 from config import app_settings  # type: ignore
 from core.identity.prompts import PROMPTS_ENV
+from utils.helpers.lru import LRUCache
+from services.mention_scanner import Mention, MentionScanner
 
 _logger = logging.getLogger("identity_sync_wrapper")
 
 HI_SIM = 0.92
 LO_SIM = 0.40
 ALIAS_CLASS = "Alias"
+# Alias objects keep only ``chunk_id``; the passage text lives on ``:Chunk``.
+CANDIDATE_PROPS = ["alias_text", "entity_id", "entity_type", "canonical"]
+NAME_PROPS = ["entity_id", "alias_text", "canonical", "chapter"]
+# An entity has one object per alias, so name lookups page through results.
+NAME_PAGE_SIZE = 500
+SCANNER_PROPS = ["alias_text", "entity_id", "entity_type"]
 
 
 @dataclass_transform(field_specifiers=(DCField,))
@@ -55,6 +75,8 @@ class BulkResolveResult(BaseModel):
     mapped_slots: Dict[str, Any]
     alias_tasks: List[AliasTask]
     alias_map: Dict[str, str] = Field(default_factory=dict)
+    # slot names whose value is not a known entity (lookup-only mode)
+    unresolved: List[str] = Field(default_factory=list)
 
 
 class LLMDecision(BaseModel):
@@ -65,6 +87,19 @@ class LLMDecision(BaseModel):
     details: Optional[str] = None
 
 
+class LLMBatchItem(LLMDecision):
+    raw_name: str
+    entity_type: Optional[str] = None
+
+
+class LLMBatchDecision(BaseModel):
+    decisions: List[LLMBatchItem] = Field(default_factory=list)
+
+
+# (raw_name, entity_type) -> candidates of a mid-similarity name
+AmbiguousNames = Dict[Tuple[str, str], List[Dict[str, Any]]]
+
+
 class IdentityService:
     def __init__(
         self,
@@ -73,14 +108,37 @@ class IdentityService:
         *,
         llm: Any,
         callback_handler=None,
+        weaviate_async_client: Optional[WeaviateAsyncClient] = None,
+        async_embedder: Optional[AsyncEmbedderFn] = None,
+        alias_cache_size: int = 4096,
+        vector_index: Optional[str] = None,
     ) -> None:
         self._w = weaviate_sync_client
+        # index spec for a newly created ``Alias`` collection
+        self._vector_index = vector_index
+        self._aw = weaviate_async_client
         self._embedder = embedder
+        self._async_embedder = async_embedder
         self._llm = llm
         self._callback_handler = callback_handler
+        # entity_id -> display name; entity names rarely change
+        self._name_cache: LRUCache[str, str] = LRUCache(alias_cache_size)
+        # built from the Alias collection on first scan, then kept in sync
+        self._scanner: Optional[MentionScanner] = None
+        self._scanner_lock = asyncio.Lock()
+        # concurrent first calls must not each open an async connection
+        self._connect_lock = asyncio.Lock()
 
     async def startup(self) -> None:
+        """Create the ``Alias`` collection and connect the async client."""
         await self._run_sync(self._startup_sync)
+        if self._aw is not None:
+            await self._connect_async()
+
+    async def shutdown(self) -> None:
+        """Close the async Weaviate client (the sync one belongs to the caller)."""
+        if self._aw is not None and self._aw.is_connected():
+            await self._aw.close()
 
     async def resolve_bulk(
         self,
@@ -90,7 +148,23 @@ class IdentityService:
         chapter: int,
         chunk_id: str,
         snippet: str,
+        lookup_only: bool = False,
     ) -> BulkResolveResult:
+        """Resolve entity-ref slots to entity IDs.
+
+        With an async Weaviate client configured the resolution runs natively
+        on the event loop; otherwise it falls back to the thread-based
+        synchronous implementation.
+
+        ``lookup_only`` is meant for read paths such as augment: only exact
+        or high-similarity matches are accepted, the LLM is never called, no
+        entity IDs are generated and unknown names are listed in
+        :attr:`BulkResolveResult.unresolved`.
+        """
+        if self._aw is not None:
+            return await self._resolve_bulk_async(
+                slots, slot_defs, chapter, chunk_id, snippet, lookup_only
+            )
         return await self._run_sync(
             self._resolve_bulk_sync,
             slots,
@@ -98,46 +172,150 @@ class IdentityService:
             chapter,
             chunk_id,
             snippet,
+            lookup_only,
         )
 
     async def commit_aliases(self, alias_tasks: List[AliasTask]) -> List[str]:
         # call async or sync upsert_alias and collect cypher snippets
-        cyphers: List[str] = []
+        committed = await self._store_aliases(alias_tasks)
+        return [c for c in map(_render_alias_cypher, committed) if c]
+
+    async def commit_aliases_unwind(
+        self, alias_tasks: List[AliasTask]
+    ) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """Store aliases and return entity writes for ``GraphProxy.run_unwind``.
+
+        Same as :meth:`commit_aliases`, but new entities are returned as one
+        ``(cypher, rows)`` pair per label instead of one statement each.
+        """
+        committed = await self._store_aliases(alias_tasks)
+        return entity_unwind_statements(committed)
+
+    async def _store_aliases(self, alias_tasks: List[AliasTask]) -> List[AliasTask]:
+        committed: List[AliasTask] = []
         for task in alias_tasks:
             if not self._is_valid_alias(task.alias_text, task.snippet):
                 _logger.info("[Identity] skipping invalid alias '%s'", task.alias_text)
                 continue
-            upsert = getattr(self, "_upsert_alias", None)
-            if callable(upsert) and asyncio.iscoroutinefunction(upsert):
-                await upsert(task)
-            else:
-                self._upsert_alias_sync(task)
-            snippet = _render_alias_cypher(task)
-            if snippet:
-                cyphers.append(snippet)
-        return cyphers
+            await self._upsert_alias(task)
+            if self._scanner is not None:
+                self._scanner.add(task.alias_text, task.entity_id, task.entity_type)
+            committed.append(task)
+        # A new canonical alias (new entity or rename) changes the display
+        # name; the next lookup fetches it and picks the latest one.
+        self.invalidate_aliases(
+            [t.entity_id for t in committed if t.render_slots.get("canonical")]
+        )
+        return committed
+
+    async def scan_mentions(
+        self, text: str, entity_types: Optional[List[str]] = None
+    ) -> List[Mention]:
+        """Return known aliases mentioned in ``text`` with their entity IDs.
+
+        The scanner is loaded from the ``Alias`` collection on first use and
+        afterwards extended by :meth:`commit_aliases`; no vector search or LLM
+        call is involved.
+        """
+        if self._scanner is None:
+            async with self._scanner_lock:
+                if self._scanner is None:
+                    if self._aw is not None:
+                        self._scanner = await self._load_scanner_async()
+                    else:
+                        self._scanner = await self._run_sync(self._load_scanner_sync)
+        return self._scanner.scan(text, entity_types)
+
+    async def _load_scanner_async(self) -> MentionScanner:
+        scanner = MentionScanner()
+        col = await self._async_collection()
+        async for obj in col.iterator(return_properties=SCANNER_PROPS):
+            _add_to_scanner(scanner, obj.properties)
+        _logger.info("[Identity] mention scanner loaded %d aliases", len(scanner))
+        return scanner
+
+    def _load_scanner_sync(self) -> MentionScanner:
+        scanner = MentionScanner()
+        col = self._w.collections.get(ALIAS_CLASS)
+        for obj in col.iterator(return_properties=SCANNER_PROPS):
+            _add_to_scanner(scanner, obj.properties)
+        _logger.info("[Identity] mention scanner loaded %d aliases", len(scanner))
+        return scanner
 
     async def get_alias_map(self, entity_ids: List[str]) -> Dict[str, str]:
-        """Return aliases for given IDs."""
-        return await self._run_sync(self._get_alias_map_sync, entity_ids)
+        """Return aliases for given IDs.
 
-    def _get_alias_map_sync(self, entity_ids: List[str]) -> Dict[str, str]:
-        if not entity_ids:
+        Names are served from an in-process LRU cache; only IDs missing from
+        the cache are fetched from Weaviate.
+        """
+        found = self._name_cache.get_many(entity_ids)
+        missing = [eid for eid in dict.fromkeys(entity_ids) if eid not in found]
+        if not missing:
+            return found
+        if self._aw is not None:
+            fetched = await self._get_alias_map_async(missing)
+        else:
+            fetched = await self._run_sync(self._get_alias_map_sync, missing)
+        for eid, name in fetched.items():
+            self._name_cache.set(eid, name)
+        return {**found, **fetched}
+
+    def invalidate_aliases(self, entity_ids: List[str]) -> None:
+        """Drop cached display names, e.g. after an entity was renamed.
+
+        Called for every committed canonical alias and after compaction.
+        """
+        for eid in entity_ids:
+            self._name_cache.pop(eid)
+
+    async def _get_alias_map_async(self, entity_ids: List[str]) -> Dict[str, str]:
+        # Canonical aliases first; entities without one fall back to any alias.
+        names: Dict[str, str] = {}
+        try:
+            collection = await self._async_collection()
+            for canonical_only in (True, False):
+                wanted = [eid for eid in dict.fromkeys(entity_ids) if eid not in names]
+                objects: List[Any] = []
+                while wanted:
+                    res = await collection.query.fetch_objects(
+                        filters=_name_filter(wanted, canonical_only),
+                        limit=NAME_PAGE_SIZE,
+                        offset=len(objects),
+                        return_properties=NAME_PROPS,
+                    )
+                    objects.extend(res.objects)
+                    if _last_name_page(res.objects, objects, wanted, canonical_only):
+                        break
+                names.update(_names_from_objects(objects))
+        except WeaviateQueryError as exc:
+            _logger.error("Weaviate fetch aliases failed: %s", exc)
             return {}
+
+        return names
+
+    def _get_alias_map_sync(self, entity_ids: List[str]) -> Dict[str, str]:
+        names: Dict[str, str] = {}
         try:
             collection = self._w.collections.get(ALIAS_CLASS)
-            res = collection.query.fetch_objects(
-                filters=Filter.by_property("entity_id").contains_any(entity_ids),
-                limit=len(entity_ids),
-            )
+            for canonical_only in (True, False):
+                wanted = [eid for eid in dict.fromkeys(entity_ids) if eid not in names]
+                objects: List[Any] = []
+                while wanted:
+                    res = collection.query.fetch_objects(
+                        filters=_name_filter(wanted, canonical_only),
+                        limit=NAME_PAGE_SIZE,
+                        offset=len(objects),
+                        return_properties=NAME_PROPS,
+                    )
+                    objects.extend(res.objects)
+                    if _last_name_page(res.objects, objects, wanted, canonical_only):
+                        break
+                names.update(_names_from_objects(objects))
         except WeaviateQueryError as exc:
             _logger.error("Weaviate fetch aliases failed: %s", exc)
             return {}
 
-        return {
-            obj.properties["entity_id"]: obj.properties.get("alias_text", "")
-            for obj in res.objects
-        }
+        return names
 
     @staticmethod
     def alias_map_from_tasks(alias_tasks: List[AliasTask]) -> Dict[str, str]:
@@ -155,6 +333,7 @@ class IdentityService:
             name=ALIAS_CLASS,
             description="Stores all known aliases for story entities",
             vectorizer_config=Configure.Vectorizer.none(),
+            vector_index_config=vector_index_config(self._vector_index),
             inverted_index_config=Configure.inverted_index(index_property_length=True),
             properties=[
                 Property(name="alias_text", data_type=DataType.TEXT),
@@ -163,7 +342,6 @@ class IdentityService:
                 Property(name="canonical", data_type=DataType.BOOL),
                 Property(name="chapter", data_type=DataType.INT),
                 Property(name="chunk_id", data_type=DataType.TEXT),
-                Property(name="snippet", data_type=DataType.TEXT),
                 Property(name="details", data_type=DataType.TEXT),
             ],
         )
@@ -182,131 +360,109 @@ class IdentityService:
         chapter: int,
         chunk_id: str,
         snippet: str,
+        lookup_only: bool = False,
     ) -> BulkResolveResult:
-        mapped_slots: Dict[str, Any] = dict(slots)
-        alias_tasks: List[AliasTask] = []
-        alias_map: Dict[str, str] = {}
-
-        for field, raw_val in slots.items():
-            etype = None
-            if slot_defs is not None:
-                slot_def = slot_defs.get(field)
-                if not slot_def or not slot_def.is_entity_ref:
-                    continue
-                etype = slot_def.entity_type or _FIELD_TO_ENTITY.get(field)
-            else:
-                etype = _FIELD_TO_ENTITY.get(field)
-            if not etype:
-                continue
-
-            decision = self._resolve_single_sync(
-                raw_name=str(raw_val),
-                entity_type=etype,
-                chapter=chapter,
-                chunk_id=chunk_id,
-                snippet=snippet,
-            )
-
-            mapped_slots[field] = decision["entity_id"]
-            alias_map[decision["entity_id"]] = decision["alias_text"]
-
-            if decision["need_task"]:
-                alias_tasks.append(
-                    AliasTask(
-                        cypher_template_id=decision["template_id"],
-                        render_slots=decision["render_slots"],
-                        entity_id=decision["entity_id"],
-                        alias_text=decision["alias_text"],
-                        entity_type=etype,
-                        chapter=chapter,
-                        chunk_id=chunk_id,
-                        snippet=snippet,
-                        details=decision.get("details"),
-                    )
-                )
-        return BulkResolveResult(
-            mapped_slots=mapped_slots,
-            alias_tasks=alias_tasks,
-            alias_map=alias_map,
-        )
+        result = BulkResolveResult(mapped_slots=dict(slots), alias_tasks=[])
+        entries = list(_entity_slots(slots, slot_defs))
+        if lookup_only:
+            for field, raw_val, etype in entries:
+                found = self._lookup_single_sync(str(raw_val), etype)
+                _apply_lookup(result, field, str(raw_val), found)
+            return result
 
-    def _commit_aliases_sync(self, alias_tasks: List[AliasTask]) -> List[str]:
-        cypher_snippets: List[str] = []
-        for task in alias_tasks:
-            self._upsert_alias_sync(task)
-            snippet = _render_alias_cypher(task)
-            if snippet:
-                cypher_snippets.append(snippet)
-        return cypher_snippets
+        cands = [
+            self._nearest_alias_sync(str(raw_val), etype, limit=3)
+            for _, raw_val, etype in entries
+        ]
+        ambiguous = _ambiguous_names(entries, cands)
+        verdicts = self._disambiguate_many_sync(ambiguous, chapter, snippet)
+        _apply_decisions(result, entries, cands, verdicts, chapter, chunk_id, snippet)
+        return result
 
-    def _resolve_single_sync(
+    async def _resolve_bulk_async(
         self,
-        raw_name: str,
-        entity_type: str,
-        *,
+        slots: Dict[str, Any],
+        slot_defs: Optional[Dict[str, SlotDefinition]],
         chapter: int,
         chunk_id: str,
         snippet: str,
-    ) -> Dict[str, Any]:
-        cand = self._nearest_alias_sync(raw_name, entity_type, limit=3)
-        best = cand[0] if cand else None
+        lookup_only: bool = False,
+    ) -> BulkResolveResult:
+        result = BulkResolveResult(mapped_slots=dict(slots), alias_tasks=[])
+        entries = list(_entity_slots(slots, slot_defs))
+        if lookup_only:
+            found_ids = await asyncio.gather(
+                *(
+                    self._lookup_single_async(str(raw_val), etype)
+                    for _, raw_val, etype in entries
+                )
+            )
+            for (field, raw_val, _), found in zip(entries, found_ids):
+                _apply_lookup(result, field, str(raw_val), found)
+            return result
 
-        if best and best["score"] >= HI_SIM:
-            need_task = best["alias_text"] != raw_name
-            return {
-                "entity_id": best["entity_id"],
-                "alias_text": raw_name,
-                "need_task": need_task,
-                "template_id": "add_alias" if need_task else None,
-                "render_slots": {
-                    "alias_text": raw_name,
-                    "entity_id": best["entity_id"],
-                    "entity_type": entity_type,
-                    "canonical": False,
-                },
-                "details": None,
-            }
-
-        if best and best["score"] >= LO_SIM:
-            decision = self._llm_disambiguate_sync(raw_name, cand, chapter, snippet)
-            if decision.action == "use":
-                return {
-                    "entity_id": decision.entity_id,
-                    "alias_text": decision.alias_text or raw_name,
-                    "need_task": True,
-                    "template_id": "add_alias",
-                    "render_slots": {
-                        "alias_text": decision.alias_text or raw_name,
-                        "entity_id": decision.entity_id,
-                        "entity_type": entity_type,
-                        "canonical": False,
-                    },
-                    "details": decision.details,
-                }
-            if decision.action == "skip":
-                return {
-                    "entity_id": raw_name,
-                    "alias_text": raw_name,
-                    "need_task": False,
-                    "template_id": None,
-                    "render_slots": {},
-                    "details": decision.details,
-                }
+        cands = await asyncio.gather(
+            *(
+                self._nearest_alias_async(str(raw_val), etype, limit=3)
+                for _, raw_val, etype in entries
+            )
+        )
+        ambiguous = _ambiguous_names(entries, list(cands))
+        verdicts = await self._disambiguate_many(ambiguous, chapter, snippet)
+        _apply_decisions(
+            result, entries, list(cands), verdicts, chapter, chunk_id, snippet
+        )
+        return result
 
-        entity_id = f"{entity_type.lower()}-{uuid.uuid4().hex[:8]}"
-        return {
-            "entity_id": entity_id,
-            "alias_text": raw_name,
-            "need_task": True,
-            "template_id": "create_entity_with_alias",
-            "render_slots": {
-                "alias_text": raw_name,
-                "entity_id": entity_id,
-                "entity_type": entity_type,
-                "canonical": True,
-            },
-            "details": None,
-        }
+    def _disambiguate_many_sync(
+        self, ambiguous: AmbiguousNames, chapter: int, snippet: str
+    ) -> Dict[Tuple[str, str], LLMDecision]:
+        """Ask the LLM about all mid-similarity names of a chunk at once.
+
+        A single name uses the regular prompt; several names share one
+        batched completion. Names the batch answer omits are retried one by
+        one.
+        """
+        if not ambiguous:
+            return {}
+        if len(ambiguous) > 1:
+            batch = self._llm_disambiguate_batch_sync(ambiguous, chapter, snippet)
+            verdicts = _match_batch(batch, ambiguous)
+        else:
+            verdicts = {}
+        for key, cand in ambiguous.items():
+            if key not in verdicts:
+                verdicts[key] = self._llm_disambiguate_sync(
+                    key[0], cand, chapter, snippet
+                )
+        return verdicts
+
+    async def _disambiguate_many(
+        self, ambiguous: AmbiguousNames, chapter: int, snippet: str
+    ) -> Dict[Tuple[str, str], LLMDecision]:
+        if not ambiguous:
+            return {}
+        if len(ambiguous) > 1:
+            batch = await self._llm_disambiguate_batch(ambiguous, chapter, snippet)
+            verdicts = _match_batch(batch, ambiguous)
+        else:
+            verdicts = {}
+        for key, cand in ambiguous.items():
+            if key not in verdicts:
+                verdicts[key] = await self._llm_disambiguate(
+                    key[0], cand, chapter, snippet
+                )
+        return verdicts
+
+    def _lookup_single_sync(self, raw_name: str, entity_type: str) -> Optional[str]:
+        """Return the entity_id for an exact or near-exact known alias."""
+        return _lookup_match(self._nearest_alias_sync(raw_name, entity_type), raw_name)
+
+    async def _lookup_single_async(
+        self, raw_name: str, entity_type: str
+    ) -> Optional[str]:
+        cand = await self._nearest_alias_async(raw_name, entity_type)
+        return _lookup_match(cand, raw_name)
 
     def _nearest_alias_sync(
         self,
@@ -324,18 +480,58 @@ class IdentityService:
                 near_vector=vector,
                 limit=limit,
                 filters=Filter.by_property("entity_type").equal(entity_type),
+                return_properties=CANDIDATE_PROPS,
+                return_metadata=MetadataQuery(distance=True),
+            )
+        except WeaviateQueryError as exc:
+            _logger.error("Weaviate near-vector failed: %s", exc)
+            return []
+
+        return _hits_from_objects(res.objects)
+
+    async def _nearest_alias_async(
+        self,
+        query_text: str,
+        entity_type: str,
+        *,
+        limit: int = 3,
+    ) -> List[Dict[str, Any]]:
+        vector = await self._embed_async(query_text)
+        if vector is None:
+            return []
+        try:
+            collection = await self._async_collection()
+            res = await collection.query.near_vector(
+                near_vector=vector,
+                limit=limit,
+                filters=Filter.by_property("entity_type").equal(entity_type),
+                return_properties=CANDIDATE_PROPS,
                 return_metadata=MetadataQuery(distance=True),
             )
         except WeaviateQueryError as exc:
             _logger.error("Weaviate near-vector failed: %s", exc)
             return []
+        return _hits_from_objects(res.objects)
+
+    async def _embed_async(self, text: str) -> Optional[List[float]]:
+        if self._async_embedder:
+            return await self._async_embedder(text)
+        if self._embedder:
+            return await self._run_sync(self._embedder, text)
+        return None
 
-        hits: List[Dict[str, Any]] = []
-        for obj in res.objects:
-            dst = 1.0 - (obj.metadata.distance or 0.0)
-            hits.append({**obj.properties, "score": round(dst, 4)})
-        hits.sort(key=lambda x: -float(cast(float, x["score"])))
-        return hits
+    async def _connect_async(self) -> None:
+        assert self._aw is not None
+        async with self._connect_lock:
+            if not self._aw.is_connected():
+                await self._aw.connect()
+
+    async def _async_collection(self):
+        assert self._aw is not None
+        # connected by ``startup``; the lazy path serves scripts and tests
+        if not self._aw.is_connected():
+            await self._connect_async()
+        return self._aw.collections.get(ALIAS_CLASS)
 
     def _build_disambiguate_prompt(
         self,
@@ -351,15 +547,7 @@ class IdentityService:
             raw_name=raw_name,
             chapter=chapter,
             snippet=snippet,
-            candidates=[
-                {
-                    "alias_text": a["alias_text"],
-                    "canonical": a.get("canonical", False),
-                    "entity_id": a["entity_id"],
-                    "score": round(a["score"], 3),
-                }
-                for a in aliases
-            ],
+            candidates=_prompt_candidates(aliases),
         )
         return PromptTemplate(
             template=prompt_body + "\n\n{format_instructions}",
@@ -401,6 +589,65 @@ class IdentityService:
             tags=[self.__class__.__name__],
         )
 
+    def _build_batch_disambiguate_prompt(
+        self,
+        ambiguous: AmbiguousNames,
+        chapter: int,
+        snippet: str,
+    ) -> PromptTemplate:
+        parser = PydanticOutputParser(pydantic_object=LLMBatchDecision)
+        format_instructions = parser.get_format_instructions()
+        prompt_tmpl = PROMPTS_ENV.get_template("verify_aliases_batch_llm.j2")
+        prompt_body = prompt_tmpl.render(
+            chapter=chapter,
+            snippet=snippet,
+            names=[
+                {
+                    "raw_name": raw_name,
+                    "entity_type": entity_type,
+                    "candidates": _prompt_candidates(cand),
+                }
+                for (raw_name, entity_type), cand in ambiguous.items()
+            ],
+        )
+        return PromptTemplate(
+            template=prompt_body + "\n\n{format_instructions}",
+            input_variables=["format_instructions"],
+            partial_variables={"format_instructions": format_instructions},
+        )
+
+    async def _llm_disambiguate_batch(
+        self,
+        ambiguous: AmbiguousNames,
+        chapter: int,
+        snippet: str,
+    ) -> LLMBatchDecision:
+        prompt = self._build_batch_disambiguate_prompt(ambiguous, chapter, snippet)
+        return await call_llm_with_model(
+            LLMBatchDecision,
+            self._llm,
+            prompt,
+            callback_handler=self._callback_handler,
+            run_name=f"{self.__class__.__name__.lower()}.disambiguate_batch",
+            tags=[self.__class__.__name__],
+        )
+
+    def _llm_disambiguate_batch_sync(
+        self,
+        ambiguous: AmbiguousNames,
+        chapter: int,
+        snippet: str,
+    ) -> LLMBatchDecision:
+        prompt = self._build_batch_disambiguate_prompt(ambiguous, chapter, snippet)
+        return call_llm_with_model_sync(
+            LLMBatchDecision,
+            self._llm,
+            prompt,
+            callback_handler=self._callback_handler,
+            run_name=f"{self.__class__.__name__.lower()}.disambiguate_batch",
+            tags=[self.__class__.__name__],
+        )
+
     @staticmethod
     def _is_valid_alias(text: str, snippet: str) -> bool:
         if text is None:
@@ -428,23 +675,140 @@ class IdentityService:
             return False
         return True
 
+    async def _upsert_alias(self, task: AliasTask) -> None:
+        if self._aw is None:
+            await self._run_sync(self._upsert_alias_sync, task)
+            return
+        uid = alias_uuid(task.entity_id, task.alias_text)
+        props = _alias_props(task)
+        try:
+            col = await self._async_collection()
+            if await col.data.exists(uid):
+                await col.data.update(uuid=uid, properties=_refresh_props(props))
+                return
+            vec = await self._embed_async(task.alias_text)
+            await col.data.insert(uuid=uid, properties=props, vector=vec)
+        except WeaviateBaseError as exc:
+            _logger.error("Weaviate alias upsert failed: %s", exc)
+
     def _upsert_alias_sync(self, task: AliasTask) -> None:
+        """Insert or refresh the alias stored under its deterministic UUID.
+
+        Re-seeing a known alias only updates its metadata, so the collection
+        holds one object per ``(entity_id, alias)`` pair and the embedding is
+        computed once.
+        """
         col = self._w.collections.get(ALIAS_CLASS)
-        props = {
-            "alias_text": task.alias_text,
-            "entity_id": task.entity_id,
-            "entity_type": task.entity_type,
-            "canonical": task.render_slots.get("canonical", False),
-            "chapter": task.chapter,
-            "chunk_id": task.chunk_id,
-            "snippet": task.snippet,
-            "details": task.details,
-        }
-        vec = self._embedder(task.alias_text) if self._embedder else None
+        uid = alias_uuid(task.entity_id, task.alias_text)
+        props = _alias_props(task)
         try:
-            col.data.insert(properties=props, vector=vec)
-        except WeaviateBaseError:
-            pass
+            if col.data.exists(uid):
+                col.data.update(uuid=uid, properties=_refresh_props(props))
+                return
+            vec = self._embedder(task.alias_text) if self._embedder else None
+            col.data.insert(uuid=uid, properties=props, vector=vec)
+        except WeaviateBaseError as exc:
+            _logger.error("Weaviate alias upsert failed: %s", exc)
+
+    def strip_alias_snippets_sync(self) -> int:
+        """Remove legacy ``snippet`` text from stored ``Alias`` objects.
+
+        Older objects carried a full copy of the source passage. Each object is
+        replaced without the ``snippet`` property (keeping its vector); the
+        number of rewritten objects is returned.
+        """
+        col = self._w.collections.get(ALIAS_CLASS)
+        stripped = 0
+        for obj in col.iterator(include_vector=True):
+            # the schema property comes back as None once stripped
+            if obj.properties.get("snippet") is None:
+                continue
+            props = {k: v for k, v in obj.properties.items() if k != "snippet"}
+            col.data.replace(uuid=obj.uuid, properties=props, vector=_vector_of(obj))
+            stripped += 1
+        _logger.info("[Identity] stripped snippets from %s aliases", stripped)
+        return stripped
+
+    def reindex_aliases_sync(self) -> int:
+        """Re-embed every ``Alias`` object with the current embedder.
+
+        Run after changing ``EMBEDDING_DIMS_ALIAS``: all vectors are computed
+        first, then the collection is recreated with them. Returns the count.
+        """
+        if self._embedder is None:
+            raise RuntimeError("Alias re-indexing requires an embedder")
+        col = self._w.collections.get(ALIAS_CLASS)
+        rows = [
+            (
+                obj.uuid,
+                dict(obj.properties),
+                self._embedder(str(obj.properties.get("alias_text", ""))),
+            )
+            for obj in col.iterator()
+        ]
+        count = reload_collection(self._w, ALIAS_CLASS, self._startup_sync, rows)
+        _logger.info("[Identity] re-embedded %s aliases", count)
+        return count
+
+    def compact_aliases_sync(self) -> Dict[str, int]:
+        """Collapse duplicate ``Alias`` objects into deterministic ones.
+
+        One-off maintenance for collections written before aliases had stable
+        UUIDs. Objects are grouped by :func:`alias_uuid`; the canonical (or
+        earliest) object of each group is kept under the deterministic UUID
+        and the rest are deleted. Returns ``{"scanned", "kept", "deleted"}``.
+        """
+        col = self._w.collections.get(ALIAS_CLASS)
+        groups: Dict[str, List[Any]] = {}
+        for obj in col.iterator(include_vector=True):
+            props = obj.properties
+            uid = alias_uuid(
+                str(props.get("entity_id", "")), str(props.get("alias_text", ""))
+            )
+            groups.setdefault(uid, []).append(obj)
+
+        scanned = sum(len(g) for g in groups.values())
+        to_delete: List[str] = []
+        changed: List[Any] = []
+        for uid, objs in groups.items():
+            keep = min(
+                objs,
+                key=lambda o: (
+                    not o.properties.get("canonical"),
+                    o.properties.get("chapter") or 0,
+                ),
+            )
+            stale = [o for o in objs if str(o.uuid) != uid]
+            if not stale:
+                continue
+            changed.append(keep)
+            canonical = any(o.properties.get("canonical") for o in objs)
+            current = next((o for o in objs if str(o.uuid) == uid), None)
+            if current is None:
+                props = dict(keep.properties)
+                props["canonical"] = canonical
+                col.data.insert(uuid=uid, properties=props, vector=_vector_of(keep))
+            elif canonical and not current.properties.get("canonical"):
+                # a dropped duplicate carried the canonical flag
+                col.data.update(uuid=uid, properties={"canonical": True})
+            to_delete.extend(str(o.uuid) for o in stale)
+
+        for start in range(0, len(to_delete), 100):
+            end = start + 100
+            col.data.delete_many(
+                where=Filter.by_id().contains_any(to_delete[start:end])
+            )
+        # merged groups may change which alias is canonical for an entity
+        self.invalidate_aliases(
+            [str(o.properties.get("entity_id", "")) for o in changed]
+        )
+        _logger.info(
+            "[Identity] alias compaction: scanned=%s kept=%s deleted=%s",
+            scanned,
+            len(groups),
+            len(to_delete),
+        )
+        return {"scanned": scanned, "kept": len(groups), "deleted": len(to_delete)}
 
 
 _FIELD_TO_ENTITY = {
@@ -454,6 +818,315 @@ _FIELD_TO_ENTITY = {
 }
 
 
+def slot_entity_type(slot_def: SlotDefinition) -> Optional[str]:
+    """Entity type under which aliases of an entity-ref slot are stored."""
+    return slot_def.entity_type or _FIELD_TO_ENTITY.get(slot_def.name)
+
+
+def _entity_slots(
+    slots: Dict[str, Any], slot_defs: Optional[Dict[str, SlotDefinition]]
+) -> Iterator[Tuple[str, Any, str]]:
+    """Yield ``(field, raw_value, entity_type)`` for entity-ref slots."""
+    for field, raw_val in slots.items():
+        etype = None
+        if slot_defs is not None:
+            slot_def = slot_defs.get(field)
+            if not slot_def or not slot_def.is_entity_ref:
+                continue
+            etype = slot_entity_type(slot_def)
+        else:
+            etype = _FIELD_TO_ENTITY.get(field)
+        if etype:
+            yield field, raw_val, etype
+
+
+def _ambiguous_names(
+    entries: List[Tuple[str, Any, str]], cands: List[List[Dict[str, Any]]]
+) -> AmbiguousNames:
+    """Collect names whose best candidate falls between LO_SIM and HI_SIM."""
+    ambiguous: AmbiguousNames = {}
+    for (_, raw_val, etype), cand in zip(entries, cands):
+        best = cand[0] if cand else None
+        if best and LO_SIM <= best["score"] < HI_SIM:
+            ambiguous.setdefault((str(raw_val), etype), cand)
+    return ambiguous
+
+
+def _match_batch(
+    batch: LLMBatchDecision, ambiguous: AmbiguousNames
+) -> Dict[Tuple[str, str], LLMDecision]:
+    """Map batched answers back to ``(raw_name, entity_type)`` keys."""
+    verdicts: Dict[Tuple[str, str], LLMDecision] = {}
+    for item in batch.decisions:
+        for key in ambiguous:
+            raw_name, etype = key
+            if key in verdicts or item.raw_name.strip() != raw_name.strip():
+                continue
+            if item.entity_type and item.entity_type.upper() != etype.upper():
+                continue
+            verdicts[key] = LLMDecision(
+                **item.model_dump(exclude={"raw_name", "entity_type"})
+            )
+    return verdicts
+
+
+def _final_decision(
+    raw_name: str,
+    entity_type: str,
+    cand: List[Dict[str, Any]],
+    verdicts: Dict[Tuple[str, str], LLMDecision],
+) -> Dict[str, Any]:
+    best = cand[0] if cand else None
+    if best and best["score"] >= HI_SIM:
+        return _match_decision(best, raw_name, entity_type)
+    verdict = verdicts.get((raw_name, entity_type))
+    if verdict is not None:
+        resolved = _llm_decision(verdict, raw_name, entity_type)
+        if resolved is not None:
+            return resolved
+    return _new_entity_decision(raw_name, entity_type)
+
+
+def _apply_decisions(
+    result: BulkResolveResult,
+    entries: List[Tuple[str, Any, str]],
+    cands: List[List[Dict[str, Any]]],
+    verdicts: Dict[Tuple[str, str], LLMDecision],
+    chapter: int,
+    chunk_id: str,
+    snippet: str,
+) -> None:
+    # the same name in several slots of one chunk maps to one entity
+    decided: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for (field, raw_val, etype), cand in zip(entries, cands):
+        key = (str(raw_val), etype)
+        if key in decided:
+            result.mapped_slots[field] = decided[key]["entity_id"]
+            continue
+        decision = _final_decision(str(raw_val), etype, cand, verdicts)
+        decided[key] = decision
+        _apply_decision(result, field, etype, decision, chapter, chunk_id, snippet)
+
+
+def _prompt_candidates(aliases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "alias_text": a["alias_text"],
+            "canonical": a.get("canonical", False),
+            "entity_id": a["entity_id"],
+            "score": round(a["score"], 3),
+        }
+        for a in aliases
+    ]
+
+
+def _apply_decision(
+    result: BulkResolveResult,
+    field: str,
+    entity_type: str,
+    decision: Dict[str, Any],
+    chapter: int,
+    chunk_id: str,
+    snippet: str,
+) -> None:
+    """Record a single resolution decision in ``result``."""
+    result.mapped_slots[field] = decision["entity_id"]
+    result.alias_map[decision["entity_id"]] = decision["alias_text"]
+    if decision["need_task"]:
+        result.alias_tasks.append(
+            AliasTask(
+                cypher_template_id=decision["template_id"],
+                render_slots=decision["render_slots"],
+                entity_id=decision["entity_id"],
+                alias_text=decision["alias_text"],
+                entity_type=entity_type,
+                chapter=chapter,
+                chunk_id=chunk_id,
+                snippet=snippet,
+                details=decision.get("details"),
+            )
+        )
+
+
+def _apply_lookup(
+    result: BulkResolveResult, field: str, raw_name: str, entity_id: Optional[str]
+) -> None:
+    """Record a lookup-only result; unknown names keep their raw value."""
+    if entity_id is None:
+        result.unresolved.append(field)
+        return
+    result.mapped_slots[field] = entity_id
+    result.alias_map[entity_id] = raw_name
+
+
+def _lookup_match(cand: List[Dict[str, Any]], raw_name: str) -> Optional[str]:
+    """Pick an exact alias match or a high-similarity ANN hit."""
+    wanted = raw_name.strip().casefold()
+    for hit in cand:
+        if str(hit.get("alias_text", "")).strip().casefold() == wanted:
+            return hit["entity_id"]
+    if cand and cand[0]["score"] >= HI_SIM:
+        return cand[0]["entity_id"]
+    return None
+
+
+def _match_decision(
+    best: Dict[str, Any], raw_name: str, entity_type: str
+) -> Dict[str, Any]:
+    need_task = best["alias_text"] != raw_name
+    return {
+        "entity_id": best["entity_id"],
+        "alias_text": raw_name,
+        "need_task": need_task,
+        "template_id": "add_alias" if need_task else None,
+        "render_slots": {
+            "alias_text": raw_name,
+            "entity_id": best["entity_id"],
+            "entity_type": entity_type,
+            "canonical": False,
+        },
+        "details": None,
+    }
+
+
+def _llm_decision(
+    decision: LLMDecision, raw_name: str, entity_type: str
+) -> Optional[Dict[str, Any]]:
+    """Map an LLM verdict to a decision; ``None`` means "create new"."""
+    if decision.action == "use":
+        return {
+            "entity_id": decision.entity_id,
+            "alias_text": decision.alias_text or raw_name,
+            "need_task": True,
+            "template_id": "add_alias",
+            "render_slots": {
+                "alias_text": decision.alias_text or raw_name,
+                "entity_id": decision.entity_id,
+                "entity_type": entity_type,
+                "canonical": False,
+            },
+            "details": decision.details,
+        }
+    if decision.action == "skip":
+        return {
+            "entity_id": raw_name,
+            "alias_text": raw_name,
+            "need_task": False,
+            "template_id": None,
+            "render_slots": {},
+            "details": decision.details,
+        }
+    return None
+
+
+def _new_entity_decision(raw_name: str, entity_type: str) -> Dict[str, Any]:
+    entity_id = f"{entity_type.lower()}-{uuid.uuid4().hex[:8]}"
+    return {
+        "entity_id": entity_id,
+        "alias_text": raw_name,
+        "need_task": True,
+        "template_id": "create_entity_with_alias",
+        "render_slots": {
+            "alias_text": raw_name,
+            "entity_id": entity_id,
+            "entity_type": entity_type,
+            "canonical": True,
+        },
+        "details": None,
+    }
+
+
+def _hits_from_objects(objects: List[Any]) -> List[Dict[str, Any]]:
+    """Convert ``near_vector`` results to candidate dicts sorted by score."""
+    hits: List[Dict[str, Any]] = []
+    for obj in objects:
+        dst = 1.0 - (obj.metadata.distance or 0.0)
+        hits.append({**obj.properties, "score": round(dst, 4)})
+    hits.sort(key=lambda x: -float(cast(float, x["score"])))
+    return hits
+
+
+def _name_filter(entity_ids: List[str], canonical_only: bool) -> Any:
+    by_id = Filter.by_property("entity_id").contains_any(entity_ids)
+    if not canonical_only:
+        return by_id
+    return by_id & Filter.by_property("canonical").equal(True)
+
+
+def _last_name_page(
+    page: List[Any], seen: List[Any], wanted: List[str], exhaustive: bool
+) -> bool:
+    """Whether a name lookup can stop paging.
+
+    The canonical pass reads every page so the latest rename wins; the
+    fallback pass stops once each wanted ID has some alias.
+    """
+    if len(page) < NAME_PAGE_SIZE:
+        return True
+    if exhaustive:
+        return False
+    covered = {o.properties.get("entity_id") for o in seen}
+    return all(eid in covered for eid in wanted)
+
+
+def _names_from_objects(objects: List[Any]) -> Dict[str, str]:
+    """Map entity_id to alias text, preferring the latest canonical alias."""
+    names: Dict[str, str] = {}
+    for obj in sorted(
+        objects,
+        key=lambda o: (
+            bool(o.properties.get("canonical")),
+            o.properties.get("chapter") or 0,
+        ),
+    ):
+        names[obj.properties["entity_id"]] = obj.properties.get("alias_text", "")
+    return names
+
+
+def _add_to_scanner(scanner: MentionScanner, props: Dict[str, Any]) -> None:
+    scanner.add(
+        str(props.get("alias_text") or ""),
+        str(props.get("entity_id") or ""),
+        str(props.get("entity_type") or ""),
+    )
+
+
+def normalize_alias(text: str) -> str:
+    """Case- and whitespace-insensitive form of an alias."""
+    return " ".join(text.split()).casefold()
+
+
+def alias_uuid(entity_id: str, alias_text: str) -> str:
+    """Deterministic Weaviate UUID for an ``(entity_id, alias)`` pair."""
+    return generate_uuid5(f"{entity_id}:{normalize_alias(alias_text)}", ALIAS_CLASS)
+
+
+def _refresh_props(props: Dict[str, Any]) -> Dict[str, Any]:
+    # never downgrade an alias that was stored as canonical
+    if props.get("canonical"):
+        return props
+    return {k: v for k, v in props.items() if k != "canonical"}
+
+
+def _vector_of(obj: Any) -> Optional[List[float]]:
+    vec = getattr(obj, "vector", None)
+    if isinstance(vec, dict):
+        return vec.get("default")
+    return vec
+
+
+def _alias_props(task: AliasTask) -> Dict[str, Any]:
+    return {
+        "alias_text": task.alias_text,
+        "entity_id": task.entity_id,
+        "entity_type": task.entity_type,
+        "canonical": task.render_slots.get("canonical", False),
+        "chapter": task.chapter,
+        "chunk_id": task.chunk_id,
+        "details": task.details,
+    }
+
+
 def _render_alias_cypher(task: AliasTask) -> str:
     if task.cypher_template_id != "create_entity_with_alias":
         return ""
@@ -463,27 +1136,83 @@ def _render_alias_cypher(task: AliasTask) -> str:
     )
 
 
+def entity_unwind_statements(
+    alias_tasks: List[AliasTask],
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Group new-entity tasks into ``(cypher, rows)`` pairs, one per label.
+
+    Labels cannot be parameterised, so each entity type gets its own
+    ``CREATE`` body; names and details travel as row values.
+    """
+    by_label: Dict[str, List[Dict[str, Any]]] = {}
+    for task in alias_tasks:
+        if task.cypher_template_id != "create_entity_with_alias":
+            continue
+        by_label.setdefault(task.entity_type, []).append(
+            {"id": task.entity_id, "name": task.alias_text, "details": task.details}
+        )
+    return [
+        (
+            f"CREATE (e:{label} {{id: row.id, name: row.name, details: row.details}})",
+            rows,
+        )
+        for label, rows in by_label.items()
+    ]
+
+
+def _service_kwargs(
+    llm: Optional[Any],
+    embedder: Optional[EmbedderFn],
+    wclient: Optional[WeaviateClient],
+) -> Dict[str, Any]:
+    """Constructor arguments shared by the sync and async factories."""
+    if not wclient:
+        wclient = connect_to_weaviate_cloud(
+            cluster_url=app_settings.WEAVIATE_URL,
+            auth_credentials=Auth().api_key(api_key=app_settings.WEAVIATE_API_KEY),
+        )
+    return {
+        "weaviate_sync_client": wclient,
+        "embedder": embedder or embedder_for(app_settings.EMBEDDING_DIMS_ALIAS),
+        "llm": llm or ChatOpenAI(api_key=app_settings.OPENAI_API_KEY, temperature=0.0),
+        "callback_handler": provide_callback_handler_with_tags(
+            tags=[IdentityService.__name__]
+        ),
+        "vector_index": app_settings.WEAVIATE_INDEX_ALIAS,
+    }
+
+
 @lru_cache(maxsize=1)
 def get_identity_service_sync(
     llm: Optional[Any] = None,
     embedder: Optional[EmbedderFn] = None,
     wclient: Optional[WeaviateClient] = None,
 ) -> IdentityService:
-    resolved_llm = llm or ChatOpenAI(
-        api_key=app_settings.OPENAI_API_KEY, temperature=0.0
-    )
-    handler = provide_callback_handler_with_tags(tags=[IdentityService.__name__])
-    embedder = embedder or openai_embedder
+    return IdentityService(**_service_kwargs(llm, embedder, wclient))
 
-    if not wclient:
-        wclient = connect_to_weaviate_cloud(
+
+@lru_cache(maxsize=1)
+def get_identity_service(
+    llm: Optional[Any] = None,
+    embedder: Optional[EmbedderFn] = None,
+    async_embedder: Optional[AsyncEmbedderFn] = None,
+    wclient: Optional[WeaviateClient] = None,
+    async_wclient: Optional[WeaviateAsyncClient] = None,
+) -> IdentityService:
+    """Return an IdentityService that resolves aliases natively on the loop.
+
+    The async Weaviate client is connected by :meth:`IdentityService.startup`
+    and closed by :meth:`IdentityService.shutdown` (the app lifespan calls
+    both); the sync client is kept for startup and maintenance helpers.
+    """
+    if not async_wclient:
+        async_wclient = use_async_with_weaviate_cloud(
             cluster_url=app_settings.WEAVIATE_URL,
             auth_credentials=Auth().api_key(api_key=app_settings.WEAVIATE_API_KEY),
         )
-
     return IdentityService(
-        weaviate_sync_client=wclient,
-        embedder=embedder,
-        llm=resolved_llm,
-        callback_handler=handler,
+        **_service_kwargs(llm, embedder, wclient),
+        weaviate_async_client=async_wclient,
+        async_embedder=async_embedder
+        or async_embedder_for(app_settings.EMBEDDING_DIMS_ALIAS),
     )
@@ -0,0 +1,103 @@
+"""Dictionary scan of known entity aliases in free text.
+
+:class:`MentionScanner` keeps one Aho-Corasick automaton per entity type,
+filled from the ``Alias`` collection and extended as new aliases are
+committed. A passage is scanned in time linear in its length (per entity
+type) and every known alias occurrence is reported with its ``entity_id``.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from utils.helpers.aho_corasick import AhoCorasick
+
+
+class Mention(BaseModel):
+    entity_id: str
+    entity_type: str
+    alias_text: str  # surface form as it appears in the passage
+    start: int
+    end: int
+
+
+def _fold(text: str) -> str:
+    """Casefold ``text`` character by character, keeping offsets intact."""
+    out = []
+    for ch in text:
+        if ch.isspace():
+            out.append(" ")
+            continue
+        # "ß".casefold() == "ss" would shift offsets; keep such chars as-is
+        low = ch.casefold()
+        out.append(low if len(low) == 1 else ch)
+    return "".join(out)
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class MentionScanner:
+    """Aho-Corasick automata over known aliases, grouped by entity type."""
+
+    def __init__(self) -> None:
+        self._automata: Dict[str, AhoCorasick[str]] = {}
+
+    def add(self, alias_text: str, entity_id: str, entity_type: str) -> None:
+        """Register an alias; cheap enough to call on every alias commit."""
+        pattern = _fold(" ".join(alias_text.split()))
+        if not pattern or not entity_id or not entity_type:
+            return
+        automaton = self._automata.setdefault(entity_type, AhoCorasick())
+        automaton.add(pattern, entity_id)
+
+    @property
+    def entity_types(self) -> List[str]:
+        return list(self._automata)
+
+    def scan(
+        self, text: str, entity_types: Optional[Iterable[str]] = None
+    ) -> List[Mention]:
+        """Return alias occurrences in ``text`` ordered by position.
+
+        Only whole-word matches are reported. Overlapping matches are resolved
+        leftmost-longest across all scanned types ("Night Front" wins over
+        "Night"); an alias shared by several entities yields one mention per
+        entity for the same span.
+        """
+        folded = _fold(text)
+        types = self.entity_types if entity_types is None else list(entity_types)
+        found: List[Tuple[int, int, str, str]] = []
+        for etype in types:
+            automaton = self._automata.get(etype)
+            if automaton is None:
+                continue
+            for start, end, entity_id in automaton.iter_matches(folded):
+                if _is_boundary(folded, start, end):
+                    found.append((start, end, etype, entity_id))
+
+        found.sort(key=lambda m: (m[0], m[0] - m[1], m[2], m[3]))
+        mentions: List[Mention] = []
+        span: Optional[Tuple[int, int]] = None
+        for start, end, etype, entity_id in found:
+            if span is not None and (start, end) != span and start < span[1]:
+                continue
+            span = (start, end)
+            mentions.append(
+                Mention(
+                    entity_id=entity_id,
+                    entity_type=etype,
+                    alias_text=text[start:end],
+                    start=start,
+                    end=end,
+                )
+            )
+        return mentions
+
+    def __len__(self) -> int:
+        return sum(len(a) for a in self._automata.values())
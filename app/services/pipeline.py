@@ -1,28 +1,102 @@
 from __future__ import annotations
 
 from typing import List, Dict, Any, Tuple, Callable, Awaitable, cast
+from typing import dataclass_transform
+import asyncio
 import re
 
 from pydantic import ValidationError
 from utils.logger import get_logger
 import hashlib
 import inspect
+from dataclasses import Field as DCField, dataclass, field
 
 from schemas.stage import StageEnum
 from schemas.slots import SlotFill
-from schemas.cypher import CypherTemplate, TemplateRenderMode
+from schemas.cypher import AugmentMode, CypherTemplate, TemplateRenderMode
 from services.graph_proxy import GraphProxy
+from services.graph_schema import template_labels
 from services.slot_filler import SlotFiller
 from services.template_renderer import TemplateRenderer
 from services.templates import TemplateService
-from services.identity_service import IdentityService
-from services.raptor_index import FlatRaptorIndex
+from services.identity_service import IdentityService, slot_entity_type
+from services.mention_scanner import Mention
+from services.raptor_index import FlatRaptorIndex, encode_f16
+from services.raptor_outbox import RaptorWorker
+from services.augment_cache import UNRESOLVED, AugmentCache, cache_key
+from services.chapter_snapshot import ChapterSnapshotService
 from functools import lru_cache
 
 logger = get_logger(__name__)
 
 _ID_RE = re.compile(r"^[a-z_]+-[0-9a-f]{8}$")
 
+# Bodies for ``GraphProxy.run_unwind``; each item is bound to ``row``.
+_CHUNK_CYPHER = (
+    "MERGE (c:Chunk {id: row.id}) "
+    "SET c.text = row.text, c.chapter = row.chapter, "
+    "c.draft_stage = row.draft_stage, c.tags = row.tags, "
+    "c.lineage_id = coalesce(row.lineage_id, c.lineage_id)"
+)
+
+# Superseded facts are kept under ``ARCHIVED_<TYPE>``; augment templates match
+# them only when history is requested (see ``_rel_types.j2``).
+ARCHIVE_PREFIX = "ARCHIVED_"
+
+# Archive edges stated only by older-stage drafts of the same passage
+# (``Chunk.lineage_id``, supplied by the client). An edge also stated by any
+# other chunk - the new draft or another passage - stays live; edges first
+# written before provenance lists existed fall back to ``chunk_id``.
+_SUPERSEDE_CYPHER = f"""\
+MATCH (old:Chunk {{lineage_id: $lineage_id}})
+WHERE old.draft_stage < $draft_stage AND old.id <> $chunk_id
+WITH collect(old) AS olds, collect(old.id) AS old_ids
+UNWIND olds AS old
+MATCH (old)-[:MENTIONS]->()-[r]->()
+WITH r, old_ids, coalesce(r.chunk_ids, [r.chunk_id]) AS stated_by
+WHERE all(cid IN stated_by WHERE cid IN old_ids)
+  AND r.draft_stage < $draft_stage
+  AND NOT type(r) STARTS WITH '{ARCHIVE_PREFIX}'
+WITH DISTINCT r
+SET r.superseded_stage = $draft_stage, r.superseded_by = $chunk_id
+WITH r, '{ARCHIVE_PREFIX}' + type(r) AS archived_type
+CALL apoc.refactor.setType(r, archived_type) YIELD output
+WITH startNode(output).id AS source, endNode(output).id AS target
+RETURN count(*) AS archived,
+       collect(DISTINCT source) + collect(DISTINCT target) AS entity_ids"""
+
+# Latest value per (entity, predicate) with the chapter range it has held
+# for. Older chapters (or older drafts of the same chapter) never overwrite a
+# newer value; ``values`` keeps the last ``$max_values`` distinct values.
+_PROFILE_CYPHER = """\
+MERGE (p:EntityProfile {id: row.entity_id + "|" + row.predicate})
+ON CREATE SET p.entity_id = row.entity_id, p.predicate = row.predicate,
+              p.current = row.current, p.chapter_from = row.chapter,
+              p.chapter_to = row.chapter, p.draft_stage = row.draft_stage,
+              p.chunk_id = row.chunk_id, p.values = []
+WITH p, row,
+     row.chapter > p.chapter_to
+       OR (row.chapter = p.chapter_to AND row.draft_stage >= p.draft_stage)
+       AS latest
+WITH p, row, latest, latest AND p.current <> row.current AS changed
+SET p.chapter_from = CASE WHEN changed THEN row.chapter ELSE p.chapter_from END,
+    p.chapter_to = CASE WHEN latest THEN row.chapter ELSE p.chapter_to END,
+    p.current = CASE WHEN latest THEN row.current ELSE p.current END,
+    p.draft_stage = CASE WHEN latest THEN row.draft_stage ELSE p.draft_stage END,
+    p.chunk_id = CASE WHEN latest THEN row.chunk_id ELSE p.chunk_id END,
+    p.values = CASE WHEN row.current IN p.values THEN p.values
+               ELSE (p.values + row.current)[-$max_values..] END"""
+
+
+def _mentions_cypher(label: str | None) -> str:
+    """``run_unwind`` body attaching ``MENTIONS`` edges to nodes of ``label``."""
+    node = f"x:`{label}`" if label else "x"
+    return (
+        "MATCH (chunk:Chunk {id: $chunk_id})\n"
+        f"MATCH ({node} {{id: row.node_id}})\n"
+        "MERGE (chunk)-[:MENTIONS]->(x)"
+    )
+
 
 class ExtractionPipeline:
     """Pipeline that maps raw text to graph relations tied to a ``ChunkNode``.
@@ -38,9 +112,21 @@ class ExtractionPipeline:
        :class:`TemplateRenderer` (injecting ``chunk_id``).
     6. **Graph execution** – executes prepared Cypher batch with
        :class:`GraphProxy`.
-    7. **Raptor clustering** – computes embeddings of the text and the rendered
+    7. **Supersession** (opt-in, ``supersede_drafts``) – moves facts stated
+       only by older draft stages of the same passage (the client's
+       ``lineage_id``) to ``ARCHIVED_<TYPE>`` relationships.
+    8. **Raptor clustering** – computes embeddings of the text and the rendered
        triples, then updates ``chunk.raptor_node_id`` using
-       :class:`FlatRaptorIndex`.
+       :class:`FlatRaptorIndex`. With ``raptor_worker`` the chunk is only
+       queued in its durable outbox and clustered in the background; the
+       response then carries no ``raptor_node_id``.
+
+    Once the facts are committed, the ``EntityProfile`` node of every
+    (subject, predicate) pair is updated with the latest value, so augment can
+    read an entity's current state with one keyed lookup, and the same rows
+    are recorded as chapter deltas by ``snapshots``. Cached augment
+    results referencing any entity touched by the writes are dropped from
+    ``augment_cache``.
     """
 
     def __init__(
@@ -52,6 +138,11 @@ class ExtractionPipeline:
         template_renderer: TemplateRenderer,
         raptor_index: FlatRaptorIndex,
         top_k: int = 10,
+        supersede_drafts: bool = False,
+        augment_cache: AugmentCache | None = None,
+        profile_values: int = 10,
+        snapshots: ChapterSnapshotService | None = None,
+        raptor_worker: RaptorWorker | None = None,
     ) -> None:
         self.template_service = template_service
         self.slot_filler = slot_filler
@@ -60,6 +151,11 @@ class ExtractionPipeline:
         self.template_renderer = template_renderer
         self.raptor_index = raptor_index
         self.top_k = top_k
+        self.supersede_drafts = supersede_drafts
+        self.augment_cache = augment_cache
+        self.profile_values = profile_values
+        self.snapshots = snapshots
+        self.raptor_worker = raptor_worker
 
     async def extract_and_save(
         self,
@@ -67,6 +163,7 @@ class ExtractionPipeline:
         chapter: int,
         stage: StageEnum = StageEnum.brainstorm,
         tags: List[str] | None = None,
+        lineage_id: str | None = None,
     ) -> Dict[str, Any]:
         """Run the end-to-end extraction for a single text fragment.
 
@@ -80,18 +177,25 @@ class ExtractionPipeline:
             Draft stage (brainstorm/outline/etc.).
         tags:
             Optional list of user supplied tags.
+        lineage_id:
+            Client-side identifier of the passage across its drafts. With
+            ``supersede_drafts`` the facts of its older-stage drafts are
+            archived; without it nothing is superseded.
 
         Returns
         -------
         Dict[str, Any]
-            ``{"chunk_id": ..., "raptor_node_id": ...}``
+            ``{"chunk_id": ..., "raptor_node_id": ...}``; ``raptor_node_id``
+            is ``None`` when clustering is deferred to ``raptor_worker``.
         """
         chunk_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
         chunk_id = f"chunk-{chunk_hash}"
-        await self._create_chunk(chunk_id, text, chapter, stage, tags or [])
+        await self._create_chunk(chunk_id, text, chapter, stage, tags or [], lineage_id)
 
         templates = await self.template_service.top_k_async(text, k=self.top_k)
         triple_texts: List[str] = []
+        mentioned: Dict[Tuple[str, str | None], None] = {}
+        profile_rows: List[Dict[str, Any]] = []
         relationships: List[Dict[str, str | None]] = []
         aliases: List[Dict[str, str]] = []
 
@@ -103,19 +207,62 @@ class ExtractionPipeline:
                 stage,
                 chunk_id,
                 triple_texts,
+                mentioned,
+                profile_rows,
             )
             relationships.extend(rel)
             aliases.extend(alias_list)
 
-        triple_str = " \n".join(triple_texts)
-        raptor_id = self.raptor_index.insert_chunk(text, triple_str)
-        await self.graph_proxy.run_query(
-            "MATCH (c:Chunk {id:$cid}) SET c.raptor_node_id=$rid",
-            {"cid": chunk_id, "rid": str(raptor_id)},
+        # One UNWIND per label for all templates instead of a MATCH/MERGE per
+        # node; labelled lookups use the ``id`` uniqueness constraint.
+        by_label: Dict[str | None, List[Dict[str, str]]] = {}
+        for node_id, label in mentioned:
+            by_label.setdefault(label, []).append({"node_id": node_id})
+        for label, rows in by_label.items():
+            await self.graph_proxy.run_unwind(
+                _mentions_cypher(label), rows, {"chunk_id": chunk_id}
+            )
+        await self.graph_proxy.run_unwind(
+            _PROFILE_CYPHER, profile_rows, {"max_values": self.profile_values}
         )
+        if self.snapshots is not None:
+            await self.snapshots.record(profile_rows)
+        touched = {node_id for node_id, _ in mentioned}
+        if self.supersede_drafts and lineage_id:
+            touched.update(await self._supersede(chunk_id, lineage_id, stage))
+        if self.augment_cache is not None:
+            self.augment_cache.invalidate(touched, new_aliases=bool(aliases))
+
+        triple_str = " \n".join(triple_texts)
+        raptor_id: str | None = None
+        if self.raptor_worker is not None:
+            await self.raptor_worker.enqueue(chunk_id, text, triple_str)
+        else:
+            # Embedding and Weaviate calls are blocking; keep them off the loop.
+            text_vec, fact_vec, centroid = await asyncio.to_thread(
+                self.raptor_index.embed_chunk, text, triple_str
+            )
+            raptor_id = str(
+                await asyncio.to_thread(
+                    self.raptor_index.insert_vectors, text_vec, fact_vec, centroid
+                )
+            )
+            # ``raptor_vec_f16`` and ``triple_text`` feed offline re-clustering
+            # (``RaptorReclusterJob``).
+            await self.graph_proxy.run_query(
+                "MATCH (c:Chunk {id:$cid}) "
+                "SET c.raptor_node_id=$rid, c.raptor_vec_f16=$vec, "
+                "c.triple_text=$triples REMOVE c.raptor_vec",
+                {
+                    "cid": chunk_id,
+                    "rid": raptor_id,
+                    "vec": encode_f16(centroid),
+                    "triples": triple_str,
+                },
+            )
         return {
             "chunk_id": chunk_id,
-            "raptor_node_id": str(raptor_id),
+            "raptor_node_id": raptor_id,
             "relationships": relationships,
             "aliases": aliases,
         }
@@ -128,18 +275,23 @@ class ExtractionPipeline:
         stage: StageEnum,
         chunk_id: str,
         triple_texts: List[str],
+        mentioned: Dict[Tuple[str, str | None], None],
+        profile_rows: List[Dict[str, Any]],
     ) -> Tuple[List[Dict[str, str | None]], List[Dict[str, str]]]:
         """Fill slots for a template and persist its relationships.
 
         The method resolves entity aliases, renders the template and executes
-        the resulting Cypher.  ``chunk_mentions.j2`` injects a ``WITH *``
-        separator so that the domain MERGE statements run before ``MENTIONS``
-        edges are attached to the ``Chunk``.  Neo4j still reports a
-        ``MATCH after MERGE`` error when all commands are issued in a single
-        statement.  To avoid this the statement is split around ``WITH *`` and
-        executed as two sequential queries within one transaction.  The
-        template's ``triple_text`` is collected for later insertion into the
-        Raptor index.
+        the resulting Cypher.  New entities are created with one ``UNWIND``
+        statement per label.  ``MENTIONS`` edges are not rendered
+        (``defer_mentions``); the related node IDs are collected into
+        ``mentioned`` and attached by :meth:`extract_and_save` in bulk, as are
+        the ``EntityProfile`` updates collected into ``profile_rows``.  Should a
+        template still contain the ``WITH *`` separator of
+        ``chunk_mentions.j2``, the statement is split around it and executed
+        as two sequential queries within one transaction, since Neo4j reports
+        a ``MATCH after MERGE`` error otherwise.  The template's
+        ``triple_text`` is collected for later insertion into the Raptor
+        index.
         """
         fills = await self.slot_filler.fill_slots(template, text)
         if not fills:
@@ -155,7 +307,9 @@ class ExtractionPipeline:
         )
 
         alias_tasks = resolve.alias_tasks
-        alias_cyphers = await self.identity_service.commit_aliases(alias_tasks)
+        entity_writes = await self.identity_service.commit_aliases_unwind(alias_tasks)
+        for body, rows in entity_writes:
+            await self.graph_proxy.run_unwind(body, rows)
         alias_info = [
             {"alias_text": t.alias_text, "entity_id": t.entity_id} for t in alias_tasks
         ]
@@ -172,6 +326,7 @@ class ExtractionPipeline:
             "description": template.description,
             "confidence": template.default_confidence,
             "score": template.score or 0.0,
+            "defer_mentions": True,
         }
         render = self.template_renderer.render(template, slot_fill, meta)
 
@@ -185,9 +340,11 @@ class ExtractionPipeline:
             head, tail = cypher.split("WITH *", 1)
             query_parts = [head.strip(), tail.strip()]
 
-        batch = alias_cyphers + query_parts
-        await self.graph_proxy.run_queries(batch)
+        await self.graph_proxy.run_queries(query_parts)
         triple_texts.append(render.triple_text)
+        mentioned.update(
+            dict.fromkeys(zip(render.related_node_ids, render.related_node_labels))
+        )
 
         relations: List[Dict[str, str | None]] = []
         if template.graph_relation:
@@ -199,6 +356,18 @@ class ExtractionPipeline:
 
             subj = pick(template.graph_relation.subject)
             obj = pick(template.graph_relation.object)
+            current = obj if obj is not None else pick(template.graph_relation.value)
+            if subj is not None and current is not None:
+                profile_rows.append(
+                    {
+                        "entity_id": str(subj),
+                        "predicate": template.graph_relation.predicate,
+                        "current": str(current),
+                        "chapter": chapter,
+                        "draft_stage": stage.value,
+                        "chunk_id": chunk_id,
+                    }
+                )
             relations.append(
                 {
                     "subject": str(subj),
@@ -211,6 +380,35 @@ class ExtractionPipeline:
 
         return relations, alias_info
 
+    async def _supersede(
+        self, chunk_id: str, lineage_id: str, stage: StageEnum
+    ) -> List[str]:
+        """Archive facts stated only by drafts of ``lineage_id`` older than ``stage``.
+
+        Runs after the chunk's own facts are written, so facts the new draft
+        repeats are already lifted to ``stage`` and stay live. Facts dropped by
+        the rewrite are retyped to ``ARCHIVED_<TYPE>`` with
+        ``superseded_stage``/``superseded_by`` set. Returns the IDs of the
+        entities whose edges were archived.
+        """
+        result = await self.graph_proxy.run_query(
+            _SUPERSEDE_CYPHER,
+            {
+                "chunk_id": chunk_id,
+                "lineage_id": lineage_id,
+                "draft_stage": stage.value,
+            },
+        )
+        if not result or not result[0].get("archived"):
+            return []
+        logger.info(
+            "Archived %d superseded facts of passage %s (stage %s)",
+            result[0]["archived"],
+            lineage_id,
+            stage.name,
+        )
+        return [eid for eid in result[0].get("entity_ids") or [] if eid]
+
     async def _create_chunk(
         self,
         chunk_id: str,
@@ -218,21 +416,21 @@ class ExtractionPipeline:
         chapter: int,
         stage: StageEnum,
         tags: List[str],
+        lineage_id: str | None = None,
     ) -> None:
-        """Insert a new ``Chunk`` node representing the raw text."""
-        cypher = (
-            "CREATE (c:Chunk {id:$cid, text:$text, chapter:$ch, "
-            "draft_stage:$st, tags:$tags})"
-        )
-        await self.graph_proxy.run_query(
-            cypher,
-            {
-                "cid": chunk_id,
-                "text": text,
-                "ch": chapter,
-                "st": stage.value,
-                "tags": tags,
-            },
+        """Insert or update the ``Chunk`` node representing the raw text."""
+        await self.graph_proxy.run_unwind(
+            _CHUNK_CYPHER,
+            [
+                {
+                    "id": chunk_id,
+                    "text": text,
+                    "chapter": chapter,
+                    "draft_stage": stage.value,
+                    "tags": tags,
+                    "lineage_id": lineage_id,
+                }
+            ],
         )
 
 
@@ -251,8 +449,11 @@ def get_extraction_pipeline() -> ExtractionPipeline:
     from services.templates.service import get_template_service
     from services.template_renderer import get_template_renderer
     from services.graph_proxy import get_graph_proxy
-    from services.identity_service import get_identity_service_sync
+    from services.identity_service import get_identity_service
     from services.raptor_index import get_raptor_index
+    from services.augment_cache import get_augment_cache
+    from services.chapter_snapshot import get_chapter_snapshot_service
+    from services.raptor_outbox import get_raptor_worker
 
     llm = ChatOpenAI(
         api_key=app_settings.OPENAI_API_KEY, temperature=0.0, model="gpt-4o-mini"
@@ -264,14 +465,45 @@ def get_extraction_pipeline() -> ExtractionPipeline:
         template_service=get_template_service(),
         slot_filler=filler,
         graph_proxy=get_graph_proxy(),
-        identity_service=get_identity_service_sync(),
+        identity_service=get_identity_service(),
         template_renderer=get_template_renderer(),
         raptor_index=get_raptor_index(),
+        supersede_drafts=app_settings.SUPERSEDE_DRAFTS,
+        augment_cache=get_augment_cache(),
+        snapshots=get_chapter_snapshot_service(),
+        raptor_worker=get_raptor_worker(),
     )
 
 
 class AugmentPipeline:
-    """Pipeline that enriches a text fragment with context from the graph."""
+    """Pipeline that enriches a text fragment with context from the graph.
+
+    ``mention_scanner`` (usually :meth:`IdentityService.scan_mentions`) enables
+    a fast path: templates whose required slots are all entity references are
+    filled straight from the aliases found in the text and skip the LLM
+    slot-filling round trip.
+
+    In :attr:`AugmentMode.NEIGHBOURHOOD` the entities found by
+    ``mention_scanner`` are expanded with a single ``entity_neighbourhood.j2``
+    query (at most ``neighbourhood_limit`` facts per entity and relationship
+    type) instead of one query and one LLM call per template.
+
+    With ``with_profiles`` the ``EntityProfile`` entries of every resolved
+    entity (its current value per predicate) are read in the same transaction
+    and returned as ``context.profiles``.
+
+    With ``cache`` a repeated request for the same passage and chapter is
+    answered from :class:`AugmentCache` until an extraction touches one of the
+    entities the result refers to.
+
+    :attr:`AugmentMode.EPISODES` uses the Raptor clustering as a retrieval
+    index: the ``episode_clusters`` clusters of ``raptor_index`` nearest to
+    the passage are looked up and their latest ``episode_chunks`` chunks (per
+    cluster, up to the chapter) are returned as ``context.episodes`` together
+    with the relationships they produced. No templates or LLM calls are
+    involved. These results are not cached, since any extraction may file a
+    new chunk under the same clusters.
+    """
 
     def __init__(
         self,
@@ -284,7 +516,14 @@ class AugmentPipeline:
         summariser: (
             Callable[[List[Dict[str, Any]]], Awaitable[str] | str] | None
         ) = None,
+        mention_scanner: Callable[[str], Awaitable[List[Mention]]] | None = None,
+        cache: AugmentCache | None = None,
         top_k: int = 10,
+        neighbourhood_limit: int = 5,
+        with_profiles: bool = True,
+        raptor_index: FlatRaptorIndex | None = None,
+        episode_clusters: int = 3,
+        episode_chunks: int = 5,
     ) -> None:
         self.template_service = template_service
         self.slot_filler = slot_filler
@@ -292,72 +531,195 @@ class AugmentPipeline:
         self.template_renderer = template_renderer
         self.graph_proxy = graph_proxy
         self.summariser = summariser
+        self.mention_scanner = mention_scanner
+        self.cache = cache
         self.top_k = top_k
+        self.neighbourhood_limit = neighbourhood_limit
+        self.with_profiles = with_profiles
+        self.raptor_index = raptor_index
+        self.episode_clusters = episode_clusters
+        self.episode_chunks = episode_chunks
 
-    async def augment_context(
-        self, text: str, chapter: int, tags: List[str] | None = None
-    ) -> Dict[str, Any]:  # pragma: no cover - integration tested separately
-        templates = await self.template_service.top_k_async(
-            text, k=self.top_k, mode=TemplateRenderMode.AUGMENT
-        )
+    async def _llm_fills(
+        self, tpl: CypherTemplate, text: str, chapter: int, alias_map: Dict[str, str]
+    ) -> List[SlotFill]:
+        """Fill slots with the LLM and map names to IDs in lookup mode.
 
-        rows: List[Dict[str, Any]] = []
-        alias_map: Dict[str, str] = {}
-        unresolved: set[str] = set()
-        for tpl in templates:
-            try:
-                fills = await self.slot_filler.fill_slots(tpl, text)
-            except ValidationError as exc:  # pragma: no cover - network/LLM errors
-                logger.error(
-                    "Slot filling failed for template %s: %s. Text: %s",
-                    tpl.id,
-                    exc,
-                    text,
-                    exc_info=True,
-                )
-                continue
-            except Exception as exc:  # pragma: no cover - unexpected errors
-                logger.error(
-                    "Unexpected error in slot filling for template %s: %s",
+        Fills naming an entity that is not in the alias index are dropped:
+        rendering them would put the raw surface name where an ID belongs.
+        """
+        try:
+            fills = await self.slot_filler.fill_slots(tpl, text)
+        except ValidationError as exc:  # pragma: no cover - network/LLM errors
+            logger.error(
+                "Slot filling failed for template %s: %s. Text: %s",
+                tpl.id,
+                exc,
+                text,
+                exc_info=True,
+            )
+            return []
+        except Exception as exc:  # pragma: no cover - unexpected errors
+            logger.error(
+                "Unexpected error in slot filling for template %s: %s",
+                tpl.id,
+                exc,
+                exc_info=True,
+            )
+            return []
+
+        resolved: List[SlotFill] = []
+        for fill in fills:
+            resolve = await self.identity_service.resolve_bulk(
+                fill.slots,
+                slot_defs=tpl.slots,
+                chapter=chapter,
+                chunk_id="aug",
+                snippet=text,
+                lookup_only=True,
+            )
+            alias_map.update(resolve.alias_map)
+            if resolve.unresolved:
+                logger.debug(
+                    "Skipping fill for template %s: unknown entities in %s",
                     tpl.id,
-                    exc,
-                    exc_info=True,
+                    resolve.unresolved,
                 )
                 continue
-            for fill in fills:
-                resolve = await self.identity_service.resolve_bulk(
-                    fill.slots,
-                    slot_defs=tpl.slots,
-                    chapter=chapter,
-                    chunk_id="aug",
-                    snippet=text,
-                )
-                alias_map.update(resolve.alias_map)
-
-                value_slot = None
-
-                subject_slot = None
-                object_slot = None
-                if tpl.graph_relation:
-                    expr = tpl.graph_relation.value
-                    if expr and isinstance(expr, str) and expr.startswith("$"):
-                        value_slot = expr[1:]
-                    sub = tpl.graph_relation.subject
-                    if isinstance(sub, str) and sub.startswith("$"):
-                        subject_slot = sub[1:]
-                    obj = tpl.graph_relation.object
-                    if obj and isinstance(obj, str) and obj.startswith("$"):
-                        object_slot = obj[1:]
-
-                slot_fill = SlotFill(
+            resolved.append(
+                SlotFill(
                     template_id=str(tpl.id),
                     slots=resolve.mapped_slots,
                     details=fill.details,
                 )
+            )
+        return resolved
+
+    def _neighbourhood_query(
+        self,
+        mentions: List[Mention],
+        templates: List[CypherTemplate],
+        chapter: int,
+        include_history: bool,
+    ) -> _AugmentQuery:
+        """Render ``entity_neighbourhood.j2`` once per label of the mentions.
+
+        Entity types are mapped to node labels case-insensitively through the
+        templates' ``return_map`` (``CHARACTER`` -> ``Character``); types
+        without a known label are looked up unlabelled.
+        """
+        labels = {label.upper(): label for label in template_labels(templates)}
+        by_label: Dict[str | None, List[str]] = {}
+        for mention in mentions:
+            ids = by_label.setdefault(labels.get(mention.entity_type.upper()), [])
+            if mention.entity_id not in ids:
+                ids.append(mention.entity_id)
+        parts = [
+            self.template_renderer.render_named(
+                "entity_neighbourhood.j2",
+                {
+                    "entity_ids": ids,
+                    "label": label,
+                    "chapter": chapter,
+                    "per_type_limit": self.neighbourhood_limit,
+                    "include_history": include_history,
+                },
+            )
+            for label, ids in by_label.items()
+        ]
+        entity_ids = [eid for ids in by_label.values() for eid in ids]
+        return _AugmentQuery(None, None, parts, entity_ids)
+
+    async def _nearest_clusters(self, text: str) -> Dict[str, float]:
+        """``raptor_id -> distance`` of the clusters closest to ``text``."""
+        if self.raptor_index is None:
+            return {}
+        leaves = await asyncio.to_thread(
+            self.raptor_index.nearest_leaves, text, self.episode_clusters
+        )
+        return {str(rid): dist for rid, dist in leaves}
+
+    def _render_episodes(
+        self,
+        clusters: Dict[str, float],
+        chapter: int,
+        include_history: bool,
+        facts: bool,
+    ) -> str:
+        return self.template_renderer.render_named(
+            "raptor_episodes.j2",
+            {
+                "raptor_ids": list(clusters),
+                "chapter": chapter,
+                "per_cluster_limit": self.episode_chunks,
+                "include_history": include_history,
+                "facts": facts,
+            },
+        )
+
+    async def augment_context(
+        self,
+        text: str,
+        chapter: int,
+        tags: List[str] | None = None,
+        *,
+        include_history: bool = False,
+        mode: AugmentMode = AugmentMode.TEMPLATES,
+    ) -> Dict[str, Any]:  # pragma: no cover - integration tested separately
+        """Collect graph facts relevant to ``text`` up to ``chapter``.
+
+        Only live facts are returned unless ``include_history`` is set, in
+        which case facts superseded by newer draft stages are matched as well
+        and flagged with ``meta_archived``. ``mode`` selects how the graph is
+        read (see :class:`AugmentMode`); without mentions in the passage the
+        neighbourhood mode falls back to templates, and so does the episodes
+        mode without a Raptor index or clusters.
+        """
+        clusters: Dict[str, float] = {}
+        if mode is AugmentMode.EPISODES:
+            clusters = await self._nearest_clusters(text)
+        cache = self.cache if not clusters else None
+        request_key = cache_key(text, chapter, include_history, mode.value)
+        if cache is not None:
+            cached = cache.get(request_key)
+            if cached is not None:
+                return cached
+
+        alias_map: Dict[str, str] = {}
+        unresolved: set[str] = set()
+        queries: List[_AugmentQuery] = []
+        templates: List[CypherTemplate] = []
+        mentions: List[Mention] = []
+        if clusters:
+            queries.append(
+                _AugmentQuery(
+                    None,
+                    None,
+                    [self._render_episodes(clusters, chapter, include_history, True)],
+                    name=_EPISODES_ID,
+                )
+            )
+        else:
+            templates = await self.template_service.top_k_async(
+                text, k=self.top_k, mode=TemplateRenderMode.AUGMENT
+            )
+            if self.mention_scanner:
+                mentions = await self.mention_scanner(text)
+        if mode is AugmentMode.NEIGHBOURHOOD and mentions:
+            queries.append(
+                self._neighbourhood_query(mentions, templates, chapter, include_history)
+            )
+            templates = [t for t in templates if not _covered_by_neighbourhood(t)]
+        for tpl in templates:
+            fills = _mention_fills(tpl, mentions) if mentions else None
+            if fills is None:
+                fills = await self._llm_fills(tpl, text, chapter, alias_map)
+            for slot_fill in fills:
                 meta = {
                     "chunk_id": "aug",
                     "chapter": chapter,
                     "description": tpl.description,
+                    "include_history": include_history,
                 }
                 plan = self.template_renderer.render(
                     tpl, slot_fill, meta, mode=TemplateRenderMode.AUGMENT
@@ -367,61 +729,127 @@ class AugmentPipeline:
                 if "WITH *" in cypher:
                     head, tail = cypher.split("WITH *", 1)
                     query_parts = [head.strip(), tail.strip()]
-                    result = await self.graph_proxy.run_queries(
-                        query_parts, write=False
+                queries.append(_AugmentQuery(tpl, slot_fill, query_parts))
+
+        # One read transaction (one session) for every template of the
+        # request; results come back grouped per query, in order.
+        groups = [q.parts for q in queries]
+        profile_ids = (
+            sorted(_referenced_entities(queries, alias_map) - {UNRESOLVED})
+            if self.with_profiles
+            else []
+        )
+        if profile_ids:
+            groups.append(
+                [
+                    self.template_renderer.render_named(
+                        "entity_profiles.j2",
+                        {"entity_ids": profile_ids, "chapter": chapter},
                     )
-                else:
-                    result = await self.graph_proxy.run_query(cypher, write=False)
+                ]
+            )
+        if clusters:
+            groups.append(
+                [self._render_episodes(clusters, chapter, include_history, False)]
+            )
+        results = (
+            await self.graph_proxy.run_query_groups(groups, write=False)
+            if groups
+            else []
+        )
+        episodes = _episodes(results.pop(), clusters) if clusters else []
+        n_queries = len(queries)
+        profiles = [row for group in results[n_queries:] for row in group]
 
-                for row in result:
-                    for key, val in list(row.items()):
-                        if isinstance(val, str):
-                            if val in alias_map:
-                                row[key] = alias_map[val]
-                            elif _ID_RE.match(val):
-                                unresolved.add(val)
-                    if row.get("value") is None and value_slot:
-                        slot_id = resolve.mapped_slots.get(value_slot)
-                        if slot_id:
-                            if slot_id in alias_map:
-                                row["value"] = alias_map[slot_id]
-                            else:
-                                if isinstance(slot_id, str) and _ID_RE.match(slot_id):
-                                    unresolved.add(slot_id)
-                                row["value"] = slot_id
-                    if subject_slot:
-                        sid = resolve.mapped_slots.get(subject_slot)
-                        if sid:
-                            if sid in alias_map:
-                                row["source"] = alias_map[sid]
-                            else:
-                                if isinstance(sid, str) and _ID_RE.match(sid):
-                                    unresolved.add(sid)
-                                row["source"] = sid
-                    if object_slot:
-                        oid = resolve.mapped_slots.get(object_slot)
-                        if oid:
-                            if oid in alias_map:
-                                row["target"] = alias_map[oid]
-                            else:
-                                if isinstance(oid, str) and _ID_RE.match(oid):
-                                    unresolved.add(oid)
-                                row["target"] = oid
-
-                    stage_val = row.get("meta_draft_stage")
-                    if isinstance(stage_val, (int, float)):
-                        try:
-                            row["meta_draft_stage"] = StageEnum(stage_val).name
-                        except ValueError:  # pragma: no cover - unexpected values
-                            row["meta_draft_stage"] = str(stage_val)
-                rows.extend(result)
+        rows: List[Dict[str, Any]] = []
+        for query, result in zip(queries, results):
+            tpl, slot_fill = query.template, query.slot_fill
+            value_slot = None
+            subject_slot = None
+            object_slot = None
+            if tpl is None:
+                result = _unique_rows(result)
+            elif tpl.graph_relation:
+                expr = tpl.graph_relation.value
+                if expr and isinstance(expr, str) and expr.startswith("$"):
+                    value_slot = expr[1:]
+                sub = tpl.graph_relation.subject
+                if isinstance(sub, str) and sub.startswith("$"):
+                    subject_slot = sub[1:]
+                obj = tpl.graph_relation.object
+                if obj and isinstance(obj, str) and obj.startswith("$"):
+                    object_slot = obj[1:]
+
+            for row in result:
+                if not row.get("meta_template_id"):
+                    row["meta_template_id"] = tpl.name if tpl else query.name
+                for key, val in list(row.items()):
+                    if isinstance(val, str):
+                        if val in alias_map:
+                            row[key] = alias_map[val]
+                        elif _ID_RE.match(val):
+                            unresolved.add(val)
+                if row.get("value") is None and value_slot and slot_fill:
+                    slot_id = slot_fill.slots.get(value_slot)
+                    if slot_id:
+                        if slot_id in alias_map:
+                            row["value"] = alias_map[slot_id]
+                        else:
+                            if isinstance(slot_id, str) and _ID_RE.match(slot_id):
+                                unresolved.add(slot_id)
+                            row["value"] = slot_id
+                if subject_slot and slot_fill:
+                    sid = slot_fill.slots.get(subject_slot)
+                    if sid:
+                        if sid in alias_map:
+                            row["source"] = alias_map[sid]
+                        else:
+                            if isinstance(sid, str) and _ID_RE.match(sid):
+                                unresolved.add(sid)
+                            row["source"] = sid
+                if object_slot and slot_fill:
+                    oid = slot_fill.slots.get(object_slot)
+                    if oid:
+                        if oid in alias_map:
+                            row["target"] = alias_map[oid]
+                        else:
+                            if isinstance(oid, str) and _ID_RE.match(oid):
+                                unresolved.add(oid)
+                            row["target"] = oid
+
+                relation = row.get("relation")
+                if isinstance(relation, str) and relation.startswith(ARCHIVE_PREFIX):
+                    row["relation"] = relation.removeprefix(ARCHIVE_PREFIX)
+                    row["meta_archived"] = True
+                stage_val = row.get("meta_draft_stage")
+                if isinstance(stage_val, (int, float)):
+                    try:
+                        row["meta_draft_stage"] = StageEnum(stage_val).name
+                    except ValueError:  # pragma: no cover - unexpected values
+                        row["meta_draft_stage"] = str(stage_val)
+            rows.extend(result)
+
+        for profile in profiles:
+            for key in ("entity", "value"):
+                val = profile.get(key)
+                if isinstance(val, str):
+                    if val in alias_map:
+                        profile[key] = alias_map[val]
+                    elif _ID_RE.match(val):
+                        unresolved.add(val)
+            stage_val = profile.get("draft_stage")
+            if isinstance(stage_val, int):
+                try:
+                    profile["draft_stage"] = StageEnum(stage_val).name
+                except ValueError:  # pragma: no cover - unexpected values
+                    profile["draft_stage"] = str(stage_val)
 
         to_resolve = unresolved.difference(alias_map.keys())
         if to_resolve:
             extra = await self.identity_service.get_alias_map(list(to_resolve))
             if extra:
                 alias_map.update(extra)
-                for row in rows:
+                for row in [*rows, *profiles]:
                     for key, val in list(row.items()):
                         if isinstance(val, str) and val in extra:
                             row[key] = extra[val]
@@ -444,7 +872,156 @@ class AugmentPipeline:
                 fn = cast(Callable[[List[Dict[str, Any]]], str], self.summariser)
                 summary = fn(rows)
 
-        return {"context": {"rows": rows, "summary": summary}, "trace_id": ""}
+        result = {
+            "context": {
+                "rows": rows,
+                "profiles": profiles,
+                "episodes": episodes,
+                "summary": summary,
+            },
+            "trace_id": "",
+        }
+        if cache is not None:
+            cache.put(request_key, result, _referenced_entities(queries, alias_map))
+        return result
+
+
+def _referenced_entities(
+    queries: List[_AugmentQuery], alias_map: Dict[str, str]
+) -> set[str]:
+    """Entity IDs an augment result depends on, for cache invalidation.
+
+    Entity slots still holding a raw name (not resolved to an ID) and results
+    without any entity reference are keyed under :data:`UNRESOLVED`.
+    """
+    entity_ids = {eid for eid in alias_map if _ID_RE.match(eid)}
+    for query in queries:
+        entity_ids.update(query.entity_ids)
+        if query.template is None or query.slot_fill is None:
+            continue
+        for name, value in query.slot_fill.slots.items():
+            slot_def = query.template.slots.get(name)
+            if slot_def is None or not slot_entity_type(slot_def):
+                continue
+            if isinstance(value, str) and _ID_RE.match(value):
+                entity_ids.add(value)
+            elif value:
+                entity_ids.add(UNRESOLVED)
+    return entity_ids or {UNRESOLVED}
+
+
+_NEIGHBOURHOOD_ID = "entity_neighbourhood"
+_EPISODES_ID = "raptor_episodes"
+
+
+@dataclass_transform(field_specifiers=(DCField, field))
+def my_dataclass(cls):
+    return dataclass(cls)
+
+
+@my_dataclass
+class _AugmentQuery:
+    """Rendered augment statement(s) of one template fill.
+
+    The entity-neighbourhood and episodes queries have neither template nor
+    fill; ``name`` tags their rows and the neighbourhood query lists the
+    entities it expands.
+    """
+
+    template: CypherTemplate | None
+    slot_fill: SlotFill | None
+    parts: List[str]
+    entity_ids: List[str] = field(default_factory=list)
+    name: str = _NEIGHBOURHOOD_ID
+
+
+def _episodes(
+    rows: List[Dict[str, Any]], clusters: Dict[str, float]
+) -> List[Dict[str, Any]]:
+    """Chunk rows of ``raptor_episodes.j2``, closest cluster and newest first."""
+    episodes = [
+        {**row, "distance": clusters.get(str(row.get("raptor_id")))} for row in rows
+    ]
+    episodes.sort(key=lambda e: (e["distance"] or 0.0, -(e.get("chapter") or 0)))
+    return episodes
+
+
+def _covered_by_neighbourhood(tpl: CypherTemplate) -> bool:
+    """Whether the template only reads a subject -> object edge.
+
+    Such facts are returned by the neighbourhood query; templates without an
+    object (node flags such as ``deceased_chapter``) still run on their own.
+    """
+    return bool(tpl.graph_relation and tpl.graph_relation.object)
+
+
+def _unique_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop edges returned twice (both endpoints were mentioned)."""
+    seen: set[Tuple[Any, ...]] = set()
+    unique: List[Dict[str, Any]] = []
+    for row in rows:
+        ident = (
+            row.get("source"),
+            row.get("relation"),
+            row.get("target"),
+            row.get("meta_chunk_id"),
+        )
+        if ident not in seen:
+            seen.add(ident)
+            unique.append(row)
+    return unique
+
+
+_META_SLOTS = {"chapter"}
+
+
+def _mention_fills(
+    tpl: CypherTemplate, mentions: List[Mention]
+) -> List[SlotFill] | None:
+    """Build augment slot fills from scanned mentions.
+
+    Returns ``None`` when the template needs the LLM: a required slot is not
+    an entity reference, or a required entity slot has no mention. Otherwise
+    one fill is produced per mentioned subject entity (possibly none).
+    """
+    by_type: Dict[str, List[str]] = {}
+    for m in mentions:
+        ids = by_type.setdefault(m.entity_type, [])
+        if m.entity_id not in ids:
+            ids.append(m.entity_id)
+
+    subject_slot = None
+    if tpl.graph_relation and tpl.graph_relation.subject.startswith("$"):
+        subject_slot = tpl.graph_relation.subject[1:]
+
+    entity_slots: Dict[str, List[str]] = {}
+    for name, slot in tpl.slots.items():
+        if name in _META_SLOTS:
+            continue
+        etype = slot_entity_type(slot) if slot.is_entity_ref else None
+        if etype is None:
+            if slot.required:
+                return None
+            continue
+        entity_slots[name] = by_type.get(etype, [])
+
+    if subject_slot not in entity_slots:
+        return None
+    fills: List[SlotFill] = []
+    for subject_id in entity_slots[subject_slot]:
+        slots: Dict[str, Any] = {subject_slot: subject_id}
+        for name, ids in entity_slots.items():
+            if name == subject_slot:
+                continue
+            others = [eid for eid in ids if eid != subject_id]
+            if others:
+                slots[name] = others[0]
+            elif tpl.slots[name].required:
+                return None
+        fills.append(
+            SlotFill(template_id=str(tpl.id), slots=slots, details="mention scan")
+        )
+    return fills
 
 
 @lru_cache(maxsize=1)
@@ -457,16 +1034,22 @@ def get_augment_pipeline() -> AugmentPipeline:
     from services.templates.service import get_template_service
     from services.template_renderer import get_template_renderer
     from services.graph_proxy import get_graph_proxy
-    from services.identity_service import get_identity_service_sync
+    from services.identity_service import get_identity_service
+    from services.augment_cache import get_augment_cache
+    from services.raptor_index import get_raptor_index
 
     llm = ChatOpenAI(api_key=app_settings.OPENAI_API_KEY, temperature=0.0)
     handler = provide_callback_handler_with_tags(tags=["SlotFiller"])
     filler = SlotFiller(llm=llm, callback_handler=handler)
+    identity_service = get_identity_service()
 
     return AugmentPipeline(
         template_service=get_template_service(),
         slot_filler=filler,
-        identity_service=get_identity_service_sync(),
+        identity_service=identity_service,
         template_renderer=get_template_renderer(),
         graph_proxy=get_graph_proxy(),
+        mention_scanner=identity_service.scan_mentions,
+        cache=get_augment_cache(),
+        raptor_index=get_raptor_index(),
     )
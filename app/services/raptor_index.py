@@ -1,9 +1,24 @@
-"""Minimal wrapper over Weaviate for storing ``RaptorNode`` objects."""
+"""Weaviate-backed indexes that cluster chunks into ``RaptorNode`` objects.
+
+:class:`FlatRaptorIndex` keeps a single level: a chunk merges into the nearest
+node or becomes a new one. :class:`RaptorTreeIndex` organises the same nodes
+into a RAPTOR-style tree (leaf clusters under parent clusters whose centroid
+is the mean of every chunk beneath them), so inserts and lookups descend
+``O(log N)`` levels instead of searching all leaves.
+
+Both read centroids from the object vector; what else a node stores is set by
+:class:`VectorLayout`.
+"""
 
 from __future__ import annotations
 
+import base64
+import threading
+from dataclasses import Field as DCField, dataclass
+from enum import Enum
 from functools import lru_cache
-from typing import Callable, List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from typing import dataclass_transform
 from uuid import uuid4
 
 import numpy as np
@@ -12,31 +27,127 @@ from weaviate.classes.config import Configure, Property, DataType
 from weaviate.classes import query as wv_query
 
 
-from config.embeddings import openai_embedder
+from config.embeddings import (
+    BatchEmbedderFn,
+    batch_embedder_for,
+    embedder_for,
+    openai_batch_embedder,
+    openai_embedder,
+)
 from utils.logger import get_logger
-from config.weaviate import connect_to_weaviate
+from config.weaviate import connect_to_weaviate, vector_index_config
 from config import app_settings
 
 EmbedderFn = Callable[[str], List[float]]
 logger = get_logger(__name__)
 
+_VECTOR_PROPS = ("text_vec", "fact_vec", "centroid")
+
+
+@dataclass_transform(field_specifiers=(DCField,))
+def my_dataclass(cls):
+    return dataclass(cls)
+
+
+class VectorLayout(str, Enum):
+    """How ``RaptorNode`` objects store their vectors.
+
+    * ``full`` – ``text_vec``, ``fact_vec`` and ``centroid`` as number arrays
+      next to the object vector (four copies of the embedding per node);
+    * ``float16`` – the centroid only as the object vector, ``text_vec`` and
+      ``fact_vec`` as float16 blobs (``*_f16``, 2 bytes per dimension);
+    * ``compact`` – the object vector only.
+    """
+
+    FULL = "full"
+    FLOAT16 = "float16"
+    COMPACT = "compact"
+
+
+def encode_f16(vec: Sequence[float]) -> str:
+    """Base64 of ``vec`` as little-endian float16 (Weaviate ``BLOB``)."""
+    return base64.b64encode(np.asarray(vec, dtype="<f2").tobytes()).decode("ascii")
+
+
+def decode_f16(blob: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(blob), dtype="<f2").astype(float).tolist()
+
+
+def _vector_of(obj: Any) -> Optional[List[float]]:
+    vec = getattr(obj, "vector", None)
+    if isinstance(vec, dict):
+        vec = vec.get("default")
+    return list(vec) if vec is not None else None
+
 
 class FlatRaptorIndex:
-    """Simplified index that clusters chunks after extraction."""
+    """Simplified index that clusters chunks after extraction.
+
+    A chunk merging into an existing node moves the node's ``centroid`` (the
+    object vector) as a running mean over its ``size`` members, so clusters
+    follow their content instead of staying at the first chunk's vector.
+
+    :meth:`insert_chunks` clusters a whole batch at once for bulk ingestion.
+    """
 
     CLASS_NAME = "RaptorNode"
+    # cosine distance up to which a chunk joins an existing node
+    merge_distance = 0.1
 
     def __init__(
         self,
         client: weaviate.Client,
         embedder: EmbedderFn | None = None,
         alpha: float = 0.5,
+        layout: VectorLayout | str = VectorLayout.COMPACT,
+        vector_index: str | None = None,
+        *,
+        batch_embedder: BatchEmbedderFn | None = None,
     ) -> None:
         self.client = client
         self.embedder = embedder or openai_embedder
+        if batch_embedder is None and embedder is None:
+            batch_embedder = openai_batch_embedder
+        # ``None``: a custom single-text embedder is called once per text
+        self.batch_embedder = batch_embedder
         self.alpha = alpha
+        self.layout = VectorLayout(layout)
+        # index spec for a newly created collection, see ``parse_index_spec``
+        self.vector_index = vector_index
+        # Merges read and rewrite a node; concurrent inserts must not interleave.
+        self._lock = threading.Lock()
         self._ensure_schema()
 
+    def _properties(self) -> List[Property]:
+        props = [Property(name="size", data_type=DataType.INT)]
+        if self.layout is VectorLayout.FULL:
+            props += [
+                Property(name=name, data_type=DataType.NUMBER_ARRAY)
+                for name in _VECTOR_PROPS
+            ]
+        elif self.layout is VectorLayout.FLOAT16:
+            props += [
+                Property(name="text_vec_f16", data_type=DataType.BLOB),
+                Property(name="fact_vec_f16", data_type=DataType.BLOB),
+            ]
+        return props
+
+    def _vector_props(
+        self, text_vec: List[float], fact_vec: List[float], centroid: List[float]
+    ) -> Dict[str, object]:
+        """Properties holding the chunk vectors under :attr:`layout`."""
+        if self.layout is VectorLayout.FULL:
+            return {"text_vec": text_vec, "fact_vec": fact_vec, "centroid": centroid}
+        if self.layout is VectorLayout.FLOAT16:
+            return {
+                "text_vec_f16": encode_f16(text_vec),
+                "fact_vec_f16": encode_f16(fact_vec),
+            }
+        return {}
+
+    def _centroid_props(self, centroid: List[float]) -> Dict[str, object]:
+        return {"centroid": centroid} if self.layout is VectorLayout.FULL else {}
+
     def _ensure_schema(self) -> None:
         """Create the ``RaptorNode`` class if it doesn't exist."""
         if self.client.collections.exists(self.CLASS_NAME):  # type: ignore[attr-defined]
@@ -44,50 +155,714 @@ class FlatRaptorIndex:
         self.client.collections.create(  # type: ignore[attr-defined]
             name=self.CLASS_NAME,
             vectorizer_config=Configure.Vectorizer.none(),
+            vector_index_config=vector_index_config(self.vector_index),
             inverted_index_config=Configure.inverted_index(),
-            properties=[
-                Property(name="text_vec", data_type=DataType.NUMBER_ARRAY),
-                Property(name="fact_vec", data_type=DataType.NUMBER_ARRAY),
-                Property(name="centroid", data_type=DataType.NUMBER_ARRAY),
-            ],
+            properties=self._properties(),
         )
 
-    def insert_chunk(self, text: str, triple_text: str) -> str:
-        """Insert a new ``RaptorNode`` for the given chunk text.
+    def _collection(self):  # noqa: ANN202 - weaviate collection handle
+        return self.client.collections.get(self.CLASS_NAME)  # type: ignore[attr-defined]
 
-        Both ``text`` and ``triple_text`` are embedded and blended with
-        ``alpha`` to produce a centroid vector. The node UUID is returned.
-        """
+    def embed_chunk(
+        self, text: str, triple_text: str
+    ) -> Tuple[List[float], List[float], List[float]]:
+        """Return ``(text_vec, fact_vec, centroid)`` blended with ``alpha``."""
         text_vec = self.embedder(text)
         fact_vec = self.embedder(triple_text)
         centroid = (
             np.array(text_vec) * self.alpha + np.array(fact_vec) * (1 - self.alpha)
         ).tolist()
+        return text_vec, fact_vec, centroid
+
+    def embed_chunks(
+        self, chunks: Sequence[Tuple[str, str]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Batch :meth:`embed_chunk`: ``(text_vecs, fact_vecs, centroids)`` rows.
+
+        Texts and triples go to :attr:`batch_embedder` in a single call.
+        """
+        texts = [text for text, _ in chunks] + [triples for _, triples in chunks]
+        if self.batch_embedder is not None:
+            vectors = self.batch_embedder(texts)
+        else:
+            vectors = [self.embedder(text) for text in texts]
+        mat = np.asarray(vectors, dtype=float)
+        n = len(chunks)
+        text_vecs, fact_vecs = mat[:n], mat[n:]
+        return (
+            text_vecs,
+            fact_vecs,
+            text_vecs * self.alpha + fact_vecs * (1 - self.alpha),
+        )
+
+    def insert_chunks(self, chunks: Sequence[Tuple[str, str]]) -> List[str]:
+        """Cluster ``(text, triple_text)`` pairs; return their node ids in order.
+
+        The batch is embedded by :meth:`embed_chunks` and assigned in one
+        pass like :meth:`insert_chunk` would: a chunk joins the closest node
+        within :attr:`merge_distance` or starts a new one. Distances to the
+        stored centroids and between the chunks come from two matrix
+        products; a node matched during the batch is compared by its centroid
+        before the batch (stored nodes) or by its first chunk (new nodes), and
+        only the written centroids are exact means. Merged nodes are updated
+        one by one, new nodes go through the batch API.
+        """
+        if not chunks:
+            return []
+        return self.insert_vector_batch(*self.embed_chunks(chunks))
+
+    def insert_vector_batch(
+        self, text_vecs: np.ndarray, fact_vecs: np.ndarray, centroids: np.ndarray
+    ) -> List[str]:
+        """Cluster a batch already embedded with :meth:`embed_chunks`."""
+        with self._lock:
+            return self._insert_batch(text_vecs, fact_vecs, centroids)
+
+    def _insert_batch(
+        self, text_vecs: np.ndarray, fact_vecs: np.ndarray, centroids: np.ndarray
+    ) -> List[str]:
+        coll = self._collection()
+        stored = [
+            (str(obj.uuid), vec, int(obj.properties.get("size") or 1))
+            for obj in coll.iterator(include_vector=True, return_properties=["size"])
+            if (vec := _vector_of(obj)) is not None
+        ]
+        unit = _unit_rows(centroids)
+        to_stored = (
+            unit @ _unit_rows(np.asarray([vec for _, vec, _ in stored])).T
+            if stored
+            else np.empty((len(unit), 0))
+        )
+        to_batch = unit @ unit.T
+        max_sim = 1.0 - self.merge_distance
+
+        # assignment: ``("stored", index)`` or ``("new", first chunk)``
+        targets: List[Tuple[str, int]] = []
+        leaders: List[int] = []
+        for i in range(len(unit)):
+            best: Tuple[str, int] | None = None
+            sim = -np.inf
+            if stored:
+                j = int(np.argmax(to_stored[i]))
+                best, sim = ("stored", j), to_stored[i, j]
+            if leaders:
+                j = leaders[int(np.argmax(to_batch[i, leaders]))]
+                if to_batch[i, j] > sim:
+                    best, sim = ("new", j), to_batch[i, j]
+            if best is None or sim < max_sim:
+                best = ("new", i)
+                leaders.append(i)
+            targets.append(best)
 
-        coll = self.client.collections.get(self.CLASS_NAME)  # type: ignore[attr-defined]
+        members: Dict[Tuple[str, int], List[int]] = {}
+        for i, target in enumerate(targets):
+            members.setdefault(target, []).append(i)
+
+        node_ids = {("new", i): str(uuid4()) for i in leaders}
+        for (kind, j), rows in members.items():
+            if kind != "stored":
+                continue
+            node_id, vec, size = stored[j]
+            node_ids[(kind, j)] = node_id
+            mean = _running_mean(vec, size, centroids[rows].mean(axis=0), len(rows))
+            coll.data.update(
+                uuid=node_id,
+                properties={"size": size + len(rows), **self._centroid_props(mean)},
+                vector=mean,
+            )
+
+        with coll.batch.fixed_size(batch_size=100) as batch:
+            for i in leaders:
+                rows = members[("new", i)]
+                mean = centroids[rows].mean(axis=0).tolist()
+                props = self._vector_props(
+                    text_vecs[i].tolist(), fact_vecs[i].tolist(), mean
+                )
+                batch.add_object(
+                    uuid=node_ids[("new", i)],
+                    properties={**props, "size": len(rows)},
+                    vector=mean,
+                )
+        failed = coll.batch.failed_objects
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} RaptorNode objects failed to insert: "
+                f"{failed[0].message}"
+            )
+        logger.debug(
+            "Clustered %d chunks: %d merged, %d new RaptorNodes",
+            len(targets),
+            len(targets) - len(leaders),
+            len(leaders),
+        )
+        return [node_ids[target] for target in targets]
+
+    def insert_chunk(self, text: str, triple_text: str) -> str:
+        """Insert a new ``RaptorNode`` for the given chunk text.
+
+        Both ``text`` and ``triple_text`` are embedded and blended with
+        ``alpha`` to produce a centroid vector. The node UUID is returned.
+        """
+        return self.insert_vectors(*self.embed_chunk(text, triple_text))
+
+    def insert_vectors(
+        self, text_vec: List[float], fact_vec: List[float], centroid: List[float]
+    ) -> str:
+        """Cluster a chunk already embedded with :meth:`embed_chunk`."""
+        with self._lock:
+            return self._insert(text_vec, fact_vec, centroid)
+
+    def _insert(
+        self, text_vec: List[float], fact_vec: List[float], centroid: List[float]
+    ) -> str:
+        coll = self._collection()
         res = coll.query.near_vector(
             near_vector=centroid,
             limit=1,
+            include_vector=True,
+            return_properties=["size"],
             return_metadata=wv_query.MetadataQuery(distance=True),
         )
-        if res.objects and res.objects[0].metadata.distance <= 0.1:
-            node_id = res.objects[0].uuid
+        if res.objects and res.objects[0].metadata.distance <= self.merge_distance:
+            obj = res.objects[0]
+            node_id = obj.uuid
+            mean, size = _merge(obj, centroid)
+            coll.data.update(
+                uuid=node_id,
+                properties={"size": size, **self._centroid_props(mean)},
+                vector=mean,
+            )
             logger.debug("Merged with existing RaptorNode %s", node_id)
             return node_id
 
         node_id = str(uuid4())
         coll.data.insert(
             uuid=node_id,
-            properties={
-                "text_vec": text_vec,
-                "fact_vec": fact_vec,
-                "centroid": centroid,
-            },
+            properties={**self._vector_props(text_vec, fact_vec, centroid), "size": 1},
             vector=centroid,
         )
         logger.debug("Inserted RaptorNode %s", node_id)
         return node_id
 
+    def nearest_leaves(
+        self, text: str, k: int = 5, beam: int = 2
+    ) -> List[Tuple[str, float]]:
+        """``(node_id, distance)`` of the ``k`` nodes closest to ``text``.
+
+        A flat index has no levels, so this is one ANN query; ``beam`` is
+        accepted for compatibility with :class:`RaptorTreeIndex`.
+        """
+        res = self._collection().query.near_vector(
+            near_vector=self.embedder(text),
+            limit=k,
+            return_properties=[],
+            return_metadata=wv_query.MetadataQuery(distance=True),
+        )
+        return [(str(obj.uuid), float(obj.metadata.distance)) for obj in res.objects]
+
+    def reset(self) -> None:
+        """Drop every node by recreating the collection.
+
+        Needed when the embedding size changes: the vector index keeps the
+        dimension of its first object.
+        """
+        with self._lock:
+            self.client.collections.delete(self.CLASS_NAME)  # type: ignore[attr-defined]
+            self._ensure_schema()
+
+    def rebuild(
+        self, clusters: Sequence[Tuple[List[float], int]]
+    ) -> Tuple[List[str], List[str]]:
+        """Replace every node by ``clusters`` of ``(centroid, size)``.
+
+        Used by offline re-clustering. Returns the new node ids (in the order
+        of ``clusters``) and the ids of the deleted nodes.
+        """
+        with self._lock:
+            coll = self._collection()
+            old = [str(obj.uuid) for obj in coll.iterator()]
+            for start in range(0, len(old), 100):
+                end = start + 100
+                coll.data.delete_many(
+                    where=wv_query.Filter.by_id().contains_any(old[start:end])
+                )
+            ids = [self._add_cluster(centroid, size) for centroid, size in clusters]
+        logger.info("Rebuilt RaptorNode index: %d -> %d nodes", len(old), len(ids))
+        return ids, old
+
+    def _add_cluster(self, centroid: List[float], size: int) -> str:
+        node_id = str(uuid4())
+        self._collection().data.insert(
+            uuid=node_id,
+            properties={"size": size, **self._centroid_props(centroid)},
+            vector=centroid,
+        )
+        return node_id
+
+    def compact_nodes_sync(self) -> int:
+        """Rewrite stored nodes to :attr:`layout`; return how many changed.
+
+        One-off maintenance for nodes written with the ``full`` layout: the
+        number-array copies are dropped (or turned into float16 blobs) and
+        the object vector is kept.
+        """
+        coll = self._collection()
+        rewritten = 0
+        for obj in coll.iterator(include_vector=True):
+            props = dict(obj.properties)
+            if self.layout is VectorLayout.FULL or not any(
+                props.get(name) is not None for name in _VECTOR_PROPS
+            ):
+                continue
+            arrays = {name: props.pop(name, None) for name in _VECTOR_PROPS}
+            if (
+                self.layout is VectorLayout.FLOAT16
+                and arrays["text_vec"] is not None
+                and arrays["fact_vec"] is not None
+            ):
+                props.update(
+                    self._vector_props(arrays["text_vec"], arrays["fact_vec"], [])
+                )
+            vector = _vector_of(obj) or arrays["centroid"]
+            coll.data.replace(uuid=obj.uuid, properties=props, vector=vector)
+            rewritten += 1
+        logger.info("Compacted %d RaptorNode objects to %s", rewritten, self.layout)
+        return rewritten
+
+
+# ``parent_id`` of the top-level nodes of :class:`RaptorTreeIndex`.
+ROOT_ID = "root"
+
+
+_TREE_PROPS = ("level", "parent_id", "size")
+
+
+@my_dataclass
+class RaptorTreeNode:
+    """``RaptorNode`` as seen by the tree: leaves are ``level == 0``."""
+
+    id: str
+    level: int
+    parent_id: str
+    size: int
+    centroid: List[float]
+
+
+def _tree_node(obj: Any) -> RaptorTreeNode:
+    props = obj.properties
+    return RaptorTreeNode(
+        id=str(obj.uuid),
+        level=int(props.get("level") or 0),
+        parent_id=str(props.get("parent_id") or ROOT_ID),
+        size=int(props.get("size") or 1),
+        centroid=_vector_of(obj) or [],
+    )
+
+
+def cosine_distances(
+    vectors: Sequence[Sequence[float]], vec: Sequence[float]
+) -> np.ndarray:
+    """Cosine distance (Weaviate's default metric) of each row to ``vec``."""
+    mat = np.asarray(vectors, dtype=float)
+    v = np.asarray(vec, dtype=float)
+    norms = np.linalg.norm(mat, axis=1) * np.linalg.norm(v)
+    sims = mat @ v / np.where(norms == 0, 1.0, norms)
+    return 1.0 - sims
+
+
+def _unit_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.where(norms == 0, 1.0, norms)
+
+
+class RaptorTreeIndex(FlatRaptorIndex):
+    """Multi-level RAPTOR tree stored in the ``RaptorNode`` collection.
+
+    Every node carries ``level`` (0 for leaves), ``parent_id`` (:data:`ROOT_ID`
+    for the top level), ``size`` (chunks beneath it) and its centroid (the
+    mean of those chunks' vectors) as the object vector.
+
+    An insert descends from the top level to the closest child at every
+    level, merges into the closest leaf within ``merge_distance`` or adds a
+    new leaf, and moves the centroids along the path as running means. A
+    node with more than ``max_children`` children is split in two around its
+    farthest pair of children; when the top level overflows a new root level
+    is added. Each step reads one node's children, so an insert costs about
+    ``max_children * log(N)`` vector comparisons. :meth:`insert_chunks`
+    routes a whole batch down the tree together, reading each visited
+    node's children once.
+
+    Nodes written by :class:`FlatRaptorIndex` have no ``level`` and are not
+    part of the tree.
+    """
+
+    def __init__(
+        self,
+        client: weaviate.Client,
+        embedder: EmbedderFn | None = None,
+        alpha: float = 0.5,
+        layout: VectorLayout | str = VectorLayout.COMPACT,
+        vector_index: str | None = None,
+        *,
+        max_children: int = 8,
+        merge_distance: float = 0.1,
+        batch_embedder: BatchEmbedderFn | None = None,
+    ) -> None:
+        if max_children < 2:
+            raise ValueError("max_children must be >= 2")
+        self.max_children = max_children
+        self.merge_distance = merge_distance
+        super().__init__(
+            client,
+            embedder,
+            alpha,
+            layout,
+            vector_index,
+            batch_embedder=batch_embedder,
+        )
+
+    def _properties(self) -> List[Property]:
+        return [
+            *super()._properties(),
+            Property(name="level", data_type=DataType.INT),
+            Property(name="parent_id", data_type=DataType.TEXT),
+        ]
+
+    def _ensure_schema(self) -> None:
+        """Create the collection or add the tree properties to a flat one."""
+        if not self.client.collections.exists(self.CLASS_NAME):  # type: ignore[attr-defined]
+            super()._ensure_schema()
+            return
+        coll = self._collection()
+        existing = {p.name for p in coll.config.get().properties}
+        for prop in self._properties():
+            if prop.name not in existing:
+                coll.config.add_property(prop)
+
+    def _children(self, parent_id: str, extra: int = 0) -> List[RaptorTreeNode]:
+        res = self._collection().query.fetch_objects(
+            filters=wv_query.Filter.by_property("parent_id").equal(parent_id),
+            # a node holds at most ``max_children`` children between splits;
+            # ``extra`` covers the siblings one split has just added
+            limit=self.max_children * 2 + 1 + extra,
+            include_vector=True,
+            return_properties=list(_TREE_PROPS),
+        )
+        return [_tree_node(obj) for obj in res.objects]
+
+    def _write(self, node: RaptorTreeNode, **extra: object) -> None:
+        props: Dict[str, object] = {
+            "level": node.level,
+            "parent_id": node.parent_id,
+            "size": node.size,
+            **self._centroid_props(node.centroid),
+            **extra,
+        }
+        self._collection().data.insert(
+            uuid=node.id, properties=props, vector=node.centroid
+        )
+
+    def _update(self, node: RaptorTreeNode, *fields: str) -> None:
+        props = {name: getattr(node, name) for name in fields if name != "centroid"}
+        vector = None
+        if "centroid" in fields:
+            vector = node.centroid
+            props.update(self._centroid_props(node.centroid))
+        self._collection().data.update(uuid=node.id, properties=props, vector=vector)
+
+    @staticmethod
+    def _nearest(
+        nodes: List[RaptorTreeNode], vec: Sequence[float]
+    ) -> Tuple[RaptorTreeNode, float]:
+        dists = cosine_distances([n.centroid for n in nodes], vec)
+        best = int(np.argmin(dists))
+        return nodes[best], float(dists[best])
+
+    def _insert(
+        self, text_vec: List[float], fact_vec: List[float], centroid: List[float]
+    ) -> str:
+        extra = self._vector_props(text_vec, fact_vec, centroid)
+        return self._place(centroid, 1, extra, merge=True)
+
+    def _place(
+        self,
+        centroid: List[float],
+        size: int,
+        extra: Dict[str, object],
+        *,
+        merge: bool,
+    ) -> str:
+        """Descend to the closest leaf; merge into it or add a new leaf.
+
+        ``size`` chunks with mean vector ``centroid`` are added along the
+        path, so a whole cluster can be placed at once (see :meth:`rebuild`).
+        """
+        path: List[RaptorTreeNode] = []
+        siblings = self._children(ROOT_ID)
+        node: RaptorTreeNode | None = None
+        dist = float("inf")
+        while siblings:
+            node, dist = self._nearest(siblings, centroid)
+            if node.level == 0:
+                break
+            path.append(node)
+            siblings = self._children(node.id)
+
+        for ancestor in path:
+            ancestor.centroid = _running_mean(
+                ancestor.centroid, ancestor.size, centroid, size
+            )
+            ancestor.size += size
+            self._update(ancestor, "centroid", "size")
+
+        if (
+            merge
+            and node is not None
+            and node.level == 0
+            and dist <= self.merge_distance
+        ):
+            node.centroid = _running_mean(node.centroid, node.size, centroid, size)
+            node.size += size
+            self._update(node, "centroid", "size")
+            logger.debug("Merged with existing RaptorNode %s", node.id)
+            return node.id
+
+        parent_id = path[-1].id if path else ROOT_ID
+        leaf = RaptorTreeNode(str(uuid4()), 0, parent_id, size, centroid)
+        self._write(leaf, **extra)
+        logger.debug("Inserted RaptorNode %s under %s", leaf.id, parent_id)
+        if len(siblings) + 1 > self.max_children:
+            self._split(path[-1] if path else None, [*siblings, leaf])
+        return leaf.id
+
+    def _add_cluster(self, centroid: List[float], size: int) -> str:
+        return self._place(centroid, size, {}, merge=False)
+
+    def _insert_batch(
+        self, text_vecs: np.ndarray, fact_vecs: np.ndarray, centroids: np.ndarray
+    ) -> List[str]:
+        """Place a batch with one matrix product per visited node.
+
+        The chunks descend together: each node's children are read once and
+        compared with every chunk routed to it. At the leaf level a chunk
+        merges into its closest leaf within ``merge_distance``; the rest under
+        one parent are grouped like :class:`FlatRaptorIndex` groups a batch
+        and become new leaves. Every node on the way moves by the mean of the
+        chunks beneath it, and overfull parents are split once the new leaves
+        are written, so chunks are compared with the tree as it was before
+        the batch.
+        """
+        unit = _unit_rows(centroids)
+        max_sim = 1.0 - self.merge_distance
+        targets = [""] * len(unit)
+        moved: Dict[str, Tuple[RaptorTreeNode, List[int]]] = {}
+        merged: Dict[str, Tuple[RaptorTreeNode, List[int]]] = {}
+        # parent id -> (parent, its children, rows that start new leaves)
+        fresh: Dict[
+            str, Tuple[RaptorTreeNode | None, List[RaptorTreeNode], List[int]]
+        ] = {}
+        stack: List[Tuple[RaptorTreeNode | None, List[int]]] = [
+            (None, list(range(len(unit))))
+        ]
+        while stack:
+            parent, rows = stack.pop()
+            parent_id = parent.id if parent else ROOT_ID
+            children = self._children(parent_id)
+            if not children:
+                fresh[parent_id] = (parent, [], rows)
+                continue
+            sims = unit[rows] @ _unit_rows(np.asarray([c.centroid for c in children])).T
+            best = np.argmax(sims, axis=1)
+            routed: Dict[str, Tuple[RaptorTreeNode, List[int]]] = {}
+            new_rows: List[int] = []
+            for pos, row in enumerate(rows):
+                child = children[int(best[pos])]
+                if child.level > 0:
+                    routed.setdefault(child.id, (child, []))[1].append(row)
+                elif sims[pos, best[pos]] >= max_sim:
+                    merged.setdefault(child.id, (child, []))[1].append(row)
+                else:
+                    new_rows.append(row)
+            moved.update(routed)
+            stack.extend(routed.values())
+            if new_rows:
+                fresh[parent_id] = (parent, children, new_rows)
+
+        for node, rows in [*moved.values(), *merged.values()]:
+            node.centroid = _running_mean(
+                node.centroid, node.size, centroids[rows].mean(axis=0), len(rows)
+            )
+            node.size += len(rows)
+            self._update(node, "centroid", "size")
+        for node, rows in merged.values():
+            for row in rows:
+                targets[row] = node.id
+
+        for parent_id, (parent, children, rows) in fresh.items():
+            leaves = []
+            for group in _leader_groups(unit, rows, max_sim):
+                first = group[0]
+                mean = centroids[group].mean(axis=0).tolist()
+                leaf = RaptorTreeNode(str(uuid4()), 0, parent_id, len(group), mean)
+                self._write(
+                    leaf,
+                    **self._vector_props(
+                        text_vecs[first].tolist(), fact_vecs[first].tolist(), mean
+                    ),
+                )
+                leaves.append(leaf)
+                for row in group:
+                    targets[row] = leaf.id
+            if len(children) + len(leaves) > self.max_children:
+                # re-read: an earlier split may have moved the parent
+                overfull = self._node(parent_id) if parent else None
+                self._split(overfull, [*children, *leaves])
+
+        logger.debug(
+            "Placed %d chunks: %d merged into leaves, %d new leaves",
+            len(targets),
+            sum(len(rows) for _, rows in merged.values()),
+            len(set(targets) - set(merged)),
+        )
+        return targets
+
+    def _split(
+        self, node: RaptorTreeNode | None, children: List[RaptorTreeNode]
+    ) -> None:
+        """Split overfull ``node`` (``None`` = the top level) in two siblings."""
+        if node is None:
+            # Grow the tree: the overfull top level goes under a new root,
+            # which is split right away into the two new top-level nodes.
+            level = max(c.level for c in children) + 1
+            node = RaptorTreeNode(str(uuid4()), level, ROOT_ID, *_summary(children))
+            self._write(node)
+            for child in children:
+                child.parent_id = node.id
+                self._update(child, "parent_id")
+
+        # a batch may overfill a node by more than one child
+        keep, *moves = _partition(children, self.max_children)
+        for move in moves:
+            sibling = RaptorTreeNode(
+                str(uuid4()), node.level, node.parent_id, *_summary(move)
+            )
+            self._write(sibling)
+            for child in move:
+                child.parent_id = sibling.id
+                self._update(child, "parent_id")
+        node.size, node.centroid = _summary(keep)
+        self._update(node, "size", "centroid")
+        logger.debug("Split RaptorNode %s (level %d)", node.id, node.level)
+
+        uncles = self._children(node.parent_id, extra=len(moves))
+        if len(uncles) > self.max_children:
+            grand = None
+            if node.parent_id != ROOT_ID:
+                grand = self._node(node.parent_id)
+            self._split(grand, uncles)
+
+    def _node(self, node_id: str) -> RaptorTreeNode:
+        obj = self._collection().query.fetch_object_by_id(
+            node_id, include_vector=True, return_properties=list(_TREE_PROPS)
+        )
+        return _tree_node(obj)
+
+    def nearest_leaves(
+        self, text: str, k: int = 5, beam: int = 2
+    ) -> List[Tuple[str, float]]:
+        """Coarse-to-fine search for the ``k`` leaves closest to ``text``.
+
+        Keeps the ``beam`` closest nodes per level while descending, so the
+        cost grows with the tree height rather than the number of leaves.
+        Returns ``(node_id, distance)`` pairs, closest first.
+        """
+        vec = self.embedder(text)
+        frontier = self._children(ROOT_ID)
+        leaves: List[Tuple[str, float]] = []
+        while frontier:
+            dists = cosine_distances([n.centroid for n in frontier], vec)
+            order = np.argsort(dists)
+            inner: List[RaptorTreeNode] = []
+            for i in order:
+                n = frontier[int(i)]
+                if n.level == 0:
+                    leaves.append((n.id, float(dists[i])))
+                elif len(inner) < beam:
+                    inner.append(n)
+            frontier = [c for n in inner for c in self._children(n.id)]
+        leaves.sort(key=lambda pair: pair[1])
+        return leaves[:k]
+
+
+def _running_mean(
+    mean: Sequence[float], size: int, vec: Sequence[float], weight: int = 1
+) -> List[float]:
+    """Mean of ``size`` vectors averaging ``mean`` plus ``weight`` at ``vec``."""
+    total = np.asarray(mean) * size + np.asarray(vec) * weight
+    return (total / (size + weight)).tolist()
+
+
+def _merge(obj: Any, vec: Sequence[float]) -> Tuple[List[float], int]:
+    """``(centroid, size)`` of a stored node after one more member at ``vec``.
+
+    Nodes written before ``size`` existed count as one member.
+    """
+    size = int(obj.properties.get("size") or 1)
+    centroid = _vector_of(obj) or list(vec)
+    return _running_mean(centroid, size, vec), size + 1
+
+
+def _summary(nodes: Sequence[RaptorTreeNode]) -> Tuple[int, List[float]]:
+    """``(size, centroid)`` of the union of ``nodes`` (size-weighted mean)."""
+    sizes = np.array([n.size for n in nodes], dtype=float)
+    mat = np.asarray([n.centroid for n in nodes], dtype=float)
+    return int(sizes.sum()), (sizes @ mat / sizes.sum()).tolist()
+
+
+def _bisect(
+    nodes: List[RaptorTreeNode],
+) -> Tuple[List[RaptorTreeNode], List[RaptorTreeNode]]:
+    """Split ``nodes`` around their farthest pair (seeds of a 2-means step)."""
+    mat = np.asarray([n.centroid for n in nodes], dtype=float)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    unit = mat / np.where(norms == 0, 1.0, norms)
+    dist = 1.0 - unit @ unit.T
+    a, b = np.unravel_index(int(np.argmax(dist)), dist.shape)
+    to_b = dist[:, b] < dist[:, a]
+    keep = [n for n, flag in zip(nodes, to_b) if not flag]
+    move = [n for n, flag in zip(nodes, to_b) if flag]
+    if not move:  # identical centroids: split in half
+        half = len(nodes) // 2
+        keep, move = nodes[:half], nodes[half:]
+    return keep, move
+
+
+def _partition(nodes: List[RaptorTreeNode], limit: int) -> List[List[RaptorTreeNode]]:
+    """Bisect ``nodes`` until every part holds at most ``limit`` of them."""
+    if len(nodes) <= limit:
+        return [nodes]
+    keep, move = _bisect(nodes)
+    return _partition(keep, limit) + _partition(move, limit)
+
+
+def _leader_groups(
+    unit: np.ndarray, rows: List[int], max_sim: float
+) -> List[List[int]]:
+    """Group ``rows`` greedily: a row joins the most similar earlier leader
+    within ``max_sim`` or leads a new group."""
+    sims = unit[rows] @ unit[rows].T
+    leaders: List[int] = []
+    groups: Dict[int, List[int]] = {}
+    for pos, row in enumerate(rows):
+        if leaders:
+            best = max(leaders, key=lambda lead: sims[pos, lead])
+            if sims[pos, best] >= max_sim:
+                groups[best].append(row)
+                continue
+        leaders.append(pos)
+        groups[pos] = [row]
+    return [groups[lead] for lead in leaders]
+
 
 @lru_cache()
 def get_raptor_index() -> FlatRaptorIndex:
@@ -96,4 +871,10 @@ def get_raptor_index() -> FlatRaptorIndex:
         url=app_settings.WEAVIATE_URL,
         api_key=app_settings.WEAVIATE_API_KEY,
     )
-    return FlatRaptorIndex(client=client, embedder=openai_embedder)
+    return RaptorTreeIndex(
+        client=client,
+        embedder=embedder_for(app_settings.EMBEDDING_DIMS_RAPTOR),
+        batch_embedder=batch_embedder_for(app_settings.EMBEDDING_DIMS_RAPTOR),
+        layout=app_settings.RAPTOR_VECTOR_LAYOUT,
+        vector_index=app_settings.WEAVIATE_INDEX_RAPTOR,
+    )
@@ -0,0 +1,338 @@
+"""Deferred Raptor clustering fed by a durable local outbox.
+
+Clustering a chunk takes two embedding calls plus a Weaviate query and write.
+Instead of running it inside ``/extract-save``, the pipeline appends the chunk
+to :class:`RaptorOutbox` (a SQLite file, so pending work survives restarts)
+and :class:`RaptorWorker` drains it in the background, a lease of
+``batch_size`` chunks at a time through the index's batch path (see
+:meth:`FlatRaptorIndex.insert_chunks`), writing ``Chunk.raptor_node_id`` once
+a chunk has been clustered.
+
+Delivery is at-least-once: an item is deleted only after the graph update, so
+a crash in between clusters the chunk again on restart. Several processes may
+share the file; an item claimed by one of them is leased for
+``lease_seconds`` before another may take it over. An item that fails
+``max_attempts`` times (or whose last lease ran out) is moved to the
+``raptor_outbox_dead`` table instead of being retried forever.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from services.graph_proxy import GraphProxy
+from services.raptor_index import FlatRaptorIndex, encode_f16
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS raptor_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chunk_id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    triple_text TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+)"""
+
+_DEAD_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS raptor_outbox_dead (
+    id INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    triple_text TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+)"""
+
+# ``run_unwind`` body. The blended vector (a float16 blob, see ``encode_f16``)
+# and the triples it was embedded with are kept for ``RaptorReclusterJob``;
+# the legacy float list is dropped.
+_RAPTOR_UPDATE_CYPHER = (
+    "MATCH (c:Chunk {id: row.cid}) "
+    "SET c.raptor_node_id = row.rid, c.raptor_vec_f16 = row.vec, "
+    "c.triple_text = row.triples REMOVE c.raptor_vec"
+)
+
+
+@dataclass
+class OutboxItem:
+    id: int
+    chunk_id: str
+    text: str
+    triple_text: str
+    attempts: int
+
+
+class RaptorOutbox:
+    """SQLite-backed queue of chunks waiting for Raptor clustering."""
+
+    def __init__(
+        self, path: str, lease_seconds: float = 300.0, max_attempts: int = 5
+    ) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_DEAD_SCHEMA)
+
+    def put(self, chunk_id: str, text: str, triple_text: str) -> None:
+        """Queue a chunk; re-queuing a pending chunk replaces its triples."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO raptor_outbox (chunk_id, text, triple_text, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(chunk_id) DO UPDATE SET "
+                "text = excluded.text, triple_text = excluded.triple_text",
+                (chunk_id, text, triple_text, time.time()),
+            )
+
+    def claim(self, limit: int) -> List[OutboxItem]:
+        """Lease up to ``limit`` oldest items that nobody else holds.
+
+        Expired items that already used every attempt (their worker died
+        mid-lease) are dead-lettered first.
+        """
+        now = time.time()
+        with self._lock:
+            buried = self._bury(
+                "claimed_until <= ? AND attempts >= ?",
+                (now, self.max_attempts),
+                "lease expired",
+            )
+            if buried:
+                logger.error("Dead-lettered %d expired Raptor outbox items", buried)
+            rows = self._conn.execute(
+                "UPDATE raptor_outbox SET claimed_until = ?, attempts = attempts + 1 "
+                "WHERE id IN (SELECT id FROM raptor_outbox WHERE claimed_until <= ? "
+                "ORDER BY id LIMIT ?) "
+                "RETURNING id, chunk_id, text, triple_text, attempts",
+                (now + self.lease_seconds, now, limit),
+            ).fetchall()
+        return sorted((OutboxItem(*row) for row in rows), key=lambda item: item.id)
+
+    def ack(self, *item_ids: int) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM raptor_outbox WHERE id = ?", [(i,) for i in item_ids]
+            )
+
+    def release(
+        self, item_id: int, delay: float = 0.0, error: Optional[str] = None
+    ) -> bool:
+        """Make a failed item claimable again after ``delay`` seconds.
+
+        Once the item has used ``max_attempts`` it is moved to
+        ``raptor_outbox_dead`` with ``error`` instead; returns ``True`` then.
+        """
+        with self._lock:
+            if self._bury(
+                "id = ? AND attempts >= ?", (item_id, self.max_attempts), error
+            ):
+                return True
+            self._conn.execute(
+                "UPDATE raptor_outbox SET claimed_until = ? WHERE id = ?",
+                (time.time() + delay, item_id),
+            )
+        return False
+
+    def _bury(self, where: str, params: Tuple[Any, ...], error: Optional[str]) -> int:
+        """Move matching items to the dead-letter table; caller holds the lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self._conn.execute(
+                "INSERT OR REPLACE INTO raptor_outbox_dead (id, chunk_id, text, "
+                "triple_text, attempts, error, created_at, failed_at) "
+                "SELECT id, chunk_id, text, triple_text, attempts, ?, created_at, ? "
+                f"FROM raptor_outbox WHERE {where}",
+                (error, time.time(), *params),
+            )
+            self._conn.execute(f"DELETE FROM raptor_outbox WHERE {where}", params)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return cur.rowcount
+
+    def dead_count(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count(*) FROM raptor_outbox_dead"
+            ).fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT count(*) FROM raptor_outbox").fetchone()
+        return int(row[0])
+
+
+class RaptorWorker:
+    """Background task that clusters queued chunks and updates the graph."""
+
+    def __init__(
+        self,
+        outbox: RaptorOutbox,
+        raptor_index: FlatRaptorIndex,
+        graph_proxy: GraphProxy,
+        *,
+        batch_size: int = 16,
+        poll_interval: float = 5.0,
+        retry_delay: float = 30.0,
+    ) -> None:
+        self.outbox = outbox
+        self.raptor_index = raptor_index
+        self.graph_proxy = graph_proxy
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def enqueue(self, chunk_id: str, text: str, triple_text: str) -> None:
+        """Persist the chunk in the outbox and wake the worker."""
+        await asyncio.to_thread(self.outbox.put, chunk_id, text, triple_text)
+        self._wake.set()
+
+    async def process_batch(self) -> int:
+        """Cluster one batch of claimed items; return how many succeeded.
+
+        The whole lease is embedded in one call, placed through the index's
+        batch path and written back with one ``UNWIND``. If that fails the
+        items are retried one by one, so a bad chunk only holds back itself.
+        """
+        items = await asyncio.to_thread(self.outbox.claim, self.batch_size)
+        if not items:
+            return 0
+        try:
+            await self._process(items)
+            return len(items)
+        except Exception as exc:
+            if len(items) == 1:
+                await self._fail(items[0], exc)
+                return 0
+            logger.warning(
+                "Raptor batch of %d chunks failed, retrying one by one: %s",
+                len(items),
+                exc,
+            )
+        done = 0
+        for item in items:
+            try:
+                await self._process([item])
+            except Exception as exc:
+                await self._fail(item, exc)
+                continue
+            done += 1
+        return done
+
+    async def _process(self, items: List[OutboxItem]) -> None:
+        index = self.raptor_index
+        text_vecs, fact_vecs, centroids = await asyncio.to_thread(
+            index.embed_chunks, [(item.text, item.triple_text) for item in items]
+        )
+        node_ids = await asyncio.to_thread(
+            index.insert_vector_batch, text_vecs, fact_vecs, centroids
+        )
+        await self.graph_proxy.run_unwind(
+            _RAPTOR_UPDATE_CYPHER,
+            [
+                {
+                    "cid": item.chunk_id,
+                    "rid": str(rid),
+                    "vec": encode_f16(centroid),
+                    "triples": item.triple_text,
+                }
+                for item, rid, centroid in zip(items, node_ids, centroids)
+            ],
+        )
+        await asyncio.to_thread(self.outbox.ack, *(item.id for item in items))
+
+    async def _fail(self, item: OutboxItem, exc: Exception) -> None:
+        logger.warning(
+            "Raptor clustering of %s failed (attempt %d): %s",
+            item.chunk_id,
+            item.attempts,
+            exc,
+        )
+        dead = await asyncio.to_thread(
+            self.outbox.release, item.id, self.retry_delay, str(exc)
+        )
+        if dead:
+            logger.error(
+                "Raptor clustering of %s gave up after %d attempts",
+                item.chunk_id,
+                item.attempts,
+            )
+
+    async def drain(self) -> int:
+        """Process batches until nothing claimable is left."""
+        total = 0
+        while True:
+            done = await self.process_batch()
+            total += done
+            if not done:
+                return total
+
+    async def _run(self) -> None:
+        while True:
+            # cleared before draining so an enqueue during the drain is not lost
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception:  # pragma: no cover - keep the loop alive
+                logger.exception("Raptor worker iteration failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+@lru_cache(maxsize=1)
+def get_raptor_worker() -> Optional[RaptorWorker]:
+    """Shared worker; ``None`` when ``RAPTOR_OUTBOX_PATH`` is empty."""  # pragma: no cover
+    from config import app_settings
+    from services.graph_proxy import get_graph_proxy
+    from services.raptor_index import get_raptor_index
+
+    if not app_settings.RAPTOR_OUTBOX_PATH:
+        return None
+    return RaptorWorker(
+        RaptorOutbox(
+            app_settings.RAPTOR_OUTBOX_PATH,
+            max_attempts=app_settings.RAPTOR_OUTBOX_MAX_ATTEMPTS,
+        ),
+        get_raptor_index(),
+        get_graph_proxy(),
+    )
@@ -0,0 +1,234 @@
+"""Offline re-clustering of chunks into ``RaptorNode`` objects.
+
+Incremental inserts place each chunk greedily, so cluster boundaries depend
+on arrival order. :class:`RaptorReclusterJob` periodically recomputes them
+from scratch: it reads every chunk vector (``Chunk.raptor_vec_f16``, a
+float16 blob written by ``/extract-save``), runs :func:`minibatch_kmeans`,
+replaces the index nodes through :meth:`FlatRaptorIndex.rebuild` and
+reassigns ``Chunk.raptor_node_id`` in bulk.
+
+Chunks stored without a vector are embedded once, like inserts do: text and
+``Chunk.triple_text`` blended by :meth:`FlatRaptorIndex.embed_chunks` in one
+batch call (chunks saved before ``triple_text`` was kept are embedded with no
+triples). The vector is kept for the next run; chunks still carrying the
+older float list ``raptor_vec`` are rewritten as blobs. With ``reembed=True``
+every chunk is embedded again and the ``RaptorNode`` collection is recreated,
+which moves the index to a new embedding size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.graph_proxy import GraphProxy
+from services.raptor_index import FlatRaptorIndex, decode_f16, encode_f16
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_CHUNK_VECTORS_CYPHER = (
+    "MATCH (c:Chunk) "
+    "RETURN c.id AS id, CASE WHEN NOT $reembed THEN c.raptor_vec_f16 END AS blob, "
+    "CASE WHEN NOT $reembed THEN c.raptor_vec END AS vec, "
+    "CASE WHEN (c.raptor_vec_f16 IS NULL AND c.raptor_vec IS NULL) OR $reembed "
+    "THEN c.text END AS text, coalesce(c.triple_text, '') AS triple_text"
+)
+
+# ``run_unwind`` body; ``row.vec`` (a blob) is only set for backfilled and
+# legacy chunks.
+_ASSIGN_CYPHER = (
+    "MATCH (c:Chunk {id: row.id}) "
+    "SET c.raptor_node_id = row.rid, "
+    "c.raptor_vec_f16 = coalesce(row.vec, c.raptor_vec_f16) "
+    "REMOVE c.raptor_vec"
+)
+
+# Chunks inserted while the job ran still point at deleted nodes.
+_STRAGGLERS_CYPHER = (
+    "MATCH (c:Chunk) WHERE c.raptor_node_id IN $deleted AND NOT c.id IN $ids "
+    "AND (c.raptor_vec_f16 IS NOT NULL OR c.raptor_vec IS NOT NULL) "
+    "RETURN c.id AS id, c.raptor_vec_f16 AS blob, c.raptor_vec AS vec"
+)
+
+
+def _stored_vector(row: Dict[str, Any]) -> Optional[List[float]]:
+    """Chunk vector from a float16 blob or the legacy float list."""
+    if row.get("blob"):
+        return decode_f16(row["blob"])
+    return row.get("vec")
+
+
+def _normalise(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.where(norms == 0, 1.0, norms)
+
+
+def minibatch_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    *,
+    batch_size: int = 256,
+    max_iter: int = 100,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical mini-batch k-means (cosine similarity, Sculley 2010).
+
+    Each iteration assigns a random batch with one matrix product and moves
+    every hit centre towards its batch mean with a per-centre learning rate
+    of ``hits / total_hits``. Returns the unit-length centres and the final
+    label of every row.
+    """
+    data = _normalise(np.asarray(vectors, dtype=np.float32))
+    n = len(data)
+    if n == 0:
+        return np.empty((0, 0)), np.empty(0, dtype=int)
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    centres = data[rng.choice(n, size=k, replace=False)].copy()
+    counts = np.zeros(k)
+
+    for _ in range(max_iter):
+        batch = data[rng.choice(n, size=min(batch_size, n), replace=False)]
+        labels = np.argmax(batch @ centres.T, axis=1)
+        hits = np.bincount(labels, minlength=k).astype(float)
+        sums = np.zeros_like(centres)
+        np.add.at(sums, labels, batch)
+        counts += hits
+        hit = hits > 0
+        rate = (hits[hit] / counts[hit])[:, None]
+        means = sums[hit] / hits[hit][:, None]
+        centres[hit] = _normalise((1 - rate) * centres[hit] + rate * means)
+
+    blocks = np.array_split(data, math.ceil(n / 4096))
+    labels = np.concatenate([np.argmax(block @ centres.T, axis=1) for block in blocks])
+    return centres, labels
+
+
+class RaptorReclusterJob:
+    """Recompute Raptor clusters over all chunk vectors."""
+
+    def __init__(
+        self,
+        graph_proxy: GraphProxy,
+        raptor_index: FlatRaptorIndex,
+        *,
+        cluster_size: int = 10,
+        batch_size: int = 256,
+        max_iter: int = 100,
+    ) -> None:
+        self.graph_proxy = graph_proxy
+        self.raptor_index = raptor_index
+        self.cluster_size = cluster_size
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+
+    async def run(self, *, reembed: bool = False) -> Dict[str, int]:
+        """Re-cluster and return ``{"chunks", "clusters", "backfilled", "stragglers"}``.
+
+        ``reembed`` re-embeds every chunk with its triples (counted as backfilled) and
+        recreates the index collection before rebuilding it.
+        """
+        rows = await self.graph_proxy.run_query(
+            _CHUNK_VECTORS_CYPHER, {"reembed": reembed}, write=False
+        )
+        ids: List[str] = []
+        vectors: List[List[float]] = []
+        missing: List[Dict[str, Any]] = []
+        rewrite: Dict[str, str] = {}
+        for row in rows:
+            vec = _stored_vector(row)
+            if vec is None:
+                if row.get("text"):
+                    missing.append(row)
+                continue
+            if not row.get("blob"):
+                rewrite[row["id"]] = encode_f16(vec)
+            ids.append(row["id"])
+            vectors.append(vec)
+        backfilled = len(missing)
+        if missing:
+            _, _, centroids = await asyncio.to_thread(
+                self.raptor_index.embed_chunks,
+                [(row["text"], row.get("triple_text") or "") for row in missing],
+            )
+            for row, centroid in zip(missing, centroids):
+                vec = centroid.tolist()
+                rewrite[row["id"]] = encode_f16(vec)
+                ids.append(row["id"])
+                vectors.append(vec)
+        if not ids:
+            return {"chunks": 0, "clusters": 0, "backfilled": 0, "stragglers": 0}
+
+        clusters, labels = await asyncio.to_thread(self._cluster, vectors)
+        if reembed:
+            await asyncio.to_thread(self.raptor_index.reset)
+        node_ids, deleted = await asyncio.to_thread(self.raptor_index.rebuild, clusters)
+        await self.graph_proxy.run_unwind(
+            _ASSIGN_CYPHER,
+            [
+                {"id": cid, "rid": node_ids[label], "vec": rewrite.get(cid)}
+                for cid, label in zip(ids, labels)
+            ],
+        )
+        stragglers = await self._reinsert_stragglers(ids, deleted)
+        logger.info(
+            "Raptor re-clustering: %d chunks -> %d clusters (%d backfilled, "
+            "%d re-inserted)",
+            len(ids),
+            len(clusters),
+            backfilled,
+            stragglers,
+        )
+        return {
+            "chunks": len(ids),
+            "clusters": len(clusters),
+            "backfilled": backfilled,
+            "stragglers": stragglers,
+        }
+
+    def _cluster(
+        self, vectors: List[List[float]]
+    ) -> Tuple[List[Tuple[List[float], int]], List[int]]:
+        """``(centroid, size)`` per non-empty cluster and each chunk's cluster."""
+        mat = np.asarray(vectors, dtype=float)
+        k = math.ceil(len(mat) / self.cluster_size)
+        _, labels = minibatch_kmeans(
+            mat, k, batch_size=self.batch_size, max_iter=self.max_iter
+        )
+        used, dense = np.unique(labels, return_inverse=True)
+        sizes = np.bincount(dense)
+        sums = np.zeros((len(used), mat.shape[1]))
+        np.add.at(sums, dense, mat)
+        # Stored centroids are plain means, like the running means of inserts.
+        means = sums / sizes[:, None]
+        clusters = [(m.tolist(), int(n)) for m, n in zip(means, sizes)]
+        return clusters, dense.tolist()
+
+    async def _reinsert_stragglers(self, ids: List[str], deleted: List[str]) -> int:
+        if not deleted:
+            return 0
+        rows: List[Dict[str, Any]] = await self.graph_proxy.run_query(
+            _STRAGGLERS_CYPHER, {"deleted": deleted, "ids": ids}, write=False
+        )
+        updates = []
+        for row in rows:
+            # only the blended vector is stored; it stands in for both parts
+            vec = _stored_vector(row)
+            rid = await asyncio.to_thread(
+                self.raptor_index.insert_vectors, vec, vec, vec
+            )
+            blob = None if row.get("blob") else encode_f16(vec)
+            updates.append({"id": row["id"], "rid": str(rid), "vec": blob})
+        await self.graph_proxy.run_unwind(_ASSIGN_CYPHER, updates)
+        return len(updates)
+
+
+def get_recluster_job() -> RaptorReclusterJob:  # pragma: no cover - wiring
+    from services.graph_proxy import get_graph_proxy
+    from services.raptor_index import get_raptor_index
+
+    return RaptorReclusterJob(get_graph_proxy(), get_raptor_index())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from functools import lru_cache
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 from jinja2 import Environment
 from pydantic import BaseModel
 
@@ -14,6 +14,8 @@ class RenderPlan(BaseModel):
     return_keys: Dict[str, str]
     triple_text: str
     related_node_ids: list[str]
+    # label of each related node (``None`` when unknown), same order
+    related_node_labels: list[Optional[str]] = []
     details: str
 
 
@@ -75,7 +77,7 @@ class TemplateRenderer:
         cypher_query = template.render(context, chunk_id, mode=mode)
 
         triple_text = ""
-        related_node_ids: list[str] = []
+        related_nodes = template.related_nodes(context)
         if template.graph_relation:
 
             def pick(expr: str | None) -> str | None:
@@ -88,7 +90,6 @@ class TemplateRenderer:
             triple_text = (
                 f"{subject} {template.graph_relation.predicate} " f"{obj}"
             )  # noqa: E501
-            related_node_ids = [v for v in [subject, obj] if v is not None]
 
         # template.return_map должно быть заранее определено
         # (например, в YAML-описании)
@@ -100,10 +101,15 @@ class TemplateRenderer:
             content_cypher=cypher_query,
             return_keys=template.return_map,
             triple_text=triple_text,
-            related_node_ids=related_node_ids,
+            related_node_ids=[node_id for node_id, _ in related_nodes],
+            related_node_labels=[label for _, label in related_nodes],
             details=slot_fill.details,
         )
 
+    def render_named(self, name: str, context: Dict[str, Any]) -> str:
+        """Render a standalone Cypher file (e.g. ``entity_neighbourhood.j2``)."""
+        return self.jinja_env.get_template(name).render(**context)
+
 
 @lru_cache()
 def get_template_renderer(jinja_env: Environment | None = None) -> TemplateRenderer:
@@ -23,6 +23,8 @@ from weaviate.classes.query import Filter
 from weaviate.collections.classes.internal import ObjectSingleReturn
 from weaviate.classes.query import MetadataQuery
 
+from config.weaviate import reload_collection, vector_index_config
+
 from schemas.cypher import (
     CypherTemplate,
     CypherTemplateBase,
@@ -40,6 +42,7 @@ class TemplateService:
         weaviate_client: Optional[weaviate.Client] = None,
         embedder: Optional[EmbedderFn] = None,
         class_name: str = "CypherTemplate",
+        vector_index: Optional[str] = None,
     ) -> None:
         """Create the service.
 
@@ -50,11 +53,16 @@ class TemplateService:
         embedder
             Optional callable that takes raw text and returns an embedding
             vector. If *None* the service falls back to ``nearText`` search.
+        vector_index
+            Index spec for a newly created collection (see
+            :func:`config.weaviate.parse_index_spec`); *None* keeps the
+            server defaults.
         """
 
         self.client: weaviate.Client | None = weaviate_client
         self.CLASS_NAME = class_name
         self.embedder = embedder
+        self.vector_index = vector_index
         self._ensure_schema()
         self.ensure_base_templates()
 
@@ -132,6 +140,35 @@ class TemplateService:
         """Async wrapper around :meth:`get_by_name`."""
         return await asyncio.to_thread(self.get_by_name, name)
 
+    def list_all(self) -> List[CypherTemplate]:
+        """Return every stored template."""
+        assert self.client is not None
+        coll = self.client.collections.get(self.CLASS_NAME)  # type: ignore[attr-defined]
+        return [self._from_weaviate(obj) for obj in coll.iterator()]
+
+    def reindex_sync(self) -> int:
+        """Re-embed every stored template with the current embedder.
+
+        Used after changing the embedding size: vectors are computed first,
+        then the collection is recreated with them. Returns the count.
+        """
+        assert self.client is not None and self.embedder is not None
+        coll = self.client.collections.get(self.CLASS_NAME)  # type: ignore[attr-defined]
+        rows = []
+        for obj in coll.iterator():
+            tpl = self._from_weaviate(obj)
+            vector = self.embedder(tpl.representation or tpl.description)
+            rows.append((obj.uuid, dict(obj.properties), vector))
+        count = reload_collection(
+            self.client, self.CLASS_NAME, self._ensure_schema, rows
+        )
+        logger.info("Re-embedded %d templates", count)
+        return count
+
+    async def list_all_async(self) -> List[CypherTemplate]:
+        """Async wrapper around :meth:`list_all`."""
+        return await asyncio.to_thread(self.list_all)
+
     def top_k(
         self,
         query: str,
@@ -242,6 +279,7 @@ class TemplateService:
             name=self.CLASS_NAME,
             description="Template that maps narrative text to Cypher code.",
             vectorizer_config=Configure.Vectorizer.none(),
+            vector_index_config=vector_index_config(self.vector_index),
             inverted_index_config=Configure.inverted_index(index_property_length=True),
             properties=[
                 Property(name="name", data_type=DataType.TEXT),
@@ -339,11 +377,11 @@ def get_template_service_sync(
     wclient: Optional[weaviate.Client] = None,
 ) -> "TemplateService":
     """Return a cached TemplateService configured for production."""
-    from config.embeddings import openai_embedder
+    from config.embeddings import embedder_for
     from config.weaviate import connect_to_weaviate
     from config import app_settings
 
-    resolved_embedder = embedder or openai_embedder
+    resolved_embedder = embedder or embedder_for(app_settings.EMBEDDING_DIMS_TEMPLATES)
 
     if not wclient:
         wclient = connect_to_weaviate(
@@ -351,4 +389,8 @@ def get_template_service_sync(
             api_key=app_settings.WEAVIATE_API_KEY,
         )
 
-    return TemplateService(weaviate_client=wclient, embedder=resolved_embedder)
+    return TemplateService(
+        weaviate_client=wclient,
+        embedder=resolved_embedder,
+        vector_index=app_settings.WEAVIATE_INDEX_TEMPLATES,
+    )
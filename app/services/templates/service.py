@@ -3,7 +3,7 @@ from functools import lru_cache
 from services.templates import TemplateService, get_template_service_sync
 from config import app_settings
 from config.weaviate import connect_to_weaviate
-from config.embeddings import openai_embedder
+from config.embeddings import embedder_for
 
 
 @lru_cache()
@@ -20,5 +20,5 @@ def get_template_service() -> TemplateService:
     """Return a configured TemplateService instance."""
     return get_template_service_sync(
         wclient=get_weaviate_client(),
-        embedder=openai_embedder,
+        embedder=embedder_for(app_settings.EMBEDDING_DIMS_TEMPLATES),
     )
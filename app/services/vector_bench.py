@@ -0,0 +1,135 @@
+"""Recall and latency of Weaviate vector index configurations.
+
+:func:`run_benchmark` loads a synthetic corpus (points scattered around random
+cluster centres on the unit sphere, like embeddings of related passages) into
+a scratch collection per index spec, runs ``near_vector`` for held-out
+queries and compares the hits with the exact cosine top-k.
+
+PQ and SQ only compress once ``training_limit`` objects are stored (100 000
+by default), so specs for small corpora should lower it.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import Field as DCField, dataclass
+from typing import Any, List, Sequence, dataclass_transform
+
+import numpy as np
+from weaviate.classes.config import Configure, DataType, Property
+
+from config.weaviate import vector_index_config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass_transform(field_specifiers=(DCField,))
+def my_dataclass(cls):
+    return dataclass(cls)
+
+
+DEFAULT_SPECS = (
+    "flat",
+    "flat,quantizer=bq",
+    "hnsw",
+    "hnsw,ef=64,max_connections=16",
+    "hnsw,ef=128,max_connections=32",
+    "hnsw,ef=128,max_connections=32,quantizer=pq,training_limit=2000",
+    "hnsw,ef=64,max_connections=16,quantizer=bq",
+)
+
+
+@my_dataclass
+class BenchResult:
+    spec: str
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    load_s: float
+
+
+def synthetic_corpus(
+    n: int, dim: int, *, clusters: int = 32, spread: float = 0.35, seed: int = 0
+) -> np.ndarray:
+    """``n`` unit vectors grouped around ``clusters`` random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim))
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    noise = rng.standard_normal((n, dim)) * spread / np.sqrt(dim)
+    data = centres[rng.integers(0, clusters, size=n)] + noise
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Row indices of the ``k`` nearest corpus vectors per query (cosine)."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(found: Sequence[Sequence[int]], truth: np.ndarray) -> float:
+    """Mean share of the exact neighbours present in ``found``."""
+    if not len(truth):
+        return 0.0
+    hits = [len(set(f) & set(t.tolist())) / len(t) for f, t in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def run_benchmark(
+    client: Any,
+    specs: Sequence[str] = DEFAULT_SPECS,
+    *,
+    n: int = 5000,
+    dim: int = 256,
+    queries: int = 100,
+    k: int = 10,
+    seed: int = 0,
+    prefix: str = "VectorBench",
+) -> List[BenchResult]:
+    """Measure every spec in ``specs``; scratch collections are deleted after."""
+    data = synthetic_corpus(n + queries, dim, seed=seed)
+    corpus, probes = data[:n], data[n:]
+    truth = exact_top_k(corpus, probes, k)
+
+    results: List[BenchResult] = []
+    for i, spec in enumerate(specs):
+        name = f"{prefix}{i}"
+        if client.collections.exists(name):
+            client.collections.delete(name)
+        coll = client.collections.create(
+            name=name,
+            vectorizer_config=Configure.Vectorizer.none(),
+            vector_index_config=vector_index_config(spec),
+            properties=[Property(name="idx", data_type=DataType.INT)],
+        )
+        try:
+            started = time.perf_counter()
+            with coll.batch.fixed_size(batch_size=500) as batch:
+                for idx, vec in enumerate(corpus):
+                    batch.add_object(properties={"idx": idx}, vector=vec.tolist())
+            load_s = time.perf_counter() - started
+
+            found: List[List[int]] = []
+            latencies: List[float] = []
+            for probe in probes:
+                started = time.perf_counter()
+                res = coll.query.near_vector(
+                    near_vector=probe.tolist(), limit=k, return_properties=["idx"]
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                found.append([int(o.properties["idx"]) for o in res.objects])
+        finally:
+            client.collections.delete(name)
+
+        result = BenchResult(
+            spec=spec,
+            recall=recall_at_k(found, truth),
+            p50_ms=float(np.percentile(latencies, 50)),
+            p95_ms=float(np.percentile(latencies, 95)),
+            load_s=load_s,
+        )
+        logger.info("Vector bench %s: %s", spec, result)
+        results.append(result)
+    return results
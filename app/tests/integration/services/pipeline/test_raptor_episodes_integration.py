@@ -0,0 +1,65 @@
+"""``raptor_episodes.j2`` against the local Neo4j container.
+
+Seeds two chunks in different Raptor clusters that state the same fact and
+checks that the fact is part of both episodes, not only of the chunk that
+stated it last.
+"""
+
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from jinja2 import FileSystemLoader
+
+pytestmark = pytest.mark.integration
+
+from services.graph_proxy import GraphProxy
+from services.template_renderer import TemplateRenderer
+from templates import env
+
+# ``templates.env`` resolves paths from ``app/``; tests run from the repo root
+CYPHER_DIR = Path(__file__).resolve().parents[4] / "templates" / "cypher"
+
+_SEED = """\
+CREATE (c1:Chunk {id: $c1, chapter: 1, raptor_node_id: $rn_a, text: "first"})
+CREATE (c2:Chunk {id: $c2, chapter: 2, raptor_node_id: $rn_b, text: "again"})
+CREATE (a:Character {id: $a}), (f:Faction {id: $f})
+CREATE (c1)-[:MENTIONS]->(a), (c1)-[:MENTIONS]->(f)
+CREATE (c2)-[:MENTIONS]->(a), (c2)-[:MENTIONS]->(f)
+CREATE (a)-[:MEMBER_OF {chunk_ids: [$c1, $c2], chunk_id: $c2, chapter: 1,
+                        draft_stage: 1}]->(f)"""
+
+
+@pytest.mark.asyncio
+async def test_fact_stated_by_two_chunks_is_in_both_episodes(graph_proxy: GraphProxy):
+    suffix = uuid4().hex[:8]
+    ids = {
+        "c1": f"ep1_{suffix}",
+        "c2": f"ep2_{suffix}",
+        "rn_a": f"rna_{suffix}",
+        "rn_b": f"rnb_{suffix}",
+        "a": f"character-{suffix}",
+        "f": f"faction-{suffix}",
+    }
+    await graph_proxy.run_query(_SEED, ids)
+    renderer = TemplateRenderer(env.overlay(loader=FileSystemLoader(CYPHER_DIR)))
+    try:
+        for rid in (ids["rn_a"], ids["rn_b"]):
+            cypher = renderer.render_named(
+                "raptor_episodes.j2",
+                {
+                    "raptor_ids": [rid],
+                    "chapter": 5,
+                    "per_cluster_limit": 5,
+                    "include_history": False,
+                    "facts": True,
+                },
+            )
+            rows = await graph_proxy.run_query(cypher, write=False)
+            assert [(r["relation"], r["source"], r["target"]) for r in rows] == [
+                ("MEMBER_OF", ids["a"], ids["f"])
+            ]
+    finally:
+        await graph_proxy.run_query(
+            "MATCH (n) WHERE n.id IN $ids DETACH DELETE n", {"ids": list(ids.values())}
+        )
@@ -0,0 +1,66 @@
+"""Draft supersession against the local Neo4j container (needs APOC).
+
+Two passages of one chapter are at different draft stages. A newer draft of
+one of them must archive only the facts of that passage's older draft.
+"""
+
+from uuid import uuid4
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+from services.graph_proxy import GraphProxy
+from services.pipeline import _SUPERSEDE_CYPHER
+
+_SEED = """\
+CREATE (a1:Chunk {id: $a1, chapter: 3, draft_stage: 1, lineage_id: $la})
+CREATE (b1:Chunk {id: $b1, chapter: 3, draft_stage: 1, lineage_id: $lb})
+CREATE (b2:Chunk {id: $b2, chapter: 3, draft_stage: 2, lineage_id: $lb})
+CREATE (c:Character {id: $c}), (f:Faction {id: $f}), (t:Trait {id: $t}),
+       (p:Place {id: $p})
+CREATE (a1)-[:MENTIONS]->(c), (a1)-[:MENTIONS]->(f), (a1)-[:MENTIONS]->(p)
+CREATE (b1)-[:MENTIONS]->(c), (b1)-[:MENTIONS]->(t), (b1)-[:MENTIONS]->(p)
+CREATE (c)-[:MEMBER_OF {chunk_ids: [$a1], chunk_id: $a1, chapter: 3,
+                        draft_stage: 1}]->(f)
+CREATE (c)-[:HAS_TRAIT {chunk_ids: [$b1], chunk_id: $b1, chapter: 3,
+                        draft_stage: 1}]->(t)
+CREATE (c)-[:AT_LOCATION {chunk_ids: [$a1, $b1], chunk_id: $b1, chapter: 3,
+                          draft_stage: 1}]->(p)"""
+
+_TYPES = "MATCH (c:Character {id: $c})-[r]->() RETURN type(r) AS type ORDER BY type"
+
+
+@pytest.mark.asyncio
+async def test_newer_draft_archives_only_its_own_passage(graph_proxy: GraphProxy):
+    suffix = uuid4().hex[:8]
+    ids = {
+        "a1": f"a1_{suffix}",
+        "b1": f"b1_{suffix}",
+        "b2": f"b2_{suffix}",
+        "c": f"character-{suffix}",
+        "f": f"faction-{suffix}",
+        "t": f"trait-{suffix}",
+        "p": f"place-{suffix}",
+    }
+    await graph_proxy.run_query(
+        _SEED, {**ids, "la": f"la_{suffix}", "lb": f"lb_{suffix}"}
+    )
+    try:
+        [result] = await graph_proxy.run_query(
+            _SUPERSEDE_CYPHER,
+            {"chunk_id": ids["b2"], "lineage_id": f"lb_{suffix}", "draft_stage": 2},
+        )
+        assert result["archived"] == 1
+
+        rows = await graph_proxy.run_query(_TYPES, {"c": ids["c"]}, write=False)
+        # the untouched passage and the fact both passages state stay live
+        assert [r["type"] for r in rows] == [
+            "ARCHIVED_HAS_TRAIT",
+            "AT_LOCATION",
+            "MEMBER_OF",
+        ]
+    finally:
+        await graph_proxy.run_query(
+            "MATCH (n) WHERE n.id IN $ids DETACH DELETE n", {"ids": list(ids.values())}
+        )
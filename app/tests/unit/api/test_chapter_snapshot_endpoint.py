@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import create_app
+from config import app_settings
+import api.snapshot as snapshot_module
+
+
+class DummyService:
+    def __init__(self):
+        self.calls = []
+
+    async def snapshot(self, chapter):
+        self.calls.append(chapter)
+        return {
+            "chapter": chapter,
+            "checkpoint_chapter": 10,
+            "replayed_deltas": 1,
+            "facts": [
+                {
+                    "entity_id": "character-00000001",
+                    "entity": "Lyra",
+                    "predicate": "IS_ALIVE",
+                    "value": "true",
+                    "since_chapter": 12,
+                    "chapter": 12,
+                    "draft_stage": "final",
+                }
+            ],
+        }
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    service = DummyService()
+    monkeypatch.setattr(
+        snapshot_module, "get_chapter_snapshot_service", lambda: service
+    )
+    return TestClient(create_app()), service
+
+
+def _auth() -> dict[str, str]:
+    return {"Authorization": f"Bearer {app_settings.AUTH_TOKEN}"}
+
+
+def test_auth_required(client):
+    c, _ = client
+    assert c.get("/v1/chapter-snapshot/3").status_code == 401
+
+
+def test_invalid_chapter(client):
+    c, _ = client
+    assert c.get("/v1/chapter-snapshot/0", headers=_auth()).status_code == 422
+
+
+def test_snapshot_camel_case(client):
+    c, service = client
+    resp = c.get("/v1/chapter-snapshot/15", headers=_auth())
+    assert resp.status_code == 200
+    assert service.calls == [15]
+    body = resp.json()
+    assert body["checkpointChapter"] == 10
+    assert body["facts"][0]["sinceChapter"] == 12
+    assert body["facts"][0]["entity"] == "Lyra"
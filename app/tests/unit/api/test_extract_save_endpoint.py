@@ -10,8 +10,8 @@ class DummyPipeline:
     def __init__(self):
         self.calls = []
 
-    async def extract_and_save(self, text, chapter, stage, tags):
-        self.calls.append((text, chapter, stage, tags))
+    async def extract_and_save(self, text, chapter, stage, tags, lineage_id=None):
+        self.calls.append((text, chapter, stage, tags, lineage_id))
         return {
             "chunk_id": "c1",
             "raptor_node_id": "r1",
@@ -79,3 +79,14 @@ def test_success(client):
     assert resp.status_code == 200
     assert resp.json()["chunkId"] == "c1"
     assert pipeline.calls
+
+
+def test_lineage_id_is_passed_to_pipeline(client):
+    c, pipeline = client
+    resp = c.post(
+        "/v1/extract-save",
+        json={"text": "a. b.", "chapter": 1, "lineageId": "scene-12"},
+        headers=_auth(),
+    )
+    assert resp.status_code == 200
+    assert pipeline.calls[-1][-1] == "scene-12"
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from config import embeddings
+
+
+def test_openai_batch_embedder_splits_requests_and_keeps_order(monkeypatch):
+    requests = []
+
+    def create(model, input, **kwargs):
+        requests.append((list(input), kwargs))
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text))])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=data[::-1])
+
+    monkeypatch.setattr(embeddings.openai.embeddings, "create", create)
+    embed = embeddings.batch_embedder_for(64)
+
+    vectors = embed(["a", "bb", "ccc"], batch_size=2)
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert requests == [
+        (["a", "bb"], {"dimensions": 64}),
+        (["ccc"], {"dimensions": 64}),
+    ]
+    assert embeddings.batch_embedder_for(0) is embeddings.openai_batch_embedder
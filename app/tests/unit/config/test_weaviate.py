@@ -0,0 +1,90 @@
+"""Tests for vector index specs in :mod:`config.weaviate`."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from config.weaviate import parse_index_spec, reload_collection, vector_index_config
+
+
+def test_parse_hnsw_spec_with_quantizer():
+    kind, params = parse_index_spec(
+        "hnsw, ef=128, max_connections=32, quantizer=pq, training_limit=1000"
+    )
+    assert kind == "hnsw"
+    assert params == {
+        "ef": 128,
+        "max_connections": 32,
+        "quantizer": "pq",
+        "quantizer_options": {"training_limit": 1000},
+    }
+
+
+def test_vector_index_config_builds_weaviate_objects():
+    hnsw = vector_index_config("hnsw,ef=64,max_connections=16,quantizer=bq")
+    assert (hnsw.ef, hnsw.maxConnections) == (64, 16)
+    assert type(hnsw.quantizer).__name__ == "_BQConfigCreate"
+    flat = vector_index_config("flat")
+    assert flat.quantizer is None
+    assert vector_index_config("") is None
+    assert vector_index_config(None) is None
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "ivf",
+        "flat,ef=10",
+        "flat,quantizer=pq",
+        "hnsw,quantizer=xq",
+        "hnsw,ef",
+        "hnsw,quantizer=bq,segments=8",
+        "hnsw,rescore_limit=10",
+    ],
+)
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_index_spec(spec)
+
+
+class _Batch:
+    def __init__(self, failed=()):
+        self.rows = []
+        self.failed_objects = list(failed)
+
+    @contextmanager
+    def fixed_size(self, batch_size):
+        yield SimpleNamespace(
+            add_object=lambda properties, uuid, vector: self.rows.append(
+                (uuid, properties, vector)
+            )
+        )
+
+
+def _client(batch):
+    events = []
+    collections = SimpleNamespace(
+        delete=lambda name: events.append(("delete", name)),
+        get=lambda name: SimpleNamespace(batch=batch),
+    )
+    return SimpleNamespace(collections=collections), events
+
+
+def test_reload_collection_recreates_and_loads_rows():
+    batch = _Batch()
+    client, events = _client(batch)
+    rows = [("u1", {"a": 1}, (0.5, 0.5))]
+    count = reload_collection(
+        client, "Alias", lambda: events.append(("create", "Alias")), rows
+    )
+    assert count == 1
+    assert events == [("delete", "Alias"), ("create", "Alias")]
+    assert batch.rows == [("u1", {"a": 1}, [0.5, 0.5])]
+
+
+def test_reload_collection_reports_failed_objects():
+    batch = _Batch(failed=[SimpleNamespace(message="bad vector")])
+    client, _ = _client(batch)
+    with pytest.raises(RuntimeError, match="bad vector"):
+        reload_collection(client, "Alias", lambda: None, [("u1", {}, [1.0])])
@@ -0,0 +1,48 @@
+"""Unit tests for :class:`AugmentCache`."""
+
+from services.augment_cache import UNRESOLVED, AugmentCache, cache_key
+
+
+def _result(value):
+    return {"context": {"rows": [{"value": value}], "summary": None}, "trace_id": ""}
+
+
+def test_cache_key_normalises_text():
+    assert cache_key("Lyra  met\nBoris", 2) == cache_key("lyra met boris ", 2)
+    assert cache_key("Lyra", 2) != cache_key("Lyra", 3)
+    assert cache_key("Lyra", 2) != cache_key("Lyra", 2, True)
+
+
+def test_get_returns_copies_and_tracks_hit_ratio():
+    cache = AugmentCache(maxsize=4)
+    cache.put("k", _result("Rivia"), ["character-00000001"])
+    first = cache.get("k")
+    first["context"]["rows"].clear()
+    assert cache.get("k") == _result("Rivia")
+    assert cache.get("missing") is None
+    assert cache.hit_ratio == 2 / 3
+
+
+def test_invalidate_by_entity_and_unresolved():
+    cache = AugmentCache(maxsize=4)
+    cache.put("a", _result(1), ["character-00000001", "place-00000002"])
+    cache.put("b", _result(2), ["character-00000003"])
+    cache.put("c", _result(3), [UNRESOLVED])
+
+    assert cache.invalidate(["place-00000002"]) == 1
+    assert "a" not in cache._entries and cache.get("b") is not None
+    # dropped keys leave no trace in the reverse index
+    assert "character-00000001" not in cache._by_entity
+
+    assert cache.invalidate(["character-00000009"]) == 0
+    assert cache.invalidate([], new_aliases=True) == 1
+    assert len(cache) == 1
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_evicted_entries_are_unindexed():
+    cache = AugmentCache(maxsize=1)
+    cache.put("a", _result(1), ["character-00000001"])
+    cache.put("b", _result(2), ["character-00000002"])
+    assert set(cache._by_entity) == {"character-00000002"}
+    assert cache.invalidate(["character-00000001"]) == 0
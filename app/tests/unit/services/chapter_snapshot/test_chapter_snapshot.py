@@ -0,0 +1,164 @@
+"""Unit tests for :class:`ChapterSnapshotService`."""
+
+import json
+
+import pytest
+
+from services.chapter_snapshot import ChapterSnapshotService, replay
+
+
+class SnapshotProxy:
+    """Graph proxy returning a canned snapshot row."""
+
+    def __init__(self, row):
+        self.row = row
+        self.calls = []
+        self.unwind_calls = []
+
+    async def run_query(self, cypher, params=None, *, write=True):
+        self.calls.append((cypher, params, write))
+        return [self.row]
+
+    async def run_unwind(self, cypher, rows, params=None, *, write=True):
+        self.unwind_calls.append((cypher, list(rows), params))
+        return []
+
+
+class NamesService:
+    async def get_alias_map(self, entity_ids):
+        names = {"character-00000001": "Lyra", "place-00000002": "Rivia"}
+        return {eid: names[eid] for eid in entity_ids if eid in names}
+
+
+def _delta(chapter, entity_id, predicate, value, stage=1):
+    return {
+        "chapter": chapter,
+        "entity_id": entity_id,
+        "predicate": predicate,
+        "value": value,
+        "draft_stage": stage,
+    }
+
+
+def test_replay_keeps_since_chapter_while_value_holds():
+    state = {}
+    replay(
+        state,
+        [
+            _delta(1, "c1", "LOCATED_IN", "a"),
+            _delta(3, "c1", "LOCATED_IN", "a"),
+            _delta(5, "c1", "LOCATED_IN", "b"),
+            _delta(6, "c1", "IS_ALIVE", "true"),
+        ],
+    )
+    assert state[("c1", "LOCATED_IN")]["since_chapter"] == 5
+    assert state[("c1", "LOCATED_IN")]["chapter"] == 5
+    assert state[("c1", "IS_ALIVE")]["since_chapter"] == 6
+
+
+@pytest.mark.asyncio
+async def test_snapshot_replays_deltas_and_stores_crossed_checkpoints():
+    checkpoint = [
+        {
+            "entity_id": "character-00000001",
+            "predicate": "LOCATED_IN",
+            "value": "place-00000002",
+            "since_chapter": 2,
+            "chapter": 9,
+            "draft_stage": 11,
+        }
+    ]
+    proxy = SnapshotProxy(
+        {
+            "base": 10,
+            "state": json.dumps(checkpoint),
+            "read_at": 123,
+            "deltas": [
+                _delta(12, "character-00000001", "IS_ALIVE", "true"),
+                _delta(21, "character-00000001", "LOCATED_IN", "ship"),
+                _delta(25, "character-00000001", "IS_ALIVE", "false", stage=2),
+            ],
+        }
+    )
+    service = ChapterSnapshotService(proxy, NamesService(), checkpoint_interval=10)
+
+    result = await service.snapshot(25)
+
+    assert proxy.calls[0][1:] == ({"chapter": 25}, False)
+    [(cypher, rows, params)] = proxy.unwind_calls
+    assert "MERGE (c:ChapterCheckpoint" in cypher
+    assert params == {"read_at": 123}
+    assert [r["chapter"] for r in rows] == [20]
+    stored = json.loads(rows[0]["state"])
+    assert [(f["predicate"], f["value"]) for f in stored] == [
+        ("IS_ALIVE", "true"),
+        ("LOCATED_IN", "place-00000002"),
+    ]
+
+    assert result["chapter"] == 25
+    assert result["checkpoint_chapter"] == 10
+    assert result["replayed_deltas"] == 3
+    assert result["facts"] == [
+        {
+            "entity_id": "character-00000001",
+            "entity": "Lyra",
+            "predicate": "IS_ALIVE",
+            "value": "false",
+            "since_chapter": 25,
+            "chapter": 25,
+            "draft_stage": "draft_2",
+        },
+        {
+            "entity_id": "character-00000001",
+            "entity": "Lyra",
+            "predicate": "LOCATED_IN",
+            "value": "ship",
+            "since_chapter": 21,
+            "chapter": 21,
+            "draft_stage": "draft_1",
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_without_checkpoint_or_crossing():
+    proxy = SnapshotProxy(
+        {
+            "base": 0,
+            "state": None,
+            "read_at": 1,
+            "deltas": [_delta(2, "character-00000001", "LOCATED_IN", "place-00000002")],
+        }
+    )
+    service = ChapterSnapshotService(proxy, NamesService(), checkpoint_interval=10)
+
+    result = await service.snapshot(4)
+
+    assert proxy.unwind_calls == []
+    assert result["checkpoint_chapter"] is None
+    assert result["facts"][0]["value"] == "Rivia"
+
+
+@pytest.mark.asyncio
+async def test_record_writes_deltas_and_drops_stale_checkpoints():
+    proxy = SnapshotProxy({})
+    service = ChapterSnapshotService(proxy)
+    rows = [
+        {"entity_id": "c1", "predicate": "P", "current": "x", "chapter": 7},
+        {"entity_id": "c2", "predicate": "P", "current": "y", "chapter": 5},
+    ]
+
+    await service.record(rows)
+    await service.record([])
+
+    [(cypher, written, _)] = proxy.unwind_calls
+    assert "MERGE (d:ChapterDelta" in cypher
+    assert written == rows
+    [(invalidate, params, _)] = proxy.calls
+    assert "DETACH DELETE c" in invalidate
+    assert params == {"chapter": 5}
+
+
+def test_checkpoint_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        ChapterSnapshotService(SnapshotProxy({}), checkpoint_interval=0)
@@ -1,5 +1,6 @@
 import pytest
 from jinja2 import Environment, DictLoader
+from pathlib import Path
 from uuid import uuid4
 
 from schemas.cypher import CypherTemplate, SlotDefinition, GraphRelationDescriptor
@@ -10,6 +11,8 @@ from schemas.slots import SlotFill
 class FakeGraphProxy:
     def __init__(self):
         self.calls: list[tuple] = []
+        self.unwind_calls: list[tuple] = []
+        self.group_calls: list[list[list[str]]] = []
 
     async def run_query(self, cypher: str, params=None, *, write=True):
         self.calls.append((cypher, params))
@@ -19,9 +22,20 @@ class FakeGraphProxy:
         self.calls.append((list(cyphers), params_list))
         return []
 
+    async def run_unwind(self, cypher, rows, params=None, *, write=True):
+        self.unwind_calls.append((cypher, list(rows), params))
+        return []
+
+    async def run_query_groups(self, groups, *, write=True):
+        groups = [list(g) for g in groups]
+        self.group_calls.append(groups)
+        return [[] for _ in groups]
+
 
 class FakeIdentityService:
-    async def resolve_bulk(self, slots, *, slot_defs=None, chapter, chunk_id, snippet):
+    async def resolve_bulk(
+        self, slots, *, slot_defs=None, chapter, chunk_id, snippet, lookup_only=False
+    ):
         from services.identity_service import BulkResolveResult
 
         return BulkResolveResult(mapped_slots=slots, alias_tasks=[])
@@ -29,20 +43,33 @@ class FakeIdentityService:
     async def commit_aliases(self, alias_tasks):
         return []
 
+    async def commit_aliases_unwind(self, alias_tasks):
+        return []
+
+    async def get_alias_map(self, entity_ids):
+        return {}
+
 
 class FakeRaptor:
     def __init__(self):
         self.inserted = []
 
-    def insert_chunk(self, text: str, triple_text: str) -> str:
+    def embed_chunk(self, text: str, triple_text: str):
         self.inserted.append((text, triple_text))
+        return [1.0], [0.0], [0.5]
+
+    def insert_vectors(self, text_vec, fact_vec, centroid) -> str:
         return "rn-test"
 
 
 @pytest.fixture()
 def jinja_env():
     templates = {
-        "simple.j2": "MERGE (a:Character {id: '{{ character }}'}){% set related_node_ids=[character] %}"
+        "simple.j2": "MERGE (a:Character {id: '{{ character }}'}){% set related_node_ids=[character] %}",
+        # read by ``AugmentPipeline`` for every request with resolved entities
+        "entity_profiles.j2": Path(
+            "app/templates/cypher/entity_profiles.j2"
+        ).read_text(),
     }
     env = Environment(loader=DictLoader(templates))
     import schemas.cypher as cypher_mod
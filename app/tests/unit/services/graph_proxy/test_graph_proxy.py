@@ -5,7 +5,7 @@ the correct parameters and that the context manager behaviour works.
 """
 
 import pytest  # noqa: E402
-from services.graph_proxy import GraphProxy  # noqa: E402
+from services.graph_proxy import GraphProxy, unwind_statements  # noqa: E402
 
 
 class DummyRecord:
@@ -149,3 +149,39 @@ async def test_close_method(dummy_driver):
     gp = GraphProxy("bolt://x", "u", "p")
     await gp.close()
     assert dummy_driver.closed
+
+
+@pytest.mark.asyncio
+async def test_run_unwind_chunks_rows_in_one_transaction(dummy_driver):
+    gp = GraphProxy("bolt://x", "u", "p", unwind_batch_size=2)
+    rows = [{"id": i} for i in range(5)]
+    await gp.run_unwind("MERGE (n {id: row.id})", rows, {"cid": "c1"})
+    assert len(dummy_driver.sessions) == 1
+    calls = dummy_driver.sessions[0].write_calls
+    assert [len(p["rows"]) for _, p in calls] == [2, 2, 1]
+    assert all(c.startswith("UNWIND $rows AS row") for c, _ in calls)
+    assert all(p["cid"] == "c1" for _, p in calls)
+
+
+@pytest.mark.asyncio
+async def test_run_unwind_skips_empty_rows(dummy_driver):
+    gp = GraphProxy("bolt://x", "u", "p")
+    assert await gp.run_unwind("MERGE (n {id: row.id})", []) == []
+    assert dummy_driver.sessions == []
+
+
+@pytest.mark.asyncio
+async def test_run_query_groups_single_read_transaction(dummy_driver):
+    gp = GraphProxy("bolt://x", "u", "p")
+    res = await gp.run_query_groups([["A"], ["B1", "B2"]], write=False)
+    assert len(dummy_driver.sessions) == 1
+    session = dummy_driver.sessions[0]
+    assert session.read_calls == [("A", {}), ("B1", {}), ("B2", {})]
+    assert res == [[{"ok": True}], [{"ok": True}, {"ok": True}]]
+    assert await gp.run_query_groups([]) == []
+    assert len(dummy_driver.sessions) == 1
+
+
+def test_unwind_statements_rejects_bad_batch_size():
+    with pytest.raises(ValueError):
+        unwind_statements("RETURN row", [{"a": 1}], 0)
@@ -0,0 +1,145 @@
+import pytest
+from uuid import uuid4
+
+from jinja2 import DictLoader, Environment
+
+from schemas.cypher import CypherTemplate, GraphRelationDescriptor, SlotDefinition
+from services.graph_schema import (
+    GraphSchemaManager,
+    schema_statements,
+    template_rel_types,
+)
+
+ENV = Environment(
+    loader=DictLoader(
+        {
+            "owns.j2": "MERGE (c)-[r:OWNS_ITEM]->(i)\nSET r.chunk_id = 'x'",
+            "trait.j2": "MERGE (c)-[r:`HAS_TRAIT` {since: 1}]->(t)",
+            "relation.j2": (
+                "CALL apoc.merge.relationship(\n"
+                "    a, '{{ relation_type|upper }}_OF', {}, {}, b, {}\n"
+                ") YIELD rel"
+            ),
+            "bad.j2": "MERGE (c)-[r:{{ x }}]->(i)",
+        }
+    )
+)
+
+
+def _template(
+    return_map,
+    predicate="OWNS_ITEM",
+    entity_type="CHARACTER",
+    extract_cypher="owns.j2",
+):
+    return CypherTemplate(
+        id=uuid4(),
+        name="t",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(
+                name="character",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type=entity_type,
+            )
+        },
+        extract_cypher=extract_cypher,
+        graph_relation=GraphRelationDescriptor(
+            predicate=predicate, subject="$character", object="$item"
+        ),
+        return_map=return_map,
+    )
+
+
+def test_schema_statements_cover_labels_and_relations():
+    stmts = schema_statements(
+        [
+            _template({"c": "Character", "i": "Item"}),
+            _template({"c": "Character"}, extract_cypher="trait.j2"),
+        ],
+        env=ENV,
+    )
+    constraints = [s for s in stmts if s.startswith("CREATE CONSTRAINT")]
+    assert [s.split()[2] for s in constraints] == [
+        "uniq_ChapterCheckpoint_id",
+        "uniq_ChapterDelta_id",
+        "uniq_Character_id",
+        "uniq_Chunk_id",
+        "uniq_EntityProfile_id",
+        "uniq_Item_id",
+    ]
+    assert all("IF NOT EXISTS" in s for s in stmts)
+    assert (
+        "CREATE INDEX rel_OWNS_ITEM_chapter IF NOT EXISTS "
+        "FOR ()-[r:`OWNS_ITEM`]-() ON (r.chapter)"
+    ) in stmts
+    assert (
+        "CREATE INDEX rel_HAS_TRAIT_chunk_id IF NOT EXISTS "
+        "FOR ()-[r:`HAS_TRAIT`]-() ON (r.chunk_id)"
+    ) in stmts
+    assert (
+        "CREATE INDEX node_Chunk_chapter IF NOT EXISTS "
+        "FOR (n:`Chunk`) ON (n.chapter)"
+    ) in stmts
+    assert len([s for s in stmts if s.startswith("CREATE INDEX")]) == 11
+
+
+def test_dynamic_relation_types_are_indexed_when_stored():
+    tpl = _template({"a": "Character"}, extract_cypher="relation.j2")
+    static, patterns = template_rel_types([tpl], ENV)
+    assert static == []
+    assert [p.pattern for p in patterns] == ["[A-Za-z0-9_]+_OF"]
+
+    stmts = schema_statements(
+        [tpl, _template({"c": "Character"}, extract_cypher="missing.j2")],
+        ["ALLY_OF", "MENTIONS", "RIVAL_OF"],
+        ENV,
+    )
+    rel_indexes = [s.split()[2] for s in stmts if "FOR ()-[r:" in s]
+    assert rel_indexes == [
+        "rel_ALLY_OF_chunk_id",
+        "rel_ALLY_OF_chapter",
+        "rel_RIVAL_OF_chunk_id",
+        "rel_RIVAL_OF_chapter",
+    ]
+
+
+def test_schema_statements_skip_invalid_names():
+    stmts = schema_statements(
+        [_template({"c": "Bad Label"}, extract_cypher="bad.j2")], env=ENV
+    )
+    assert stmts == [
+        "CREATE CONSTRAINT uniq_ChapterCheckpoint_id IF NOT EXISTS "
+        "FOR (n:`ChapterCheckpoint`) REQUIRE n.id IS UNIQUE",
+        "CREATE CONSTRAINT uniq_ChapterDelta_id IF NOT EXISTS "
+        "FOR (n:`ChapterDelta`) REQUIRE n.id IS UNIQUE",
+        "CREATE CONSTRAINT uniq_Chunk_id IF NOT EXISTS "
+        "FOR (n:`Chunk`) REQUIRE n.id IS UNIQUE",
+        "CREATE CONSTRAINT uniq_EntityProfile_id IF NOT EXISTS "
+        "FOR (n:`EntityProfile`) REQUIRE n.id IS UNIQUE",
+        "CREATE INDEX node_Chunk_chapter IF NOT EXISTS "
+        "FOR (n:`Chunk`) ON (n.chapter)",
+        "CREATE INDEX node_Chunk_raptor_node_id IF NOT EXISTS "
+        "FOR (n:`Chunk`) ON (n.raptor_node_id)",
+        "CREATE INDEX node_Chunk_lineage_id IF NOT EXISTS "
+        "FOR (n:`Chunk`) ON (n.lineage_id)",
+        "CREATE INDEX node_EntityProfile_entity_id IF NOT EXISTS "
+        "FOR (n:`EntityProfile`) ON (n.entity_id)",
+        "CREATE INDEX node_ChapterDelta_chapter IF NOT EXISTS "
+        "FOR (n:`ChapterDelta`) ON (n.chapter)",
+        "CREATE INDEX node_ChapterDelta_updated_at IF NOT EXISTS "
+        "FOR (n:`ChapterDelta`) ON (n.updated_at)",
+        "CREATE INDEX node_ChapterCheckpoint_chapter IF NOT EXISTS "
+        "FOR (n:`ChapterCheckpoint`) ON (n.chapter)",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_manager_runs_each_statement(graph_proxy):
+    manager = GraphSchemaManager(graph_proxy, ENV)
+    applied = await manager.ensure([_template({"c": "Character"})])
+    assert graph_proxy.calls[0][0].startswith("CALL db.relationshipTypes()")
+    assert [c for c, _ in graph_proxy.calls[1:]] == applied
+    assert len(applied) == 14
@@ -4,12 +4,17 @@ These tests focus on startup behaviour, LLM disambiguation logic and alias
 commit handling without relying on external services.
 """
 
+import asyncio
 import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
 from services.identity_service import (
     IdentityService,
     AliasTask,
     LLMDecision,
     _render_alias_cypher,
+    alias_uuid,
     get_identity_service_sync,
 )
 from schemas.cypher import SlotDefinition
@@ -104,6 +109,37 @@ async def test_commit_aliases_filters_add_alias():
     assert cyphers == ["CREATE (e:CHARACTER {id:'e2', name:'Boris', details:'None'})"]
 
 
+@pytest.mark.asyncio
+async def test_commit_aliases_unwind_groups_entities_by_label():
+    """New entities become one UNWIND body per label with quoted-safe rows."""
+    svc = DummyService()
+    tasks = [
+        AliasTask(
+            cypher_template_id="create_entity_with_alias",
+            render_slots={},
+            entity_id=eid,
+            alias_text=name,
+            entity_type=etype,
+            chapter=1,
+            chunk_id="c1",
+            snippet="txt",
+            details=None,
+        )
+        for eid, name, etype in [
+            ("e1", "O'Neil", "CHARACTER"),
+            ("e2", "Boris", "CHARACTER"),
+            ("f1", "Night Front", "FACTION"),
+        ]
+    ]
+    writes = await svc.commit_aliases_unwind(tasks)
+    assert [body for body, _ in writes] == [
+        "CREATE (e:CHARACTER {id: row.id, name: row.name, details: row.details})",
+        "CREATE (e:FACTION {id: row.id, name: row.name, details: row.details})",
+    ]
+    assert writes[0][1][0] == {"id": "e1", "name": "O'Neil", "details": None}
+    assert len(writes[0][1]) == 2
+
+
 def test_render_alias_cypher_includes_details():
     """_render_alias_cypher must include the details text."""
     task = AliasTask(
@@ -400,26 +436,21 @@ def test_llm_disambiguate_skip_action():
     assert decision.details == "not a name"
 
 
-def test_resolve_single_skip_action():
+@pytest.mark.asyncio
+async def test_resolve_bulk_skip_action():
     """When LLM returns 'skip', the raw value is kept and no task is created."""
-
-    class LocalService(DummyService):
-        def _nearest_alias_sync(self, *a, **k):
-            return [{"alias_text": "he", "entity_id": "e1", "score": 0.5}]
-
-        def _llm_disambiguate_sync(self, *a, **k):
-            return LLMDecision(action="skip", details="pronoun")
-
-    svc = LocalService()
-    res = svc._resolve_single_sync(
-        raw_name="he",
-        entity_type="CHARACTER",
+    fake_llm = MyFakeLLM(['{"action": "skip", "details": "pronoun"}'])
+    client = AsyncAliasClient([_alias_obj("e1", "he", 0.5)])
+    svc = _async_service(client, llm=fake_llm)
+    res = await svc.resolve_bulk(
+        {"character": "he"},
         chapter=1,
         chunk_id="c1",
         snippet="he said",
     )
-    assert res["entity_id"] == "he"
-    assert res["need_task"] is False
+    assert fake_llm.calls == 1
+    assert res.mapped_slots["character"] == "he"
+    assert res.alias_tasks == []
 
 
 def test_get_identity_service_sync_uses_default_llm():
@@ -431,3 +462,691 @@ def test_get_identity_service_sync_uses_default_llm():
     from langchain_openai import ChatOpenAI
 
     assert isinstance(svc._llm, ChatOpenAI)
+
+
+class AsyncAliasClient:
+    """Minimal stand-in for ``WeaviateAsyncClient``."""
+
+    def __init__(self, objects=None):
+        self.connected = False
+        self.connects = 0
+        self.inserted = []
+        self.updated = []
+        self.stored = set()
+        self.queries = 0
+        outer = self
+
+        class Query:
+            async def near_vector(self_inner, **kwargs):
+                outer.queries += 1
+                return type("Res", (), {"objects": objects or []})
+
+            async def fetch_objects(self_inner, **kwargs):
+                outer.queries += 1
+                return type("Res", (), {"objects": objects or []})
+
+        class Data:
+            async def exists(self_inner, uuid):
+                return uuid in outer.stored
+
+            async def update(self_inner, uuid, properties, **kwargs):
+                outer.updated.append((uuid, properties))
+
+            async def insert(self_inner, properties, vector=None, uuid=None):
+                outer.stored.add(uuid)
+                outer.inserted.append((properties, vector))
+
+        class Coll:
+            query = Query()
+            data = Data()
+
+            async def iterator(self_inner, **kwargs):
+                for obj in objects or []:
+                    yield obj
+
+        class CollMgr:
+            def get(self_inner, name):
+                return Coll()
+
+        self.collections = CollMgr()
+
+    def is_connected(self):
+        return self.connected
+
+    async def connect(self):
+        self.connects += 1
+        await asyncio.sleep(0)
+        self.connected = True
+
+    async def close(self):
+        self.connected = False
+
+
+def _alias_obj(entity_id, alias_text, distance):
+    meta = type("M", (), {"distance": distance})()
+    props = {"entity_id": entity_id, "alias_text": alias_text}
+    return type("O", (), {"properties": props, "metadata": meta})()
+
+
+def _async_service(client, llm=None):
+    async def embed(text):
+        return [0.0]
+
+    def sync_embed(text):  # pragma: no cover - must not be used
+        raise AssertionError("sync embedder called on async path")
+
+    return IdentityService(
+        weaviate_sync_client=type("C", (), {"collections": None})(),
+        embedder=sync_embed,
+        llm=llm or (lambda *a, **k: {}),
+        weaviate_async_client=client,
+        async_embedder=embed,
+    )
+
+
+@pytest.mark.asyncio
+async def test_resolve_bulk_async_client_skips_threads(monkeypatch):
+    """With an async client resolve_bulk must not offload to threads."""
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.01)])
+    svc = _async_service(client)
+
+    async def _fail(*a, **k):  # pragma: no cover - must not be used
+        raise AssertionError("thread offload used")
+
+    monkeypatch.setattr(svc, "_run_sync", _fail)
+    res = await svc.resolve_bulk(
+        {"character": "Lyra"},
+        slot_defs={
+            "character": SlotDefinition(
+                name="character", type="STRING", is_entity_ref=True
+            )
+        },
+        chapter=1,
+        chunk_id="c1",
+        snippet="Lyra ran",
+    )
+    assert client.connected
+    assert res.mapped_slots["character"] == "e1"
+    assert res.alias_tasks == []
+
+
+@pytest.mark.asyncio
+async def test_resolve_bulk_async_uses_async_llm():
+    """Mid-similarity candidates go through the async LLM disambiguation."""
+    fake_llm = MyFakeLLM(
+        [
+            '{"action": "use", "entity_id": "e1", "alias_text": "Ly", "canonical": false, "details": "ok"}'
+        ]
+    )
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.4)])
+    svc = _async_service(client, llm=fake_llm)
+    res = await svc.resolve_bulk(
+        {"character": "Ly"},
+        chapter=1,
+        chunk_id="c1",
+        snippet="Ly ran",
+    )
+    assert fake_llm.calls == 1
+    assert res.mapped_slots["character"] == "e1"
+    assert res.alias_tasks[0].cypher_template_id == "add_alias"
+
+
+@pytest.mark.asyncio
+async def test_commit_aliases_async_client_inserts():
+    """Alias upserts go through the async collection API."""
+    client = AsyncAliasClient()
+    svc = _async_service(client)
+    task = AliasTask(
+        cypher_template_id="add_alias",
+        render_slots={},
+        entity_id="e1",
+        alias_text="Lyra",
+        entity_type="CHARACTER",
+        chapter=1,
+        chunk_id="c1",
+        snippet="Lyra ran",
+    )
+    await svc.commit_aliases([task])
+    props, vec = client.inserted[0]
+    assert props["alias_text"] == "Lyra"
+    assert vec == [0.0]
+
+
+@pytest.mark.asyncio
+async def test_get_alias_map_async_client():
+    """get_alias_map fetches names through the async client."""
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.0)])
+    svc = _async_service(client)
+    assert await svc.get_alias_map(["e1"]) == {"e1": "Lyra"}
+
+
+@pytest.mark.asyncio
+async def test_get_alias_map_served_from_cache():
+    """Second lookup of the same IDs makes no Weaviate call."""
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.0)])
+    svc = _async_service(client)
+    await svc.get_alias_map(["e1"])
+    await svc.get_alias_map(["e1"])
+    assert client.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_commit_aliases_evicts_renamed_names_only():
+    """A canonical commit evicts the cached name; plain aliases never fill it."""
+    client = AsyncAliasClient()
+    svc = _async_service(client)
+    svc._name_cache.set("e9", "Lyra")
+    svc._name_cache.set("e8", "Iorek")
+
+    def task(entity_id, alias_text, canonical):
+        return AliasTask(
+            cypher_template_id="create_entity_with_alias",
+            render_slots={"canonical": canonical},
+            entity_id=entity_id,
+            alias_text=alias_text,
+            entity_type="CHARACTER",
+            chapter=1,
+            chunk_id="c1",
+            snippet=f"{alias_text} ran",
+        )
+
+    await svc.commit_aliases(
+        [task("e9", "Lyra Silvertongue", True), task("e8", "the bear", False)]
+    )
+    assert "e9" not in svc._name_cache
+    assert svc._name_cache.get("e8") == "Iorek"
+    await svc.commit_aliases([task("e7", "the girl", False)])
+    assert "e7" not in svc._name_cache
+
+
+@pytest.mark.asyncio
+async def test_invalidate_aliases_forces_refetch():
+    """Invalidated names are fetched again on next lookup."""
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.0)])
+    svc = _async_service(client)
+    await svc.get_alias_map(["e1"])
+    svc.invalidate_aliases(["e1"])
+    await svc.get_alias_map(["e1"])
+    assert client.queries == 2
+
+
+def test_resolve_bulk_lookup_only_marks_unknown():
+    """Lookup mode never creates IDs or alias tasks for unknown names."""
+
+    class LocalService(DummyService):
+        def _nearest_alias_sync(self, *a, **k):
+            return [{"alias_text": "Lyra", "entity_id": "e1", "score": 0.6}]
+
+        def _llm_disambiguate_sync(self, *a, **k):  # pragma: no cover
+            raise AssertionError("LLM must not be called in lookup mode")
+
+    svc = LocalService()
+    res = svc._resolve_bulk_sync(
+        {"character": "Boris"},
+        None,
+        chapter=1,
+        chunk_id="aug",
+        snippet="t",
+        lookup_only=True,
+    )
+    assert res.unresolved == ["character"]
+    assert res.mapped_slots["character"] == "Boris"
+    assert res.alias_tasks == []
+
+
+@pytest.mark.asyncio
+async def test_resolve_bulk_lookup_only_accepts_exact_match():
+    """An exact alias hit resolves even below the similarity threshold."""
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.5)])
+    svc = _async_service(client)
+    res = await svc.resolve_bulk(
+        {"character": "lyra"},
+        chapter=1,
+        chunk_id="aug",
+        snippet="t",
+        lookup_only=True,
+    )
+    assert res.mapped_slots["character"] == "e1"
+    assert res.unresolved == []
+
+
+def _alias_task(alias_text="Lyra", entity_id="e1", canonical=False):
+    return AliasTask(
+        cypher_template_id="add_alias",
+        render_slots={"canonical": canonical},
+        entity_id=entity_id,
+        alias_text=alias_text,
+        entity_type="CHARACTER",
+        chapter=1,
+        chunk_id="c1",
+        snippet="Lyra ran",
+    )
+
+
+def test_alias_uuid_is_deterministic():
+    """Alias UUIDs ignore case and surrounding whitespace."""
+    assert alias_uuid("e1", " Lyra  Sky ") == alias_uuid("e1", "lyra sky")
+    assert alias_uuid("e1", "Lyra") != alias_uuid("e2", "Lyra")
+
+
+@pytest.mark.asyncio
+async def test_upsert_alias_updates_existing_in_place():
+    """Re-committing the same alias updates instead of inserting."""
+    client = AsyncAliasClient()
+    svc = _async_service(client)
+    await svc.commit_aliases([_alias_task()])
+    await svc.commit_aliases([_alias_task(alias_text="lyra")])
+    assert len(client.inserted) == 1
+    uid, props = client.updated[0]
+    assert uid == alias_uuid("e1", "Lyra")
+    assert "canonical" not in props
+
+
+class CompactClient:
+    """Sync client exposing ``iterator`` and ``delete_many`` for compaction."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.inserted = []
+        self.updated = []
+        self.replaced = []
+        self.deleted = []
+        outer = self
+
+        class Data:
+            def insert(self_inner, uuid, properties, vector=None):
+                outer.inserted.append((uuid, properties, vector))
+
+            def update(self_inner, uuid, properties):
+                outer.updated.append((uuid, properties))
+
+            def replace(self_inner, uuid, properties, vector=None):
+                outer.replaced.append((uuid, properties, vector))
+
+            def delete_many(self_inner, where):
+                outer.deleted.append(where)
+
+        class Coll:
+            data = Data()
+
+            def iterator(self_inner, include_vector=False, **kwargs):
+                return iter(outer.objects)
+
+        class CollMgr:
+            def get(self_inner, name):
+                return Coll()
+
+        self.collections = CollMgr()
+
+
+def _stored_alias(uid, alias_text, canonical=False, chapter=1):
+    props = {
+        "entity_id": "e1",
+        "alias_text": alias_text,
+        "canonical": canonical,
+        "chapter": chapter,
+    }
+    return type(
+        "O", (), {"uuid": uid, "properties": props, "vector": {"default": [1.0]}}
+    )()
+
+
+def test_compact_aliases_keeps_one_object_per_alias():
+    """Duplicates collapse into the deterministic UUID, canonical preferred."""
+    objs = [
+        _stored_alias(str(uuid4()), "Lyra", chapter=3),
+        _stored_alias(str(uuid4()), "lyra", canonical=True, chapter=5),
+        _stored_alias(str(uuid4()), "Lyra", chapter=1),
+    ]
+    client = CompactClient(objs)
+    svc = StartupService(client)
+    stats = svc.compact_aliases_sync()
+    assert stats == {"scanned": 3, "kept": 1, "deleted": 3}
+    uid, props, vec = client.inserted[0]
+    assert uid == alias_uuid("e1", "Lyra")
+    assert props["canonical"] is True
+    assert vec == [1.0]
+
+
+def test_compact_aliases_invalidates_cached_names():
+    """Entities whose aliases were merged are re-fetched on next lookup."""
+    objs = [
+        _stored_alias(str(uuid4()), "Lyra", chapter=3),
+        _stored_alias(str(uuid4()), "lyra", canonical=True, chapter=5),
+    ]
+    svc = StartupService(CompactClient(objs))
+    svc._name_cache.set("e1", "stale")
+    svc._name_cache.set("e2", "Boris")
+    svc.compact_aliases_sync()
+    assert "e1" not in svc._name_cache
+    assert svc._name_cache.get("e2") == "Boris"
+
+
+def test_compact_aliases_keeps_canonical_flag_of_dropped_duplicate():
+    """A canonical duplicate promotes the existing deterministic object."""
+    uid = alias_uuid("e1", "Lyra")
+    dup = _stored_alias(str(uuid4()), "lyra", canonical=True, chapter=5)
+    client = CompactClient([_stored_alias(uid, "Lyra", chapter=3), dup])
+    svc = StartupService(client)
+    stats = svc.compact_aliases_sync()
+    assert stats["deleted"] == 1
+    assert not client.inserted
+    assert client.updated == [(uid, {"canonical": True})]
+
+
+def test_compact_aliases_skips_clean_groups():
+    """Objects already stored under their deterministic UUID are untouched."""
+    uid = alias_uuid("e1", "Lyra")
+    client = CompactClient([_stored_alias(uid, "Lyra")])
+    svc = StartupService(client)
+    stats = svc.compact_aliases_sync()
+    assert stats["deleted"] == 0
+    assert not client.inserted
+    assert not client.deleted
+
+
+@pytest.mark.asyncio
+async def test_upsert_alias_does_not_store_snippet():
+    """Alias objects reference the chunk instead of copying its text."""
+    client = AsyncAliasClient()
+    svc = _async_service(client)
+    await svc.commit_aliases([_alias_task()])
+    props, _ = client.inserted[0]
+    assert "snippet" not in props
+    assert props["chunk_id"] == "c1"
+
+
+def test_strip_alias_snippets_rewrites_legacy_objects():
+    """Only objects still carrying a snippet are replaced, vector kept."""
+    legacy = _stored_alias(str(uuid4()), "Lyra")
+    legacy.properties["snippet"] = "Lyra ran through the night"
+    clean = _stored_alias(str(uuid4()), "Boris")
+    stripped = _stored_alias(str(uuid4()), "Iorek")
+    stripped.properties["snippet"] = None
+    client = CompactClient([legacy, clean, stripped])
+    svc = StartupService(client)
+    assert svc.strip_alias_snippets_sync() == 1
+    uid, props, vec = client.replaced[0]
+    assert uid == legacy.uuid
+    assert "snippet" not in props
+    assert vec == [1.0]
+
+
+class ReloadClient(CompactClient):
+    """Records the collection being dropped, recreated and batch-loaded."""
+
+    def __init__(self, objects):
+        super().__init__(objects)
+        self.events = []
+        self.loaded = []
+        outer = self
+        get = self.collections.get
+
+        class Batch:
+            failed_objects = []
+
+            @contextmanager
+            def fixed_size(self_inner, batch_size):
+                yield SimpleNamespace(
+                    add_object=lambda properties, uuid, vector: outer.loaded.append(
+                        (uuid, properties, vector)
+                    )
+                )
+
+        class CollMgr:
+            def get(self_inner, name):
+                coll = get(name)
+                coll.batch = Batch()
+                return coll
+
+            def list_all(self_inner):
+                return ["Alias"] if "create" in outer.events else []
+
+            def delete(self_inner, name):
+                outer.events.append("delete")
+
+            def create(self_inner, **kwargs):
+                outer.events.append("create")
+
+        self.collections = CollMgr()
+
+
+def test_reindex_aliases_recreates_collection_with_new_vectors():
+    """Vectors are recomputed from ``alias_text``; properties are kept."""
+    objs = [_stored_alias(str(uuid4()), "Lyra"), _stored_alias(str(uuid4()), "Bo")]
+    client = ReloadClient(objs)
+    svc = IdentityService(
+        weaviate_sync_client=client,
+        embedder=lambda text: [float(len(text))],
+        llm=lambda *a, **k: {},
+    )
+    assert svc.reindex_aliases_sync() == 2
+    assert client.events == ["delete", "create"]
+    assert [(uid, vec) for uid, _, vec in client.loaded] == [
+        (objs[0].uuid, [4.0]),
+        (objs[1].uuid, [2.0]),
+    ]
+    assert client.loaded[0][1]["alias_text"] == "Lyra"
+
+
+def test_resolve_bulk_batches_ambiguous_names():
+    """Several mid-similarity names are decided in one LLM completion."""
+    fake_llm = MyFakeLLM(
+        [
+            '{"decisions": ['
+            '{"raw_name": "Ly", "entity_type": "CHARACTER", "action": "use", '
+            '"entity_id": "e1", "alias_text": "Ly", "details": "same"}, '
+            '{"raw_name": "Bo", "entity_type": "CHARACTER", "action": "new", '
+            '"details": "unrelated"}]}'
+        ]
+    )
+
+    class LocalService(IdentityService):
+        def _nearest_alias_sync(self, query_text, *a, **k):
+            return [{"alias_text": "Lyra", "entity_id": "e1", "score": 0.6}]
+
+    svc = LocalService(
+        weaviate_sync_client=type("C", (), {"collections": None})(),
+        embedder=lambda x: [0.0],
+        llm=fake_llm,
+    )
+    res = svc._resolve_bulk_sync(
+        {"character_a": "Ly", "character_b": "Bo"},
+        {
+            "character_a": SlotDefinition(
+                name="character_a",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="CHARACTER",
+            ),
+            "character_b": SlotDefinition(
+                name="character_b",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="CHARACTER",
+            ),
+        },
+        chapter=1,
+        chunk_id="c1",
+        snippet="Ly and Bo fought",
+    )
+    assert fake_llm.calls == 1
+    assert "Bo" in fake_llm.get_prompt()
+    assert res.mapped_slots["character_a"] == "e1"
+    assert res.mapped_slots["character_b"].startswith("character-")
+
+
+@pytest.mark.asyncio
+async def test_resolve_bulk_async_retries_names_missing_from_batch():
+    """Names the batched answer omits fall back to single prompts."""
+    fake_llm = MyFakeLLM(
+        [
+            '{"decisions": [{"raw_name": "Ly", "action": "skip", "details": "x"}]}',
+            '{"action": "use", "entity_id": "e1", "alias_text": "Bo", "details": "ok"}',
+        ]
+    )
+    client = AsyncAliasClient([_alias_obj("e1", "Lyra", 0.4)])
+    svc = _async_service(client, llm=fake_llm)
+    res = await svc.resolve_bulk(
+        {"source": "Ly", "target": "Bo"},
+        chapter=1,
+        chunk_id="c1",
+        snippet="Ly and Bo fought",
+    )
+    assert fake_llm.calls == 2
+    assert res.mapped_slots["source"] == "Ly"
+    assert res.mapped_slots["target"] == "e1"
+
+
+def test_resolve_bulk_reuses_decision_for_repeated_name():
+    """The same new name in two slots maps to a single entity."""
+
+    class LocalService(DummyService):
+        def _nearest_alias_sync(self, *a, **k):
+            return []
+
+    svc = LocalService()
+    res = svc._resolve_bulk_sync(
+        {"source": "Lyra", "target": "Lyra"},
+        None,
+        chapter=1,
+        chunk_id="c1",
+        snippet="t",
+    )
+    assert res.mapped_slots["source"] == res.mapped_slots["target"]
+    assert len(res.alias_tasks) == 1
+
+
+@pytest.mark.asyncio
+async def test_scan_mentions_loads_aliases_and_tracks_commits():
+    """The scanner is built once and picks up newly committed aliases."""
+    obj = _alias_obj("e1", "Lyra", 0.0)
+    obj.properties["entity_type"] = "CHARACTER"
+    client = AsyncAliasClient([obj])
+    svc = _async_service(client)
+
+    found = await svc.scan_mentions("Lyra met Boris")
+    assert [(m.entity_id, m.alias_text) for m in found] == [("e1", "Lyra")]
+
+    await svc.commit_aliases([_alias_task(alias_text="Boris", entity_id="e2")])
+    found = await svc.scan_mentions("Lyra met Boris")
+    assert [m.entity_id for m in found] == ["e1", "e2"]
+
+
+@pytest.mark.asyncio
+async def test_scan_mentions_sync_client_fallback():
+    """Without an async client the scanner is loaded from the sync client."""
+    client = CompactClient(
+        [
+            type(
+                "O",
+                (),
+                {
+                    "properties": {
+                        "entity_id": "f1",
+                        "alias_text": "Night Front",
+                        "entity_type": "FACTION",
+                    }
+                },
+            )()
+        ]
+    )
+    svc = IdentityService(
+        weaviate_sync_client=client, embedder=lambda t: [0.0], llm=None
+    )
+    found = await svc.scan_mentions("She joined the night front.")
+    assert [(m.entity_id, m.entity_type) for m in found] == [("f1", "FACTION")]
+
+
+@pytest.mark.asyncio
+async def test_async_collection_connects_once_under_concurrency():
+    """Concurrent first calls share a single connection."""
+    client = AsyncAliasClient()
+    svc = _async_service(client)
+    await asyncio.gather(*(svc._async_collection() for _ in range(5)))
+    assert client.connects == 1
+
+
+@pytest.mark.asyncio
+async def test_startup_connects_and_shutdown_closes_async_client():
+    """The lifespan hooks own the async client connection."""
+    client = AsyncAliasClient()
+    svc = IdentityService(
+        weaviate_sync_client=DummyClient(exists=True),
+        embedder=lambda x: [0.0],
+        llm=lambda *a, **k: {},
+        weaviate_async_client=client,
+    )
+    await svc.startup()
+    assert client.connected and client.connects == 1
+    await svc._async_collection()
+    assert client.connects == 1
+    await svc.shutdown()
+    assert not client.connected
+
+
+class PagedNameClient:
+    """Sync client whose ``fetch_objects`` honours paging and canonical filter."""
+
+    def __init__(self, objects):
+        self.calls = []
+        outer = self
+
+        class Query:
+            def fetch_objects(self_inner, filters, limit, offset, **kwargs):
+                ids, canonical_only = filters
+                outer.calls.append((tuple(ids), canonical_only, offset))
+                hits = [
+                    o
+                    for o in objects
+                    if o.properties["entity_id"] in ids
+                    and (o.properties["canonical"] or not canonical_only)
+                ]
+                end = offset + limit
+                return SimpleNamespace(objects=hits[offset:end])
+
+        class CollMgr:
+            def get(self_inner, name):
+                return SimpleNamespace(query=Query())
+
+        self.collections = CollMgr()
+
+
+def _name_obj(entity_id, alias_text, canonical=False, chapter=1):
+    props = {
+        "entity_id": entity_id,
+        "alias_text": alias_text,
+        "canonical": canonical,
+        "chapter": chapter,
+    }
+    return SimpleNamespace(properties=props)
+
+
+def test_get_alias_map_pages_past_extra_aliases(monkeypatch):
+    """Many aliases per entity never hide the canonical name or another ID."""
+    import services.identity_service as identity_module
+
+    monkeypatch.setattr(identity_module, "NAME_PAGE_SIZE", 2)
+    monkeypatch.setattr(
+        identity_module, "_name_filter", lambda ids, canonical: (ids, canonical)
+    )
+    objects = [
+        _name_obj("e1", "the girl"),
+        _name_obj("e1", "she"),
+        _name_obj("e1", "Lyra", canonical=True, chapter=1),
+        _name_obj("e1", "Lyra Silvertongue", canonical=True, chapter=4),
+        _name_obj("e1", "Lyra", canonical=True, chapter=2),
+        _name_obj("e2", "the bear"),
+        _name_obj("e2", "Iorek"),
+        _name_obj("e2", "armoured bear"),
+    ]
+    client = PagedNameClient(objects)
+    svc = StartupService(client)
+    names = svc._get_alias_map_sync(["e1", "e2"])
+    assert names == {"e1": "Lyra Silvertongue", "e2": "Iorek"}
+    # canonical pass reads every page; fallback stops once e2 is covered
+    assert client.calls == [
+        (("e1", "e2"), True, 0),
+        (("e1", "e2"), True, 2),
+        (("e2",), False, 0),
+    ]
@@ -0,0 +1,37 @@
+from services.mention_scanner import MentionScanner
+
+
+def _scanner():
+    scanner = MentionScanner()
+    scanner.add("Lyra", "character-1", "CHARACTER")
+    scanner.add("Night", "character-2", "CHARACTER")
+    scanner.add("Night  Front", "faction-1", "FACTION")
+    return scanner
+
+
+def test_scan_returns_mentions_with_offsets():
+    text = "LYRA joined the Night Front."
+    found = _scanner().scan(text)
+    assert [(m.entity_id, m.alias_text) for m in found] == [
+        ("character-1", "LYRA"),
+        ("faction-1", "Night Front"),
+    ]
+    start, end = found[1].start, found[1].end
+    assert text[start:end] == "Night Front"
+
+
+def test_scan_requires_word_boundaries():
+    assert _scanner().scan("Lyrans of the Nightfall") == []
+
+
+def test_scan_filters_by_entity_type():
+    found = _scanner().scan("Night came. Night Front marched.", ["CHARACTER"])
+    assert [m.entity_id for m in found] == ["character-2", "character-2"]
+
+
+def test_shared_alias_yields_each_entity():
+    scanner = _scanner()
+    scanner.add("lyra", "character-3", "CHARACTER")
+    found = scanner.scan("Lyra")
+    assert {m.entity_id for m in found} == {"character-1", "character-3"}
+    assert len(scanner) == 4
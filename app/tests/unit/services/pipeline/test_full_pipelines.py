@@ -73,13 +73,25 @@ class FakeGraphProxy:
         self.calls.append(list(cyphers))
         return []
 
+    async def run_unwind(self, cypher, rows, params=None, *, write=True):
+        self.calls.append(list(rows))
+        return []
+
+    async def run_query_groups(self, groups, *, write=True):
+        groups = [list(g) for g in groups]
+        self.calls.extend(groups)
+        return [[] for _ in groups]
+
 
 class FakeRaptor:
     def __init__(self):
         self.inserted = []
 
-    def insert_chunk(self, text: str, triple_text: str) -> str:
+    def embed_chunk(self, text: str, triple_text: str):
         self.inserted.append((text, triple_text))
+        return [1.0], [0.0], [0.5]
+
+    def insert_vectors(self, text_vec, fact_vec, centroid) -> str:
         return "rid"
 
 
@@ -194,7 +206,12 @@ async def test_augment_pipeline_multiple_templates(monkeypatch, env_augment):
         embedder=lambda _: [0.0],
         llm=lambda *_: {"action": "new"},
     )
-    monkeypatch.setattr(identity, "_nearest_alias_sync", lambda *a, **k: [])
+    # augment only looks names up; "A" must already be a known alias
+    monkeypatch.setattr(
+        identity,
+        "_nearest_alias_sync",
+        lambda *a, **k: [{"alias_text": "A", "entity_id": "e1", "score": 1.0}],
+    )
     monkeypatch.setattr(identity, "_upsert_alias_sync", lambda *a, **k: None)
     graph = FakeGraphProxy()
     pipeline = AugmentPipeline(
@@ -8,6 +8,7 @@ import pytest
 from schemas.stage import StageEnum
 from schemas.slots import SlotFill
 
+from services.raptor_index import decode_f16
 from services.pipeline import ExtractionPipeline, AugmentPipeline
 from services.template_renderer import TemplateRenderer
 from schemas.cypher import (
@@ -63,6 +64,143 @@ async def test_pipeline_simple(
     assert update, "raptor id update not executed"
 
 
+@pytest.mark.asyncio
+async def test_pipeline_bulk_writes_chunk_and_mentions(
+    sample_template,
+    template_renderer,
+    slot_fill,
+    graph_proxy,
+    identity_service,
+    raptor_index,
+):
+    """Chunk creation and MENTIONS edges go through ``run_unwind``."""
+
+    class FakeTemplateService:
+        async def top_k_async(self, text, k=3, *, alpha=0.5):
+            return [sample_template, sample_template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [slot_fill]
+
+    pipeline = ExtractionPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        graph_proxy=graph_proxy,
+        identity_service=identity_service,
+        template_renderer=template_renderer,
+        raptor_index=raptor_index,
+    )
+
+    result = await pipeline.extract_and_save("hello", chapter=1)
+
+    chunk_call, *mention_calls, profile_call = graph_proxy.unwind_calls
+    assert "MERGE (c:Chunk {id: row.id})" in chunk_call[0]
+    assert chunk_call[1][0]["id"] == result["chunk_id"]
+    # one statement per label: the subject is labelled via return_map
+    assert [(c, rows) for c, rows, _ in mention_calls] == [
+        (
+            "MATCH (chunk:Chunk {id: $chunk_id})\n"
+            "MATCH (x:`a` {id: row.node_id})\n"
+            "MERGE (chunk)-[:MENTIONS]->(x)",
+            [{"node_id": "char1"}],
+        ),
+        (
+            "MATCH (chunk:Chunk {id: $chunk_id})\n"
+            "MATCH (x {id: row.node_id})\n"
+            "MERGE (chunk)-[:MENTIONS]->(x)",
+            [{"node_id": "true"}],
+        ),
+    ]
+    assert mention_calls[0][2] == {"chunk_id": result["chunk_id"]}
+    # both templates update the same (entity, predicate) profile entry
+    assert "MERGE (p:EntityProfile" in profile_call[0]
+    assert (
+        profile_call[1]
+        == [
+            {
+                "entity_id": "char1",
+                "predicate": "IS_ALIVE",
+                "current": "true",
+                "chapter": 1,
+                "draft_stage": StageEnum.brainstorm.value,
+                "chunk_id": result["chunk_id"],
+            }
+        ]
+        * 2
+    )
+    assert profile_call[2] == {"max_values": 10}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "enabled, lineage_id",
+    [(True, "scene-12"), (True, None), (False, "scene-12")],
+)
+async def test_pipeline_supersedes_older_drafts(
+    sample_template,
+    template_renderer,
+    slot_fill,
+    graph_proxy,
+    identity_service,
+    raptor_index,
+    enabled,
+    lineage_id,
+):
+    """Older drafts of the same passage are archived after the new writes.
+
+    Supersession is opt-in and needs the client's ``lineage_id``; without it
+    other passages of the chapter could be mistaken for older drafts.
+    """
+
+    class FakeTemplateService:
+        async def top_k_async(self, text, k=3, *, alpha=0.5):
+            return [sample_template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [slot_fill]
+
+    pipeline = ExtractionPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        graph_proxy=graph_proxy,
+        identity_service=identity_service,
+        template_renderer=template_renderer,
+        raptor_index=raptor_index,
+        supersede_drafts=enabled,
+    )
+
+    result = await pipeline.extract_and_save(
+        "hello", chapter=3, stage=StageEnum.final, lineage_id=lineage_id
+    )
+
+    chunk_cypher, [chunk_row], _ = graph_proxy.unwind_calls[0]
+    assert "c.lineage_id = coalesce(row.lineage_id, c.lineage_id)" in chunk_cypher
+    assert chunk_row["lineage_id"] == lineage_id
+    calls = [
+        (i, c, params)
+        for i, (c, params) in enumerate(graph_proxy.calls)
+        if isinstance(c, str) and "apoc.refactor.setType" in c
+    ]
+    if not (enabled and lineage_id):
+        assert calls == []
+        return
+    [(index, cypher, params)] = calls
+    assert params == {
+        "chunk_id": result["chunk_id"],
+        "lineage_id": "scene-12",
+        "draft_stage": StageEnum.final.value,
+    }
+    # older drafts are found by lineage only, never by chapter
+    assert "MATCH (old:Chunk {lineage_id: $lineage_id})" in cypher
+    assert "chapter" not in cypher
+    assert "all(cid IN stated_by WHERE cid IN old_ids)" in cypher
+    # the template's own write happens first, the raptor update afterwards
+    assert isinstance(graph_proxy.calls[index - 1][0], list)
+    assert "raptor_node_id" in graph_proxy.calls[index + 1][0]
+
+
 @pytest.mark.asyncio
 async def test_pipeline_returns_details(
     sample_template,
@@ -144,7 +282,10 @@ async def test_pipeline_converts_raptor_id_to_str(
             return "rn-test"
 
     class FakeRaptor:
-        def insert_chunk(self, text: str, triple_text: str) -> NonStrId:
+        def embed_chunk(self, text: str, triple_text: str):
+            return [1.0], [0.0], [0.5]
+
+        def insert_vectors(self, text_vec, fact_vec, centroid) -> NonStrId:
             return NonStrId()
 
     class FakeTemplateService:
@@ -172,6 +313,7 @@ async def test_pipeline_converts_raptor_id_to_str(
     await pipeline.extract_and_save("txt", chapter=1)
     update = [p for c, p in graph_proxy.calls if "raptor_node_id" in c][0]
     assert isinstance(update["rid"], str)
+    assert decode_f16(update["vec"]) == [0.5]
 
 
 @pytest.mark.asyncio
@@ -285,7 +427,7 @@ async def test_augment_pipeline_splits_cypher_at_with_star(
 
     await pipeline.augment_context("txt", chapter=1)
 
-    batch = [c for c in graph_proxy.calls if isinstance(c[0], list)][0][0]
+    [[batch]] = graph_proxy.group_calls
     assert len(batch) == 2
     assert batch[0].startswith("MATCH")
     assert batch[1].startswith("MATCH")
@@ -361,8 +503,8 @@ async def test_augment_pipeline_skips_failed_template(
 
     await pipeline.augment_context("txt", chapter=1)
 
-    assert len(graph_proxy.calls) == 1
-    assert graph_proxy.calls[0][0].startswith("MATCH")
+    [[query]] = graph_proxy.group_calls
+    assert query[0].startswith("MATCH")
 
 
 @pytest.mark.asyncio
@@ -373,24 +515,18 @@ async def test_augment_pipeline_rewrites_ids(jinja_env):
         def __init__(self):
             self.calls = []
 
-        async def run_query(self, cypher, params=None, *, write=True):
-            self.calls.append((cypher, params))
+        async def run_query_groups(self, groups, *, write=True):
+            groups = [list(g) for g in groups]
+            self.calls.append(groups)
             return [
-                {
-                    "relation": "REL",
-                    "target": "character-12345678",
-                    "meta_draft_stage": 1,
-                }
-            ]
-
-        async def run_queries(self, cyphers, params_list=None, *, write=True):
-            self.calls.append((list(cyphers), params_list))
-            return [
-                {
-                    "relation": "REL",
-                    "target": "character-12345678",
-                    "meta_draft_stage": 1,
-                }
+                [
+                    {
+                        "relation": "REL",
+                        "target": "character-12345678",
+                        "meta_draft_stage": 1,
+                    }
+                ]
+                for _ in groups
             ]
 
     jinja_env.loader.mapping.update(
@@ -441,7 +577,14 @@ async def test_augment_pipeline_rewrites_ids(jinja_env):
             self.lookups = []
 
         async def resolve_bulk(
-            self, slots, *, slot_defs=None, chapter, chunk_id, snippet
+            self,
+            slots,
+            *,
+            slot_defs=None,
+            chapter,
+            chunk_id,
+            snippet,
+            lookup_only=False,
         ):
             from services.identity_service import BulkResolveResult
 
@@ -482,22 +625,16 @@ async def test_augment_pipeline_fills_missing_value_with_alias(jinja_env):
     """Pipeline should use alias map when cypher returns null value."""
 
     class LocalGraphProxy:
-        async def run_query(self, cypher, params=None, *, write=True):
+        async def run_query_groups(self, groups, *, write=True):
             return [
-                {
-                    "relation": "AT_LOCATION",
-                    "value": None,
-                    "meta_draft_stage": 1,
-                }
-            ]
-
-        async def run_queries(self, cyphers, params_list=None, *, write=True):
-            return [
-                {
-                    "relation": "AT_LOCATION",
-                    "value": None,
-                    "meta_draft_stage": 1,
-                }
+                [
+                    {
+                        "relation": "AT_LOCATION",
+                        "value": None,
+                        "meta_draft_stage": 1,
+                    }
+                ]
+                for _ in groups
             ]
 
     jinja_env.loader.mapping.update(
@@ -550,7 +687,14 @@ async def test_augment_pipeline_fills_missing_value_with_alias(jinja_env):
 
     class AliasService:
         async def resolve_bulk(
-            self, slots, *, slot_defs=None, chapter, chunk_id, snippet
+            self,
+            slots,
+            *,
+            slot_defs=None,
+            chapter,
+            chunk_id,
+            snippet,
+            lookup_only=False,
         ):
             from services.identity_service import BulkResolveResult
 
@@ -583,3 +727,763 @@ async def test_augment_pipeline_fills_missing_value_with_alias(jinja_env):
     assert row["target"] == "Rivia"
     assert row["meta_draft_stage"] == "draft_1"
     assert "triple_text" in row
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_resolves_in_lookup_mode(graph_proxy, jinja_env):
+    """Augment must not create entities while resolving names."""
+    jinja_env.loader.mapping["look_aug.j2"] = "RETURN '{{ character }}' AS source"
+    template = CypherTemplate(
+        id=uuid4(),
+        name="look",
+        title="t",
+        description="d",
+        slots={"character": SlotDefinition(name="character", type="STRING")},
+        augment_cypher="look_aug.j2",
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [SlotFill(template_id="x", slots={"character": "c"}, details="")]
+
+    class LookupService:
+        def __init__(self):
+            self.modes = []
+
+        async def resolve_bulk(
+            self,
+            slots,
+            *,
+            slot_defs=None,
+            chapter,
+            chunk_id,
+            snippet,
+            lookup_only=False,
+        ):
+            from services.identity_service import BulkResolveResult
+
+            self.modes.append(lookup_only)
+            return BulkResolveResult(mapped_slots=slots, alias_tasks=[])
+
+    svc = LookupService()
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        identity_service=svc,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=graph_proxy,
+    )
+
+    await pipeline.augment_context("txt", chapter=1)
+    assert svc.modes == [True]
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_skips_fills_with_unresolved_entities(
+    graph_proxy, jinja_env
+):
+    """A fill naming an unknown entity is not rendered with its raw name."""
+    jinja_env.loader.mapping["skip_aug.j2"] = "RETURN '{{ character }}' AS source"
+    template = CypherTemplate(
+        id=uuid4(),
+        name="skip",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(
+                name="character", type="STRING", is_entity_ref=True
+            )
+        },
+        augment_cypher="skip_aug.j2",
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [
+                SlotFill(template_id="x", slots={"character": "Lyra"}, details=""),
+                SlotFill(template_id="x", slots={"character": "Boris"}, details=""),
+            ]
+
+    class LookupService:
+        async def resolve_bulk(
+            self,
+            slots,
+            *,
+            slot_defs=None,
+            chapter,
+            chunk_id,
+            snippet,
+            lookup_only=False,
+        ):
+            from services.identity_service import BulkResolveResult
+
+            if slots["character"] == "Lyra":
+                return BulkResolveResult(
+                    mapped_slots={"character": "character-1"},
+                    alias_tasks=[],
+                    alias_map={"character-1": "Lyra"},
+                )
+            return BulkResolveResult(
+                mapped_slots=slots, alias_tasks=[], unresolved=["character"]
+            )
+
+        async def get_alias_map(self, entity_ids):
+            return {}
+
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        identity_service=LookupService(),
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=graph_proxy,
+    )
+
+    await pipeline.augment_context("txt", chapter=1)
+    queries = [part for group in graph_proxy.group_calls[0] for part in group]
+    assert any("character-1" in q for q in queries)
+    assert not any("Boris" in q for q in queries)
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_fills_entity_templates_from_mentions(
+    graph_proxy, identity_service, jinja_env
+):
+    """Entity-only templates skip the LLM when the scanner finds mentions."""
+    from services.mention_scanner import Mention
+
+    jinja_env.loader.mapping["own_aug.j2"] = "RETURN '{{ character }}' AS source"
+    entity_tpl = CypherTemplate(
+        id=uuid4(),
+        name="own",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(
+                name="character",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="CHARACTER",
+            ),
+            "item": SlotDefinition(
+                name="item", type="STRING", is_entity_ref=True, entity_type="ITEM"
+            ),
+            "chapter": SlotDefinition(name="chapter", type="INT"),
+        },
+        augment_cypher="own_aug.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="OWNS", subject="$character", object="$item"
+        ),
+        return_map={"c": "Character"},
+    )
+    trait_tpl = CypherTemplate(
+        id=uuid4(),
+        name="trait",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(
+                name="character",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="CHARACTER",
+            ),
+            "trait": SlotDefinition(name="trait", type="STRING"),
+        },
+        augment_cypher="own_aug.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="HAS_TRAIT", subject="$character", object="$trait"
+        ),
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [entity_tpl, trait_tpl]
+
+    class FakeSlotFiller:
+        def __init__(self):
+            self.templates = []
+
+        async def fill_slots(self, template, text):
+            self.templates.append(template.name)
+            return []
+
+    async def scan(text):
+        return [
+            Mention(
+                entity_id=eid,
+                entity_type=etype,
+                alias_text="x",
+                start=0,
+                end=1,
+            )
+            for eid, etype in [
+                ("character-1", "CHARACTER"),
+                ("character-2", "CHARACTER"),
+                ("item-1", "ITEM"),
+            ]
+        ]
+
+    filler = FakeSlotFiller()
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=filler,
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=graph_proxy,
+        mention_scanner=scan,
+    )
+
+    await pipeline.augment_context("txt", chapter=1)
+    assert filler.templates == ["trait"]
+    assert graph_proxy.group_calls == [
+        [
+            ["RETURN 'character-1' AS source"],
+            ["RETURN 'character-2' AS source"],
+        ]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_flags_archived_history(jinja_env, identity_service):
+    """``include_history`` reaches the template; archived types are unprefixed."""
+    jinja_env.loader.mapping["hist_aug.j2"] = (
+        "RETURN '{{ character }}' AS source, {{ include_history }} AS history"
+    )
+    template = CypherTemplate(
+        id=uuid4(),
+        name="hist",
+        title="t",
+        description="d",
+        slots={"character": SlotDefinition(name="character", type="STRING")},
+        augment_cypher="hist_aug.j2",
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [SlotFill(template_id="x", slots={"character": "c"}, details="")]
+
+    class HistoryProxy:
+        def __init__(self):
+            self.queries = []
+
+        async def run_query_groups(self, groups, *, write=True):
+            groups = [list(g) for g in groups]
+            self.queries.extend(g[0] for g in groups)
+            return [
+                [{"relation": "ARCHIVED_MEMBER_OF", "meta_archived": True}]
+                for _ in groups
+            ]
+
+    proxy = HistoryProxy()
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=proxy,
+    )
+
+    result = await pipeline.augment_context("txt", chapter=1, include_history=True)
+
+    assert "True AS history" in proxy.queries[0]
+    [row] = result["context"]["rows"]
+    assert row["relation"] == "MEMBER_OF"
+    assert row["meta_archived"] is True
+    # rows come back grouped per query and are tagged with their template
+    assert row["meta_template_id"] == "hist"
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_serves_repeated_requests_from_cache(
+    graph_proxy, identity_service, jinja_env
+):
+    """Repeated passages skip all work until a referenced entity is written."""
+    from services.augment_cache import AugmentCache
+
+    jinja_env.loader.mapping["cache_aug.j2"] = "RETURN '{{ character }}' AS source"
+    template = CypherTemplate(
+        id=uuid4(),
+        name="cache",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(
+                name="character",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="CHARACTER",
+            )
+        },
+        augment_cypher="cache_aug.j2",
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [template]
+
+    class FakeSlotFiller:
+        def __init__(self):
+            self.calls = 0
+
+        async def fill_slots(self, template, text):
+            self.calls += 1
+            return [
+                SlotFill(
+                    template_id="x",
+                    slots={"character": "character-00000001"},
+                    details="",
+                )
+            ]
+
+    cache = AugmentCache(maxsize=8)
+    filler = FakeSlotFiller()
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=filler,
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=graph_proxy,
+        cache=cache,
+    )
+
+    first = await pipeline.augment_context("Lyra waits.", chapter=2)
+    second = await pipeline.augment_context("lyra  waits.", chapter=2)
+    assert second == first
+    assert filler.calls == 1 and len(graph_proxy.group_calls) == 1
+    assert cache.hit_ratio == 0.5
+
+    assert cache.invalidate(["character-00000001"]) == 1
+    await pipeline.augment_context("Lyra waits.", chapter=2)
+    assert filler.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_invalidates_augment_cache_for_touched_entities(
+    sample_template,
+    template_renderer,
+    slot_fill,
+    graph_proxy,
+    identity_service,
+    raptor_index,
+):
+    from services.augment_cache import AugmentCache
+
+    class FakeTemplateService:
+        async def top_k_async(self, text, k=3, *, alpha=0.5):
+            return [sample_template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [slot_fill]
+
+    cache = AugmentCache(maxsize=8)
+    cache.put("touched", {"context": {}}, ["char1"])
+    cache.put("other", {"context": {}}, ["char2"])
+    pipeline = ExtractionPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        graph_proxy=graph_proxy,
+        identity_service=identity_service,
+        template_renderer=template_renderer,
+        raptor_index=raptor_index,
+        augment_cache=cache,
+    )
+
+    await pipeline.extract_and_save("hello", chapter=1)
+
+    assert cache.get("touched") is None
+    assert cache.get("other") == {"context": {}}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_defers_raptor_to_outbox(
+    sample_template,
+    template_renderer,
+    slot_fill,
+    graph_proxy,
+    identity_service,
+    raptor_index,
+):
+    from services.raptor_outbox import RaptorOutbox, RaptorWorker
+
+    class FakeTemplateService:
+        async def top_k_async(self, text, k=3, *, alpha=0.5):
+            return [sample_template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [slot_fill]
+
+    outbox = RaptorOutbox(":memory:")
+    pipeline = ExtractionPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        graph_proxy=graph_proxy,
+        identity_service=identity_service,
+        template_renderer=template_renderer,
+        raptor_index=raptor_index,
+        raptor_worker=RaptorWorker(outbox, raptor_index, graph_proxy),
+    )
+
+    result = await pipeline.extract_and_save("hello", chapter=1)
+
+    assert result["raptor_node_id"] is None
+    assert raptor_index.inserted == []
+    [item] = outbox.claim(5)
+    assert item.chunk_id == result["chunk_id"]
+    assert item.text == "hello"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_chapter_deltas(
+    sample_template,
+    template_renderer,
+    slot_fill,
+    graph_proxy,
+    identity_service,
+    raptor_index,
+):
+    from services.chapter_snapshot import ChapterSnapshotService
+
+    class FakeTemplateService:
+        async def top_k_async(self, text, k=3, *, alpha=0.5):
+            return [sample_template]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):
+            return [slot_fill]
+
+    pipeline = ExtractionPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        graph_proxy=graph_proxy,
+        identity_service=identity_service,
+        template_renderer=template_renderer,
+        raptor_index=raptor_index,
+        snapshots=ChapterSnapshotService(graph_proxy),
+    )
+
+    result = await pipeline.extract_and_save("hello", chapter=3)
+
+    *_, profile_call, delta_call = graph_proxy.unwind_calls
+    assert "MERGE (d:ChapterDelta" in delta_call[0]
+    assert delta_call[1] == profile_call[1]
+    assert delta_call[1][0]["chunk_id"] == result["chunk_id"]
+    invalidate = [
+        params
+        for cypher, params in graph_proxy.calls
+        if isinstance(cypher, str) and "ChapterCheckpoint" in cypher
+    ]
+    assert invalidate == [{"chapter": 3}]
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_neighbourhood_mode(jinja_env, identity_service):
+    """Mentioned entities are expanded by one query; edge templates are skipped."""
+    from pathlib import Path
+
+    from schemas.cypher import AugmentMode
+    from services.augment_cache import AugmentCache
+    from services.mention_scanner import Mention
+
+    base = Path("app/templates/cypher")
+    for name in (
+        "entity_neighbourhood.j2",
+        "entity_profiles.j2",
+        "_augment_filters.j2",
+        "_augment_meta.j2",
+        "_rel_types.j2",
+    ):
+        jinja_env.loader.mapping[name] = (base / name).read_text()
+    jinja_env.loader.mapping["flag_aug.j2"] = "RETURN 'IS_ALIVE' AS relation"
+    character = SlotDefinition(
+        name="character", type="STRING", is_entity_ref=True, entity_type="CHARACTER"
+    )
+    member = CypherTemplate(
+        id=uuid4(),
+        name="member",
+        title="t",
+        description="d",
+        slots={
+            "character": character,
+            "faction": SlotDefinition(
+                name="faction",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="FACTION",
+            ),
+        },
+        augment_cypher="flag_aug.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="MEMBER_OF", subject="$character", object="$faction"
+        ),
+        return_map={"c": "Character", "f": "Faction"},
+    )
+    death = CypherTemplate(
+        id=uuid4(),
+        name="death",
+        title="t",
+        description="d",
+        slots={"character": character},
+        augment_cypher="flag_aug.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="IS_ALIVE", subject="$character", value="false"
+        ),
+        return_map={"c": "Character"},
+    )
+
+    class FakeTemplateService:
+        async def top_k_async(
+            self, text, k=3, *, alpha=0.5, mode=TemplateRenderMode.AUGMENT
+        ):
+            return [member, death]
+
+    class FakeSlotFiller:
+        async def fill_slots(self, template, text):  # pragma: no cover - unused
+            raise AssertionError("no LLM calls expected")
+
+    edge = {
+        "relation": "MEMBER_OF",
+        "source": "character-00000001",
+        "target": "faction-00000002",
+        "meta_chunk_id": "chunk-1",
+    }
+
+    class NeighbourhoodProxy:
+        def __init__(self):
+            self.groups = []
+
+        async def run_query_groups(self, groups, *, write=True):
+            groups = [list(g) for g in groups]
+            self.groups.append(groups)
+            # the edge is found from both mentioned endpoints
+            return [
+                [dict(edge), dict(edge)],
+                [{"relation": "IS_ALIVE"}],
+                [
+                    {
+                        "entity": "character-00000001",
+                        "predicate": "MEMBER_OF",
+                        "value": "faction-00000002",
+                        "chapter_from": 2,
+                        "chapter_to": 4,
+                        "draft_stage": 11,
+                    }
+                ],
+            ]
+
+    async def scan(text):
+        return [
+            Mention(
+                entity_id="character-00000001",
+                entity_type="CHARACTER",
+                alias_text="Lyra",
+                start=0,
+                end=4,
+            ),
+            Mention(
+                entity_id="faction-00000002",
+                entity_type="FACTION",
+                alias_text="Night Front",
+                start=9,
+                end=20,
+            ),
+        ]
+
+    proxy = NeighbourhoodProxy()
+    cache = AugmentCache(maxsize=4)
+    pipeline = AugmentPipeline(
+        template_service=FakeTemplateService(),
+        slot_filler=FakeSlotFiller(),
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=proxy,
+        mention_scanner=scan,
+        cache=cache,
+        neighbourhood_limit=3,
+    )
+
+    result = await pipeline.augment_context(
+        "Lyra and Night Front", chapter=4, mode=AugmentMode.NEIGHBOURHOOD
+    )
+
+    [[neighbourhood, flag, [profiles]]] = proxy.groups
+    assert len(neighbourhood) == 2
+    assert 'UNWIND ["character-00000001"] AS eid' in neighbourhood[0]
+    assert "MATCH (e:`Character` {id: eid})" in neighbourhood[0]
+    assert "MATCH (e:`Faction` {id: eid})" in neighbourhood[1]
+    assert "r.chapter <= 4" in neighbourhood[0]
+    assert "collect(r)[..3]" in neighbourhood[0]
+    # restated facts rank by their latest chapter up to the requested one
+    assert "coalesce(r.last_chapter, r.chapter) <= 4" in neighbourhood[0]
+    assert flag == ["RETURN 'IS_ALIVE' AS relation"]
+    assert "MATCH (p:EntityProfile)" in profiles
+    assert '["character-00000001", "faction-00000002"]' in profiles
+    assert "p.chapter_from <= 4" in profiles
+
+    rows = result["context"]["rows"]
+    assert [r["relation"] for r in rows] == ["MEMBER_OF", "IS_ALIVE"]
+    assert rows[0]["meta_template_id"] == "entity_neighbourhood"
+    assert rows[1]["meta_template_id"] == "death"
+    assert result["context"]["profiles"] == [
+        {
+            "entity": "character-00000001",
+            "predicate": "MEMBER_OF",
+            "value": "faction-00000002",
+            "chapter_from": 2,
+            "chapter_to": 4,
+            "draft_stage": "final",
+        }
+    ]
+
+    again = await pipeline.augment_context(
+        "Lyra and Night Front", chapter=4, mode=AugmentMode.NEIGHBOURHOOD
+    )
+    assert again == result and len(proxy.groups) == 1
+    assert cache.invalidate(["faction-00000002"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_episodes_mode(jinja_env, identity_service):
+    """Nearest Raptor clusters yield past chunks and their facts, no templates."""
+    from pathlib import Path
+
+    from schemas.cypher import AugmentMode
+    from services.augment_cache import AugmentCache
+
+    base = Path("app/templates/cypher")
+    for name in ("raptor_episodes.j2", "_augment_meta.j2"):
+        jinja_env.loader.mapping[name] = (base / name).read_text()
+
+    class NoTemplates:
+        async def top_k_async(self, *a, **k):  # pragma: no cover - unused
+            raise AssertionError("episodes mode must not search templates")
+
+    class Clusters:
+        def __init__(self):
+            self.calls = []
+
+        def nearest_leaves(self, text, k=5, beam=2):
+            self.calls.append((text, k))
+            return [("rn-a", 0.05), ("rn-b", 0.2)]
+
+    class EpisodeProxy:
+        def __init__(self):
+            self.groups = []
+
+        async def run_query_groups(self, groups, *, write=True):
+            self.groups.append([list(g) for g in groups])
+            return [
+                [
+                    {
+                        "relation": "MEMBER_OF",
+                        "source": "character-00000001",
+                        "target": "faction-00000002",
+                        "meta_chunk_id": "chunk-1",
+                        "meta_raptor_id": "rn-b",
+                    }
+                ],
+                [
+                    {"chunk_id": "chunk-1", "chapter": 2, "raptor_id": "rn-b"},
+                    {"chunk_id": "chunk-3", "chapter": 1, "raptor_id": "rn-a"},
+                    {"chunk_id": "chunk-2", "chapter": 3, "raptor_id": "rn-a"},
+                ],
+            ]
+
+    proxy = EpisodeProxy()
+    clusters = Clusters()
+    cache = AugmentCache(maxsize=4)
+    pipeline = AugmentPipeline(
+        template_service=NoTemplates(),
+        slot_filler=None,
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=proxy,
+        cache=cache,
+        raptor_index=clusters,
+        episode_clusters=2,
+        episode_chunks=4,
+    )
+
+    result = await pipeline.augment_context(
+        "Lyra swore an oath", chapter=5, mode=AugmentMode.EPISODES
+    )
+
+    assert clusters.calls == [("Lyra swore an oath", 2)]
+    [[[facts], [chunks]]] = proxy.groups
+    for cypher in (facts, chunks):
+        assert 'UNWIND ["rn-a", "rn-b"] AS rid' in cypher
+        assert "chunk.chapter <= 5" in cypher
+        assert "collect(chunk)[..4]" in cypher
+    assert "MATCH (chunk)-[:MENTIONS]->()-[r]-()" in facts
+    # a fact restated by a later chunk still belongs to the earlier episode
+    assert "WHERE chunk.id IN coalesce(r.chunk_ids, [r.chunk_id])" in facts
+    assert 'NOT type(r) STARTS WITH "ARCHIVED_"' in facts
+    assert "chunk.text AS text" in chunks and "MENTIONS" not in chunks
+
+    context = result["context"]
+    assert [r["relation"] for r in context["rows"]] == ["MEMBER_OF"]
+    assert context["rows"][0]["meta_template_id"] == "raptor_episodes"
+    assert [(e["chunk_id"], e["distance"]) for e in context["episodes"]] == [
+        ("chunk-2", 0.05),
+        ("chunk-3", 0.05),
+        ("chunk-1", 0.2),
+    ]
+    # episodes depend on every later extraction, so they are never cached
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_augment_pipeline_episodes_without_index_falls_back(
+    jinja_env, identity_service
+):
+    from schemas.cypher import AugmentMode
+
+    class EmptyTemplates:
+        def __init__(self):
+            self.calls = 0
+
+        async def top_k_async(self, *a, **k):
+            self.calls += 1
+            return []
+
+    templates = EmptyTemplates()
+    pipeline = AugmentPipeline(
+        template_service=templates,
+        slot_filler=None,
+        identity_service=identity_service,
+        template_renderer=TemplateRenderer(jinja_env),
+        graph_proxy=None,
+    )
+    result = await pipeline.augment_context(
+        "text", chapter=1, mode=AugmentMode.EPISODES
+    )
+    assert templates.calls == 1
+    assert result["context"]["episodes"] == []
@@ -0,0 +1,140 @@
+"""Unit tests for batch clustering with :meth:`FlatRaptorIndex.insert_chunks`."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.raptor_index import FlatRaptorIndex
+
+
+class BatchCollection:
+    """In-memory collection with the iterator and batch API used by the index."""
+
+    def __init__(self, fail=False):
+        self.objects = {}
+        self.vectors = {}
+        self.updates = []
+        self.batched = []
+        self.fail = fail
+        self.data = SimpleNamespace(update=self._update)
+        self.batch = SimpleNamespace(fixed_size=self._fixed_size, failed_objects=[])
+
+    def iterator(self, include_vector=False, return_properties=None):
+        for uuid, props in self.objects.items():
+            yield SimpleNamespace(
+                uuid=uuid,
+                properties={k: props[k] for k in return_properties or props},
+                vector={"default": self.vectors[uuid]} if include_vector else {},
+            )
+
+    def _update(self, uuid, properties, vector=None):
+        self.updates.append(uuid)
+        self.objects[uuid].update(properties)
+        self.vectors[uuid] = list(vector)
+
+    def _fixed_size(self, batch_size):
+        coll = self
+
+        class Batch:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                if coll.fail:
+                    coll.batch.failed_objects = [SimpleNamespace(message="boom")]
+
+            def add_object(self, uuid, properties, vector):
+                coll.batched.append(uuid)
+                coll.objects[uuid] = dict(properties)
+                coll.vectors[uuid] = list(vector)
+
+        return Batch()
+
+
+def _client(coll):
+    return SimpleNamespace(
+        collections=SimpleNamespace(
+            exists=lambda name: True, get=lambda name: coll, create=None
+        )
+    )
+
+
+def _angle(text):
+    angle = np.deg2rad(float(text.split(":")[1]))
+    return [float(np.cos(angle)), float(np.sin(angle))]
+
+
+def _single(text):
+    raise AssertionError("single-text embedder must not be used")
+
+
+def test_insert_chunks_merges_with_stored_and_batch_nodes():
+    coll = BatchCollection()
+    coll.objects["old"] = {"size": 2}
+    coll.vectors["old"] = _angle("angle:0")
+    calls = []
+
+    def batch_embedder(texts):
+        calls.append(list(texts))
+        return [_angle(t) for t in texts]
+
+    idx = FlatRaptorIndex(
+        _client(coll), embedder=_single, alpha=1.0, batch_embedder=batch_embedder
+    )
+    pairs = [(f"angle:{a}", f"angle:{a}") for a in (2, 90, 92, 180)]
+    ids = idx.insert_chunks(pairs)
+
+    assert len(calls) == 1 and len(calls[0]) == 8
+    assert ids[0] == "old"
+    assert ids[1] == ids[2] != ids[3]
+    assert coll.updates == ["old"]
+    assert coll.batched == [ids[1], ids[3]]
+    assert coll.objects["old"]["size"] == 3
+    np.testing.assert_allclose(
+        coll.vectors["old"],
+        (2 * np.array(_angle("angle:0")) + np.array(_angle("angle:2"))) / 3,
+    )
+    assert coll.objects[ids[1]] == {"size": 2}
+    np.testing.assert_allclose(
+        coll.vectors[ids[1]],
+        (np.array(_angle("angle:90")) + np.array(_angle("angle:92"))) / 2,
+    )
+
+
+def test_insert_chunks_full_layout_stores_first_chunk_vectors():
+    coll = BatchCollection()
+    idx = FlatRaptorIndex(
+        _client(coll),
+        embedder=_single,
+        alpha=0.5,
+        layout="full",
+        batch_embedder=lambda texts: [_angle(t) for t in texts],
+    )
+    (rid,) = idx.insert_chunks([("angle:0", "angle:90")])
+    props = coll.objects[rid]
+    assert props["text_vec"] == pytest.approx([1.0, 0.0])
+    assert props["fact_vec"] == pytest.approx([0.0, 1.0])
+    assert props["centroid"] == pytest.approx([0.5, 0.5])
+
+
+def test_insert_chunks_without_batch_embedder_calls_embedder_per_text():
+    coll = BatchCollection()
+    seen = []
+
+    def embedder(text):
+        seen.append(text)
+        return _angle(text)
+
+    idx = FlatRaptorIndex(_client(coll), embedder=embedder)
+    assert idx.insert_chunks([]) == []
+    ids = idx.insert_chunks([("angle:0", "angle:0"), ("angle:1", "angle:1")])
+    assert seen == ["angle:0", "angle:1", "angle:0", "angle:1"]
+    assert ids[0] == ids[1]
+
+
+def test_insert_chunks_raises_on_failed_objects():
+    coll = BatchCollection(fail=True)
+    idx = FlatRaptorIndex(_client(coll), embedder=_angle)
+    with pytest.raises(RuntimeError, match="boom"):
+        idx.insert_chunks([("angle:0", "angle:0")])
@@ -15,11 +15,15 @@ class DummyData:
     def insert(self, uuid, properties, vector):
         self.parent.calls.append((uuid, properties, vector))
 
+    def update(self, uuid, properties, vector=None):
+        self.parent.updates.append((uuid, properties, vector))
+
 
 class DummyCollection:
     def __init__(self):
         self.data = DummyData(self)
         self.calls = []
+        self.updates = []
 
         class Q:
             def near_vector(self, **kwargs):
@@ -64,10 +68,20 @@ def test_insert_chunk():
     idx = TestIndex(client, embedder=fake_embedder, alpha=0.5)
     rid = idx.insert_chunk("text", "fact")
     uuid, props, vec = client.coll.calls[0]
-    assert props["centroid"] == [2.0, 2.0]
+    assert vec == [2.0, 2.0]
+    assert props == {"size": 1}
     assert rid
 
 
+def test_insert_chunk_full_layout_keeps_arrays():
+    client = DummyClient()
+    idx = TestIndex(client, embedder=fake_embedder, alpha=0.5, layout="full")
+    idx.insert_chunk("text", "fact")
+    _, props, _ = client.coll.calls[0]
+    assert props["text_vec"] == [1.0, 1.0]
+    assert props["centroid"] == [2.0, 2.0]
+
+
 from weaviate.classes.config import Property
 
 
@@ -95,11 +109,17 @@ class SchemaClient(DummyClient):
 
 def test_ensure_schema_creates_collection():
     client = SchemaClient()
-    FlatRaptorIndex(client, embedder=fake_embedder)
+    FlatRaptorIndex(client, embedder=fake_embedder, layout="full")
     props = client.created["properties"]
     assert any(isinstance(p, Property) and p.name == "text_vec" for p in props)
 
 
+def test_ensure_schema_compact_layout_has_no_vector_arrays():
+    client = SchemaClient()
+    FlatRaptorIndex(client, embedder=fake_embedder)
+    assert [p.name for p in client.created["properties"]] == ["size"]
+
+
 def test_ensure_schema_skips_if_exists():
     client = SchemaClient(exists=True)
     FlatRaptorIndex(client, embedder=fake_embedder)
@@ -114,7 +134,18 @@ class MergeQuery:
         if self.dist is None:
             return type("Res", (), {"objects": []})
         meta = type("M", (), {"distance": self.dist})()
-        obj = type("O", (), {"uuid": "existing", "metadata": meta, "properties": {}})
+        props = {"size": 3}
+        vector = {"default": [0.0, 0.0]}
+        obj = type(
+            "O",
+            (),
+            {
+                "uuid": "existing",
+                "metadata": meta,
+                "properties": props,
+                "vector": vector,
+            },
+        )
         return type("Res", (), {"objects": [obj]})
 
 
@@ -151,6 +182,8 @@ def test_insert_chunk_merges_if_similar():
     node_id = idx.insert_chunk("text", "fact")
     assert node_id == "existing"
     assert not client.coll.calls
+    # running mean over 3 members at the origin plus the new [2, 2] chunk
+    assert client.coll.updates == [("existing", {"size": 4}, [0.5, 0.5])]
 
 
 def test_insert_chunk_creates_if_distant():
@@ -159,3 +192,9 @@ def test_insert_chunk_creates_if_distant():
     node_id = idx.insert_chunk("text", "fact")
     assert client.coll.calls
     assert node_id != "existing"
+
+
+def test_nearest_leaves_is_one_ann_query():
+    client = MergeClient(0.25)
+    idx = TestIndex(client, embedder=fake_embedder)
+    assert idx.nearest_leaves("text", k=3) == [("existing", 0.25)]
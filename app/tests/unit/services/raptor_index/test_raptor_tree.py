@@ -0,0 +1,313 @@
+"""Unit tests for :class:`RaptorTreeIndex` over an in-memory collection."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.raptor_index import (
+    ROOT_ID,
+    RaptorTreeIndex,
+    VectorLayout,
+    cosine_distances,
+    decode_f16,
+)
+
+
+class MemoryCollection:
+    """Just enough of a Weaviate collection: filter by one property."""
+
+    def __init__(self):
+        self.objects = {}
+        self.vectors = {}
+        self.added_props = []
+        self.data = SimpleNamespace(
+            insert=self._insert, update=self._update, replace=self._replace
+        )
+        self.query = SimpleNamespace(
+            fetch_objects=self._fetch, fetch_object_by_id=self._by_id
+        )
+        self.config = SimpleNamespace(
+            get=lambda: SimpleNamespace(properties=[SimpleNamespace(name="text_vec")]),
+            add_property=self.added_props.append,
+        )
+        self.fetches = 0
+
+    def _insert(self, uuid, properties, vector):
+        self.objects[uuid] = dict(properties)
+        self.vectors[uuid] = list(vector)
+
+    def _update(self, uuid, properties, vector=None):
+        self.objects[uuid].update(properties)
+        if vector is not None:
+            self.vectors[uuid] = list(vector)
+
+    def _replace(self, uuid, properties, vector):
+        self._insert(uuid, properties, vector)
+
+    def _obj(self, uuid, include_vector=False, return_properties=None):
+        props = self.objects[uuid]
+        if return_properties is not None:
+            props = {k: v for k, v in props.items() if k in return_properties}
+        vector = {"default": self.vectors[uuid]} if include_vector else {}
+        return SimpleNamespace(uuid=uuid, properties=dict(props), vector=vector)
+
+    def _fetch(self, filters, limit, **kwargs):
+        self.fetches += 1
+        hits = [
+            self._obj(u, **kwargs)
+            for u, p in self.objects.items()
+            if p.get(filters.target) == filters.value
+        ]
+        return SimpleNamespace(objects=hits[:limit])
+
+    def _by_id(self, uuid, **kwargs):
+        return self._obj(uuid, **kwargs)
+
+
+class MemoryClient:
+    def __init__(self, exists=True):
+        self.coll = MemoryCollection()
+        self.collections = SimpleNamespace(
+            exists=lambda name: exists,
+            get=lambda name: self.coll,
+            create=lambda **kwargs: None,
+        )
+
+
+def unit_embedder(text):
+    """Map ``"angle:<degrees>"`` onto the unit circle."""
+    angle = np.deg2rad(float(text.split(":")[1]))
+    return [float(np.cos(angle)), float(np.sin(angle))]
+
+
+def _tree(max_children=3, layout=VectorLayout.COMPACT):
+    client = MemoryClient()
+    idx = RaptorTreeIndex(
+        client,
+        embedder=unit_embedder,
+        alpha=1.0,
+        layout=layout,
+        max_children=max_children,
+    )
+    return idx, client.coll
+
+
+def _check_invariants(coll, max_children):
+    nodes = coll.objects
+    for uid, props in nodes.items():
+        children = [p for p in nodes.values() if p["parent_id"] == uid]
+        if props["level"] == 0:
+            assert not children
+            continue
+        assert 0 < len(children) <= max_children
+        assert all(c["level"] == props["level"] - 1 for c in children)
+        assert props["size"] == sum(c["size"] for c in children)
+    roots = [p for p in nodes.values() if p["parent_id"] == ROOT_ID]
+    assert len(roots) <= max_children
+    assert len({p["level"] for p in roots}) == 1
+
+
+def test_ensure_schema_adds_tree_properties_to_flat_collection():
+    _, coll = _tree()
+    assert [p.name for p in coll.added_props] == ["size", "level", "parent_id"]
+
+
+def test_full_layout_keeps_array_properties():
+    _, coll = _tree(layout=VectorLayout.FULL)
+    assert [p.name for p in coll.added_props] == [
+        "size",
+        "fact_vec",
+        "centroid",
+        "level",
+        "parent_id",
+    ]
+
+
+def test_insert_merges_close_chunks_and_updates_parents():
+    idx, coll = _tree()
+    first = idx.insert_chunk("angle:0", "angle:0")
+    assert idx.insert_chunk("angle:1", "angle:1") == first
+    assert len(coll.objects) == 1
+    assert coll.objects[first]["size"] == 2
+    assert coll.objects[first]["parent_id"] == ROOT_ID
+
+
+def test_tree_grows_levels_and_keeps_invariants():
+    idx, coll = _tree(max_children=3)
+    leaves = {}
+    for angle in range(0, 360, 30):
+        leaves[angle] = idx.insert_chunk(f"angle:{angle}", f"angle:{angle}")
+        _check_invariants(coll, 3)
+
+    assert len(set(leaves.values())) == 12
+    levels = {p["level"] for p in coll.objects.values()}
+    assert max(levels) >= 2
+    roots = [p for p in coll.objects.values() if p["parent_id"] == ROOT_ID]
+    assert sum(p["size"] for p in roots) == 12
+    # root summaries are the mean of every chunk beneath them
+    for uid, props in coll.objects.items():
+        if props["level"] == 1:
+            kids = [u for u, p in coll.objects.items() if p["parent_id"] == uid]
+            expected = np.mean([coll.vectors[k] for k in kids], axis=0)
+            assert np.allclose(coll.vectors[uid], expected)
+
+
+def test_nearest_leaves_descends_coarse_to_fine():
+    idx, coll = _tree(max_children=3)
+    ids = {a: idx.insert_chunk(f"angle:{a}", f"angle:{a}") for a in range(0, 360, 30)}
+    coll.fetches = 0
+
+    hits = idx.nearest_leaves("angle:92", k=2, beam=1)
+
+    assert hits[0][0] == ids[90]
+    assert hits[0][1] <= hits[-1][1]
+    # one fetch per visited level, not per leaf
+    height = max(p["level"] for p in coll.objects.values()) + 1
+    assert coll.fetches <= height
+
+    # a beam as wide as the tree is an exact search
+    exact = idx.nearest_leaves("angle:92", k=2, beam=len(coll.objects))
+    assert [h[0] for h in exact] == [ids[90], ids[120]]
+
+
+def test_cosine_distances_handles_zero_vectors():
+    d = cosine_distances([[1.0, 0.0], [0.0, 0.0], [0.0, 2.0]], [1.0, 0.0])
+    assert d.tolist() == pytest.approx([0.0, 1.0, 1.0])
+
+
+def test_max_children_must_allow_a_split():
+    with pytest.raises(ValueError):
+        RaptorTreeIndex(MemoryClient(), embedder=unit_embedder, max_children=1)
+
+
+def test_insert_chunks_embeds_once_and_places_like_single_inserts():
+    calls = []
+
+    def batch_embedder(texts):
+        calls.append(len(texts))
+        return [unit_embedder(t) for t in texts]
+
+    client = MemoryClient()
+    idx = RaptorTreeIndex(
+        client,
+        embedder=unit_embedder,
+        alpha=1.0,
+        max_children=3,
+        batch_embedder=batch_embedder,
+    )
+    angles = list(range(0, 360, 30)) + [1]
+    ids = idx.insert_chunks([(f"angle:{a}", f"angle:{a}") for a in angles])
+
+    assert calls == [2 * len(angles)]
+    assert ids[-1] == ids[0]
+    assert len(set(ids)) == 12
+    _check_invariants(client.coll, 3)
+
+
+def test_insert_chunks_descends_existing_tree_together():
+    """A batch reads each visited node once and keeps the tree valid."""
+    trees = [_tree(max_children=3), _tree(max_children=3)]
+    leaves = [
+        {a: idx.insert_chunk(f"angle:{a}", f"angle:{a}") for a in range(0, 360, 30)}
+        for idx, _ in trees
+    ][0]
+    angles = [1, 31, 200, 215, 347]
+    pairs = [(f"angle:{a}", f"angle:{a}") for a in angles]
+
+    (batch, coll), (single, single_coll) = trees
+    coll.fetches = single_coll.fetches = 0
+    ids = batch.insert_chunks(pairs)
+    for text, triples in pairs:
+        single.insert_chunk(text, triples)
+
+    assert ids[0] == ids[4] == leaves[0] and ids[1] == leaves[30]
+    assert coll.objects[leaves[0]]["size"] == 3
+    _check_invariants(coll, 3)
+    roots = [p for p in coll.objects.values() if p["parent_id"] == ROOT_ID]
+    assert sum(p["size"] for p in roots) == 17
+    assert coll.fetches < single_coll.fetches
+
+
+def test_insert_chunks_splits_a_parent_overfilled_by_many_leaves():
+    client = MemoryClient()
+    idx = RaptorTreeIndex(
+        client, embedder=unit_embedder, alpha=1.0, max_children=3, merge_distance=0.01
+    )
+    coll = client.coll
+    ids = idx.insert_chunks([(f"angle:{a}", f"angle:{a}") for a in range(0, 360, 15)])
+    assert len(set(ids)) == 24
+    _check_invariants(coll, 3)
+    roots = [p for p in coll.objects.values() if p["parent_id"] == ROOT_ID]
+    assert sum(p["size"] for p in roots) == 24
+
+
+def test_merge_moves_leaf_centroid_as_running_mean():
+    idx, coll = _tree()
+    leaf = idx.insert_chunk("angle:0", "angle:0")
+    idx.insert_chunk("angle:10", "angle:10")
+    expected = np.mean([unit_embedder("angle:0"), unit_embedder("angle:10")], axis=0)
+    assert coll.objects[leaf]["size"] == 2
+    assert np.allclose(coll.vectors[leaf], expected)
+
+
+def test_rebuild_replaces_nodes_with_weighted_clusters():
+    idx, coll = _tree(max_children=2)
+    for a in (0, 90, 180):
+        idx.insert_chunk(f"angle:{a}", f"angle:{a}")
+    old = set(coll.objects)
+    coll.data.delete_many = lambda where: [coll.objects.pop(u) for u in where.value]
+    coll.iterator = lambda: [SimpleNamespace(uuid=u) for u in list(coll.objects)]
+
+    ids, deleted = idx.rebuild([([1.0, 0.0], 4), ([0.0, 1.0], 2), ([-1.0, 0.0], 1)])
+
+    assert set(deleted) == old
+    assert not old & set(coll.objects)
+    assert all(coll.objects[i]["level"] == 0 for i in ids)
+    assert [coll.objects[i]["size"] for i in ids] == [4, 2, 1]
+    _check_invariants(coll, 2)
+    roots = [p for p in coll.objects.values() if p["parent_id"] == ROOT_ID]
+    assert sum(p["size"] for p in roots) == 7
+
+
+def test_compact_layout_stores_only_the_object_vector():
+    idx, coll = _tree()
+    leaf = idx.insert_chunk("angle:0", "angle:0")
+    assert set(coll.objects[leaf]) == {"level", "parent_id", "size"}
+    assert coll.vectors[leaf] == pytest.approx([1.0, 0.0])
+
+
+def test_float16_layout_stores_parts_as_blobs():
+    idx, coll = _tree(layout=VectorLayout.FLOAT16)
+    leaf = idx.insert_chunk("angle:60", "angle:60")
+    props = coll.objects[leaf]
+    assert "centroid" not in props and "text_vec" not in props
+    assert decode_f16(props["text_vec_f16"]) == pytest.approx(
+        unit_embedder("angle:60"), abs=1e-3
+    )
+
+
+def test_compact_nodes_rewrites_full_layout_objects():
+    full, coll = _tree(layout=VectorLayout.FULL)
+    leaf = full.insert_chunk("angle:0", "angle:0")
+    assert "text_vec" in coll.objects[leaf]
+    coll.iterator = lambda include_vector=False: [
+        coll._obj(u, include_vector=include_vector) for u in list(coll.objects)
+    ]
+
+    compact = RaptorTreeIndex(
+        MemoryClient(), embedder=unit_embedder, layout=VectorLayout.FLOAT16
+    )
+    compact.client = SimpleNamespace(collections=SimpleNamespace(get=lambda n: coll))
+
+    assert compact.compact_nodes_sync() == 1
+    assert set(coll.objects[leaf]) == {
+        "level",
+        "parent_id",
+        "size",
+        "text_vec_f16",
+        "fact_vec_f16",
+    }
+    assert coll.vectors[leaf] == pytest.approx([1.0, 0.0])
+    # already compact objects are left alone
+    assert compact.compact_nodes_sync() == 0
@@ -0,0 +1,161 @@
+"""Unit tests for :class:`RaptorOutbox` and :class:`RaptorWorker`."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.raptor_index import encode_f16
+from services.raptor_outbox import RaptorOutbox, RaptorWorker
+
+
+class FakeIndex:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.inserted = []
+        self.batches = []
+
+    def embed_chunks(self, chunks):
+        if any(text in self.fail_on for text, _ in chunks):
+            raise RuntimeError("embedding failed")
+        n = len(chunks)
+        return np.ones((n, 1)), np.zeros((n, 1)), np.full((n, 1), 0.5)
+
+    def insert_vector_batch(self, text_vecs, fact_vecs, centroids):
+        self.batches.append(len(centroids))
+        ids = []
+        for centroid in centroids:
+            self.inserted.append(centroid.tolist())
+            ids.append(f"rn-{len(self.inserted)}")
+        return ids
+
+
+def test_outbox_survives_reopen_and_leases_items(tmp_path):
+    path = tmp_path / "outbox" / "raptor.sqlite3"
+    box = RaptorOutbox(str(path))
+    box.put("chunk-1", "a", "A")
+    box.put("chunk-2", "b", "B")
+    box.put("chunk-1", "a", "A2")  # re-queued chunk keeps its place
+
+    reopened = RaptorOutbox(str(path))
+    assert len(reopened) == 2
+    first = reopened.claim(1)
+    assert [(i.chunk_id, i.triple_text, i.attempts) for i in first] == [
+        ("chunk-1", "A2", 1)
+    ]
+    # leased items are skipped by other claimers
+    assert [i.chunk_id for i in box.claim(5)] == ["chunk-2"]
+    assert box.claim(5) == []
+
+    reopened.release(first[0].id)
+    again = box.claim(5)
+    assert [(i.chunk_id, i.attempts) for i in again] == [("chunk-1", 2)]
+    box.ack(again[0].id)
+    assert len(box) == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_clusters_and_updates_chunks(graph_proxy):
+    box = RaptorOutbox(":memory:")
+    worker = RaptorWorker(box, FakeIndex(fail_on={"bad"}), graph_proxy, batch_size=1)
+    await worker.enqueue("chunk-1", "good", "facts")
+    await worker.enqueue("chunk-2", "bad", "facts")
+
+    assert await worker.drain() == 1
+
+    assert graph_proxy.unwind_calls == [
+        (
+            "MATCH (c:Chunk {id: row.cid}) "
+            "SET c.raptor_node_id = row.rid, c.raptor_vec_f16 = row.vec, "
+            "c.triple_text = row.triples REMOVE c.raptor_vec",
+            [
+                {
+                    "cid": "chunk-1",
+                    "rid": "rn-1",
+                    "vec": encode_f16([0.5]),
+                    "triples": "facts",
+                }
+            ],
+            None,
+        )
+    ]
+    # the failed item stays queued until its retry delay passes
+    assert len(box) == 1
+    assert box.claim(5) == []
+
+
+@pytest.mark.asyncio
+async def test_worker_clusters_a_lease_in_one_batch(graph_proxy):
+    box = RaptorOutbox(":memory:")
+    index = FakeIndex()
+    worker = RaptorWorker(box, index, graph_proxy, batch_size=16)
+    for i in range(3):
+        await worker.enqueue(f"chunk-{i}", f"text {i}", "facts")
+
+    assert await worker.drain() == 3
+
+    assert index.batches == [3]
+    ((_, rows, _),) = graph_proxy.unwind_calls
+    assert [(r["cid"], r["rid"]) for r in rows] == [
+        ("chunk-0", "rn-1"),
+        ("chunk-1", "rn-2"),
+        ("chunk-2", "rn-3"),
+    ]
+    assert len(box) == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_a_failed_batch_item_by_item(graph_proxy):
+    box = RaptorOutbox(":memory:")
+    index = FakeIndex(fail_on={"bad"})
+    worker = RaptorWorker(box, index, graph_proxy, batch_size=16)
+    for text in ("good", "bad", "fine"):
+        await worker.enqueue(f"chunk-{text}", text, "facts")
+
+    assert await worker.process_batch() == 2
+
+    assert index.batches == [1, 1]
+    cids = [rows[0]["cid"] for _, rows, _ in graph_proxy.unwind_calls]
+    assert cids == ["chunk-good", "chunk-fine"]
+    assert len(box) == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_dead_letters_item_after_max_attempts(graph_proxy):
+    box = RaptorOutbox(":memory:", max_attempts=2)
+    worker = RaptorWorker(box, FakeIndex(fail_on={"bad"}), graph_proxy, retry_delay=0)
+    await worker.enqueue("chunk-1", "bad", "facts")
+
+    assert await worker.drain() == 0  # first attempt, released for retry
+    assert len(box) == 1
+    assert await worker.drain() == 0  # second attempt exhausts the budget
+    assert len(box) == 0
+    assert box.dead_count() == 1
+    error = box._conn.execute("SELECT error FROM raptor_outbox_dead").fetchone()
+    assert error == ("embedding failed",)
+
+
+def test_outbox_dead_letters_expired_lease_at_max_attempts():
+    box = RaptorOutbox(":memory:", lease_seconds=0, max_attempts=1)
+    box.put("chunk-1", "a", "A")
+    assert [i.attempts for i in box.claim(5)] == [1]
+    # the worker died without releasing; the expired item is not handed out again
+    assert box.claim(5) == []
+    assert len(box) == 0 and box.dead_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_background_task_wakes_on_enqueue(graph_proxy):
+    worker = RaptorWorker(
+        RaptorOutbox(":memory:"), FakeIndex(), graph_proxy, poll_interval=60
+    )
+    worker.start()
+    await worker.enqueue("chunk-1", "text", "facts")
+    for _ in range(100):
+        if graph_proxy.unwind_calls:
+            break
+        await asyncio.sleep(0.01)
+    await worker.stop()
+    await worker.stop()
+    assert graph_proxy.unwind_calls[0][1][0]["cid"] == "chunk-1"
+    assert len(worker.outbox) == 0
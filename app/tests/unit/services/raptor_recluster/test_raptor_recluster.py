@@ -0,0 +1,141 @@
+"""Unit tests for mini-batch k-means and :class:`RaptorReclusterJob`."""
+
+import numpy as np
+import pytest
+
+from services.raptor_index import decode_f16, encode_f16
+from services.raptor_recluster import RaptorReclusterJob, minibatch_kmeans
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centres = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    points = np.concatenate([c + rng.normal(0, 0.05, (40, 3)) for c in centres])
+    return points, np.repeat([0, 1, 2], 40)
+
+
+def test_minibatch_kmeans_recovers_blobs():
+    points, truth = _blobs()
+    centres, labels = minibatch_kmeans(points, 3, batch_size=32, max_iter=50)
+    assert centres.shape == (3, 3)
+    assert np.allclose(np.linalg.norm(centres, axis=1), 1.0, atol=1e-5)
+    # every true blob maps to exactly one cluster
+    for blob in range(3):
+        assert len(set(labels[truth == blob])) == 1
+    assert len(set(labels)) == 3
+
+
+def test_minibatch_kmeans_caps_k_and_handles_empty():
+    centres, labels = minibatch_kmeans(np.eye(2), 5)
+    assert len(centres) == 2 and sorted(labels) == [0, 1]
+    centres, labels = minibatch_kmeans(np.empty((0, 3)), 3)
+    assert len(centres) == 0 and len(labels) == 0
+
+
+class RecordingProxy:
+    def __init__(self, chunks, stragglers=()):
+        self.chunks = chunks
+        self.stragglers = list(stragglers)
+        self.queries = []
+        self.unwind_calls = []
+
+    async def run_query(self, cypher, params=None, *, write=True):
+        self.queries.append((cypher, params))
+        if "raptor_node_id IN $deleted" in cypher:
+            return self.stragglers
+        return self.chunks
+
+    async def run_unwind(self, cypher, rows, params=None, *, write=True):
+        self.unwind_calls.append((cypher, list(rows)))
+        return []
+
+
+class RebuildIndex:
+    def __init__(self):
+        self.clusters = None
+        self.inserted = []
+        self.resets = 0
+        self.embedded = []
+
+    def reset(self):
+        self.resets += 1
+
+    def embed_chunks(self, chunks):
+        # one call per run, like the batch embedder behind the real index
+        self.embedded.append(list(chunks))
+        vecs = np.tile([0.0, 0.0, 1.0], (len(chunks), 1))
+        return vecs, vecs, vecs
+
+    def rebuild(self, clusters):
+        self.clusters = clusters
+        return [f"new-{i}" for i in range(len(clusters))], ["old-1"]
+
+    def insert_vectors(self, text_vec, fact_vec, centroid):
+        self.inserted.append(centroid)
+        return "late"
+
+
+@pytest.mark.asyncio
+async def test_job_reassigns_chunks_in_bulk():
+    points, truth = _blobs()
+    chunks = [
+        {"id": f"c{i}", "blob": encode_f16(p), "vec": None, "text": None}
+        for i, p in enumerate(points)
+    ]
+    # c1 still carries the float list written before vectors were blobs
+    chunks[1] = {"id": "c1", "blob": None, "vec": points[1].tolist(), "text": None}
+    chunks.append(
+        {
+            "id": "legacy",
+            "blob": None,
+            "vec": None,
+            "text": "old chunk",
+            "triple_text": "a -> b",
+        }
+    )
+    chunks.append({"id": "empty", "blob": None, "vec": None, "text": None})
+    late_blob = encode_f16([1.0, 0.0, 0.0])
+    proxy = RecordingProxy(chunks, [{"id": "late", "blob": late_blob, "vec": None}])
+    index = RebuildIndex()
+    job = RaptorReclusterJob(proxy, index, cluster_size=40, max_iter=50)
+
+    stats = await job.run()
+
+    assert stats == {"chunks": 121, "clusters": 4, "backfilled": 1, "stragglers": 1}
+    assert sum(size for _, size in index.clusters) == 121
+    assert index.embedded == [[("old chunk", "a -> b")]]
+    (_, assigned), (_, late) = proxy.unwind_calls
+    by_id = {row["id"]: row for row in assigned}
+    # chunks of one blob share a node; the legacy chunk keeps its new vector
+    assert len({by_id[f"c{i}"]["rid"] for i in range(40)}) == 1
+    assert decode_f16(by_id["legacy"]["vec"]) == [0.0, 0.0, 1.0]
+    assert by_id["c0"]["vec"] is None
+    assert decode_f16(by_id["c1"]["vec"]) == pytest.approx(points[1], abs=1e-3)
+    assert late == [{"id": "late", "rid": "late", "vec": None}]
+    assert index.inserted == [[1.0, 0.0, 0.0]]
+    assert proxy.queries[-1][1] == {"deleted": ["old-1"], "ids": list(by_id)}
+
+
+@pytest.mark.asyncio
+async def test_job_without_chunks_is_noop():
+    proxy = RecordingProxy([])
+    stats = await RaptorReclusterJob(proxy, RebuildIndex()).run()
+    assert stats["chunks"] == 0
+    assert proxy.unwind_calls == []
+
+
+@pytest.mark.asyncio
+async def test_job_reembed_recreates_index_from_chunk_texts():
+    # with ``reembed`` the query drops stored vectors and returns every text
+    chunks = [{"id": f"c{i}", "vec": None, "text": f"chunk {i}"} for i in range(3)]
+    proxy = RecordingProxy(chunks)
+    index = RebuildIndex()
+
+    stats = await RaptorReclusterJob(proxy, index, cluster_size=2).run(reembed=True)
+
+    assert proxy.queries[0][1] == {"reembed": True}
+    assert index.resets == 1
+    assert stats["backfilled"] == 3
+    assert index.embedded == [[(f"chunk {i}", "") for i in range(3)]]
+    (_, assigned), _ = proxy.unwind_calls
+    assert all(decode_f16(row["vec"]) == [0.0, 0.0, 1.0] for row in assigned)
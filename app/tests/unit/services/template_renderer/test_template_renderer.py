@@ -12,7 +12,7 @@ from schemas.cypher import CypherTemplate, SlotDefinition, GraphRelationDescript
 from schemas.slots import SlotFill
 from services.template_renderer import TemplateRenderer
 from schemas.cypher import TemplateRenderMode
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
 
 
 def test_render_returns_triple_and_nodes(sample_template, slot_fill, template_renderer):
@@ -64,12 +64,12 @@ def test_use_base_includes_base(jinja_env, sample_template, slot_fill):
 
 def test_render_includes_details(jinja_env):
     """Ensure SlotFill.details is inserted via the relation meta snippet."""
-    jinja_env.loader.mapping["_relation_meta.j2"] = (
+    jinja_env.loader.mapping["_details_meta.j2"] = (
         'details: "{{ details }}", description: "{{ description }}"'
     )
     jinja_env.loader.mapping["with_meta.j2"] = (
         "MERGE (a:Character {id: '{{ character }}'})\n"
-        "MERGE (a)-[:REL { {% include '_relation_meta.j2' %} }]-(b)\n"
+        "MERGE (a)-[:REL { {% include '_details_meta.j2' %} }]-(b)\n"
         "{% set related_node_ids=[character] %}"
     )
     template = CypherTemplate(
@@ -174,6 +174,93 @@ def test_relocation_augment_ignores_place_id():
     assert "Place {id" not in plan.content_cypher
 
 
+@pytest.mark.parametrize("include_history", [False, True])
+def test_augment_matches_archived_edges_on_request(include_history):
+    """Superseded ``ARCHIVED_*`` edges are matched only with history enabled."""
+    env = Environment(
+        loader=FileSystemLoader("app/templates/cypher"), undefined=StrictUndefined
+    )
+    import schemas.cypher as cypher_mod
+
+    cypher_mod.env = env
+    renderer = TemplateRenderer(env)
+    template = CypherTemplate(
+        id=uuid4(),
+        name="rel_test",
+        title="t",
+        description="d",
+        slots={
+            "character_a": SlotDefinition(name="character_a", type="STRING"),
+            "character_b": SlotDefinition(name="character_b", type="STRING"),
+            "relation_type": SlotDefinition(name="relation_type", type="STRING"),
+        },
+        augment_cypher="character_relation_aug_v1.j2",
+        return_map={"a": "Character", "b": "Character"},
+    )
+    fill = SlotFill(
+        template_id=str(template.id),
+        slots={"character_a": "c1", "character_b": "c2", "relation_type": "friend"},
+        details="",
+    )
+    meta = {"chunk_id": "c", "chapter": 2, "include_history": include_history}
+    plan = renderer.render(template, fill, meta, mode=TemplateRenderMode.AUGMENT)
+
+    expected = (
+        "[r:`FRIEND_OF`|`ARCHIVED_FRIEND_OF`]"
+        if include_history
+        else ("[r:`FRIEND_OF`]")
+    )
+    assert expected in plan.content_cypher
+    assert 'type(r) STARTS WITH "ARCHIVED_" AS meta_archived' in plan.content_cypher
+
+
+def test_chunk_mentions_labels_and_deferral():
+    """MENTIONS lookups are labelled; ``defer_mentions`` drops the tail."""
+    env = Environment(
+        loader=FileSystemLoader("app/templates/cypher"), undefined=StrictUndefined
+    )
+    import schemas.cypher as cypher_mod
+
+    cypher_mod.env = env
+    renderer = TemplateRenderer(env)
+    template = CypherTemplate(
+        id=uuid4(),
+        name="own_test",
+        title="t",
+        description="d",
+        slots={
+            "character": SlotDefinition(name="character", type="STRING"),
+            "item": SlotDefinition(name="item", type="STRING"),
+        },
+        extract_cypher="ownership_v1.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="OWNS_ITEM", subject="$character", object="$item"
+        ),
+        return_map={"c": "Character", "i": "Item"},
+    )
+    fill = SlotFill(
+        template_id=str(template.id),
+        slots={"character": "c1", "item": "i1"},
+        details="",
+    )
+    meta = {
+        "chunk_id": "c",
+        "chapter": 1,
+        "draft_stage": 1,
+        "confidence": 0.2,
+        "score": 0.0,
+        "description": "d",
+    }
+    plan = renderer.render(template, fill, meta)
+    assert "WITH *" in plan.content_cypher
+    assert 'MATCH (x1:`Character` {id: "c1"})' in plan.content_cypher
+    assert 'MATCH (x2:`Item` {id: "i1"})' in plan.content_cypher
+    assert plan.related_node_labels == ["Character", "Item"]
+    plan = renderer.render(template, fill, {**meta, "defer_mentions": True})
+    assert "WITH *" not in plan.content_cypher
+    assert "MENTIONS" not in plan.content_cypher
+
+
 def test_shared_instructions_mentions_null_rule():
     """Prompt instructions should tell the model not to guess missing slots."""
     text = Path("app/core/slots/prompts/jinja/shared_instructions.j2").read_text()
@@ -190,6 +277,7 @@ def test_membership_filters_newline(jinja_env):
             ).read_text(),
             "_augment_filters.j2": (base / "_augment_filters.j2").read_text(),
             "_augment_meta.j2": (base / "_augment_meta.j2").read_text(),
+            "_rel_types.j2": (base / "_rel_types.j2").read_text(),
         }
     )
     template = CypherTemplate(
@@ -211,6 +299,11 @@ def test_membership_filters_newline(jinja_env):
     meta = {"chunk_id": "c", "chapter": 1}
     plan = renderer.render(template, fill, meta, mode=TemplateRenderMode.AUGMENT)
     assert "\nWITH r, f" in plan.content_cypher
+    # the current faction is the latest restated membership up to the chapter
+    assert (
+        "ORDER BY CASE WHEN coalesce(r.last_chapter, r.chapter) <= 1 "
+        "THEN coalesce(r.last_chapter, r.chapter) ELSE r.chapter END DESC"
+    ) in plan.content_cypher
 
 
 def test_augment_meta_optional_space(jinja_env):
@@ -223,6 +316,7 @@ def test_augment_meta_optional_space(jinja_env):
             ).read_text(),
             "_augment_filters.j2": (base / "_augment_filters.j2").read_text(),
             "_augment_meta.j2": (base / "_augment_meta.j2").read_text(),
+            "_rel_types.j2": (base / "_rel_types.j2").read_text(),
         }
     )
     template = CypherTemplate(
@@ -240,3 +334,68 @@ def test_augment_meta_optional_space(jinja_env):
     meta = {"chunk_id": "c", "chapter": 1}
     plan = renderer.render(template, fill, meta, mode=TemplateRenderMode.AUGMENT)
     assert " OPTIONAL MATCH" in plan.content_cypher
+
+
+def test_node_label_ignores_placeholder_labels():
+    """Labels disagreeing with the slot entity type are not trusted."""
+    template = CypherTemplate(
+        id=uuid4(),
+        name="destroy",
+        title="t",
+        description="d",
+        slots={
+            "target": SlotDefinition(
+                name="target",
+                type="STRING",
+                is_entity_ref=True,
+                entity_type="ITEM_OR_PLACE",
+            ),
+            "faction": SlotDefinition(
+                name="faction", type="STRING", is_entity_ref=True, entity_type="FACTION"
+            ),
+        },
+        extract_cypher="x.j2",
+        graph_relation=GraphRelationDescriptor(
+            predicate="IS_INTACT", subject="$target", object="$faction"
+        ),
+        return_map={"t": "Target", "f": "Faction"},
+    )
+    assert template.related_nodes({"target": "t1", "faction": "f1"}) == [
+        ("t1", None),
+        ("f1", "Faction"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "template_name, expected",
+    [
+        ("ownership_v1", "MERGE (c)-[r:OWNS_ITEM]->(i)"),
+        ("conflict_event_v1", "MERGE (a)-[r:ATTACKS]->(b)"),
+        ("character_relation_v1", "CALL apoc.merge.relationship("),
+    ],
+)
+def test_relations_are_upserted_per_fact(template_name, expected):
+    """Relations merge on (subject, type, object) and track chunk provenance."""
+    from templates.base import base_templates
+    from utils.helpers.cypher import cypher_escape
+
+    env = Environment(
+        loader=FileSystemLoader("app/templates/cypher"),
+        undefined=StrictUndefined,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        finalize=cypher_escape,
+    )
+    import schemas.cypher as cypher_mod
+
+    cypher_mod.env = env
+    raw = next(t for t in base_templates if t["name"] == template_name)
+    template = CypherTemplate(id=uuid4(), **raw)
+    slots = {name: "x" for name in template.slots}
+    slots.update(chapter=3, draft_stage=1, confidence=0.2, score=0.5, description="d")
+    cypher = template.render(slots, "chunk-1")
+
+    assert expected in cypher
+    assert "apoc.create.relationship" not in cypher
+    assert 'coalesce(r.chunk_ids, []) + "chunk-1"' in cypher
+    assert "r.occurrences" in cypher
@@ -4,6 +4,9 @@ The dummy client emulates Weaviate to verify that the service creates the
 collection only when needed and with the expected properties.
 """
 
+from contextlib import contextmanager
+from types import SimpleNamespace
+
 import pytest
 from services.templates import TemplateService
 from weaviate.classes.config import Property
@@ -45,3 +48,58 @@ def test_ensure_schema_skips_if_exists():
     client = DummyClient(exists=True)
     TemplateService(weaviate_client=client, embedder=lambda x: [])
     assert client.created is None
+
+
+def test_ensure_schema_applies_vector_index_spec():
+    client = DummyClient()
+    TemplateService(weaviate_client=client, embedder=lambda x: [], vector_index="flat")
+    cfg = client.created["vector_index_config"]
+    assert type(cfg).__name__ == "_VectorIndexConfigFlatCreate"
+
+
+def test_ensure_schema_keeps_server_default_index():
+    client = DummyClient()
+    TemplateService(weaviate_client=client, embedder=lambda x: [])
+    assert client.created["vector_index_config"] is None
+
+
+def test_reindex_reembeds_templates_into_recreated_collection():
+    objs = [
+        SimpleNamespace(
+            uuid="2f0c6f36-6f0e-4c7a-9a55-3f0a3c1b9c01",
+            metadata=None,
+            properties={
+                "name": "tpl",
+                "title": "Title",
+                "description": "Someone joins a faction",
+                "category": "membership",
+                "slots": {},
+                "extract_cypher": "simple.j2",
+                "return_map": {"character": "Character"},
+            },
+        )
+    ]
+    loaded = []
+
+    @contextmanager
+    def fixed_size(batch_size):
+        yield SimpleNamespace(
+            add_object=lambda properties, uuid, vector: loaded.append((uuid, vector))
+        )
+
+    coll = SimpleNamespace(
+        iterator=lambda: iter(objs),
+        batch=SimpleNamespace(fixed_size=fixed_size, failed_objects=[]),
+    )
+    client = DummyClient(exists=True)
+    client.collections.get = lambda name: coll
+    client.collections.delete = lambda name: setattr(client, "exists", False)
+    seen = []
+    svc = TemplateService(
+        weaviate_client=client, embedder=lambda text: seen.append(text) or [0.1]
+    )
+
+    assert svc.reindex_sync() == 1
+    assert loaded == [("2f0c6f36-6f0e-4c7a-9a55-3f0a3c1b9c01", [0.1])]
+    assert client.created is not None
+    assert "Someone joins a faction" in seen[-1]
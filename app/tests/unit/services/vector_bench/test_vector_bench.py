@@ -0,0 +1,78 @@
+"""Unit tests for :mod:`services.vector_bench` over an exact in-memory store."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.vector_bench import (
+    exact_top_k,
+    recall_at_k,
+    run_benchmark,
+    synthetic_corpus,
+)
+
+
+class ExactCollection:
+    def __init__(self):
+        self.rows = []
+        self.query = SimpleNamespace(near_vector=self._near_vector)
+        self.batch = SimpleNamespace(fixed_size=self._fixed_size)
+
+    @contextmanager
+    def _fixed_size(self, batch_size):
+        yield SimpleNamespace(
+            add_object=lambda properties, vector: self.rows.append((properties, vector))
+        )
+
+    def _near_vector(self, near_vector, limit, return_properties):
+        mat = np.array([v for _, v in self.rows])
+        top = exact_top_k(mat, np.array([near_vector]), limit)[0]
+        return SimpleNamespace(
+            objects=[SimpleNamespace(properties=self.rows[i][0]) for i in top]
+        )
+
+
+class ExactClient:
+    def __init__(self):
+        self.live = {}
+        self.created = []
+        self.collections = SimpleNamespace(
+            exists=lambda name: name in self.live,
+            create=self._create,
+            delete=lambda name: self.live.pop(name),
+        )
+
+    def _create(self, name, **kwargs):
+        self.created.append(kwargs["vector_index_config"])
+        self.live[name] = ExactCollection()
+        return self.live[name]
+
+
+def test_synthetic_corpus_is_unit_length():
+    data = synthetic_corpus(50, 8, clusters=4)
+    assert data.shape == (50, 8)
+    assert np.allclose(np.linalg.norm(data, axis=1), 1.0)
+
+
+def test_exact_top_k_orders_by_similarity():
+    corpus = np.array([[1.0, 0.0], [0.0, 1.0], [0.8, 0.6]])
+    assert exact_top_k(corpus, np.array([[1.0, 0.0]]), 2).tolist() == [[0, 2]]
+
+
+def test_recall_at_k_counts_shared_neighbours():
+    truth = np.array([[0, 1], [2, 3]])
+    assert recall_at_k([[1, 0], [2, 9]], truth) == pytest.approx(0.75)
+
+
+def test_run_benchmark_reports_each_spec_and_cleans_up():
+    client = ExactClient()
+    results = run_benchmark(
+        client, ["flat", "hnsw,ef=16"], n=200, dim=16, queries=5, k=3
+    )
+    assert [r.spec for r in results] == ["flat", "hnsw,ef=16"]
+    assert all(r.recall == pytest.approx(1.0) for r in results)
+    assert all(r.p95_ms >= r.p50_ms >= 0 for r in results)
+    assert client.created[1].ef == 16
+    assert not client.live
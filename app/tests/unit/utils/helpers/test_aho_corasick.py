@@ -0,0 +1,28 @@
+"""Unit tests for the ``AhoCorasick`` helper."""
+
+from utils.helpers.aho_corasick import AhoCorasick
+
+
+def test_finds_overlapping_patterns():
+    ac = AhoCorasick()
+    for word in ["he", "she", "his", "hers"]:
+        ac.add(word, word)
+    found = sorted(ac.iter_matches("ushers"))
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_patterns_added_after_search_are_found():
+    ac = AhoCorasick()
+    ac.add("lyra", 1)
+    assert list(ac.iter_matches("lyra sky")) == [(0, 4, 1)]
+    ac.add("sky", 2)
+    ac.add("sky", 2)
+    assert list(ac.iter_matches("lyra sky")) == [(0, 4, 1), (5, 8, 2)]
+    assert len(ac) == 2
+
+
+def test_empty_pattern_is_ignored():
+    ac = AhoCorasick()
+    ac.add("", 1)
+    assert len(ac) == 0
+    assert list(ac.iter_matches("abc")) == []
@@ -0,0 +1,28 @@
+"""Unit tests for the ``LRUCache`` helper."""
+
+import pytest
+
+from utils.helpers.lru import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    assert cache.set("c", 3) == [("b", 2)]
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_lru_get_many_tracks_hit_ratio():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    assert cache.get_many(["a", "b"]) == {"a": 1}
+    assert cache.hit_ratio == 0.5
+
+
+def test_lru_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
@@ -0,0 +1,89 @@
+"""Aho-Corasick automaton for multi-pattern substring search."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Generic, Iterator, List, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class AhoCorasick(Generic[V]):
+    """Trie with failure links that finds all patterns in one pass over text.
+
+    Patterns can be added at any time. The trie is extended in place and the
+    failure links are rebuilt lazily (one BFS, linear in the trie size) on the
+    next search, so a burst of additions costs a single rebuild.
+
+    Matching is exact; callers normalise patterns and text themselves.
+    """
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # nearest proper suffix node that ends a pattern (0 = none)
+        self._dict: List[int] = [0]
+        # (pattern length, value) pairs ending exactly at the node
+        self._out: List[List[Tuple[int, V]]] = [[]]
+        self._dirty = False
+        self._size = 0
+
+    def add(self, pattern: str, value: V) -> None:
+        """Register ``pattern`` with ``value``; duplicates are ignored."""
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._dict.append(0)
+                self._out.append([])
+            node = nxt
+        entry = (len(pattern), value)
+        if entry not in self._out[node]:
+            self._out[node].append(entry)
+            self._size += 1
+            self._dirty = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, V]]:
+        """Yield ``(start, end, value)`` for every occurrence in ``text``."""
+        if self._dirty:
+            self._build()
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else dict_link[node]
+            while hit:
+                for length, value in out[hit]:
+                    yield i + 1 - length, i + 1, value
+                hit = dict_link[hit]
+
+    def _build(self) -> None:
+        queue: deque[int] = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._dict[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                if fail == child:
+                    fail = 0
+                self._fail[child] = fail
+                self._dict[child] = fail if self._out[fail] else self._dict[fail]
+                queue.append(child)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,67 @@
+"""Small in-process LRU cache used by services for hot lookups."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded mapping that evicts the least recently used key.
+
+    Not thread-safe: callers are expected to touch it from the event loop only.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        if key not in self._data:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self._data[key]
+
+    def get_many(self, keys: Iterable[K]) -> Dict[K, V]:
+        """Return cached values for ``keys``; missing keys are omitted."""
+        found: Dict[K, V] = {}
+        for key in keys:
+            val = self.get(key)
+            if val is not None:
+                found[key] = val
+        return found
+
+    def set(self, key: K, value: V) -> List[Tuple[K, V]]:
+        """Store ``value`` and return the ``(key, value)`` pairs evicted."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        evicted: List[Tuple[K, V]] = []
+        while len(self._data) > self.maxsize:
+            evicted.append(self._data.popitem(last=False))
+        return evicted
+
+    def pop(self, key: K) -> Optional[V]:
+        return self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)